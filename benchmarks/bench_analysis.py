@@ -0,0 +1,36 @@
+"""
+Analysis Benchmark
+
+Measures static shape and cost analysis of yolov3 for a growing batch of candidate input resolutions.
+
+usage: python benchmarks/bench_analysis.py [--max-resolutions N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import time
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_network import get_yolov3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-resolutions', type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    layers = get_yolov3()
+    count = 1
+    while count <= args.max_resolutions:
+        sizes = [32 * (10 + i % 20) for i in range(count)]
+        input_dims = [(size, size, 3) for size in sizes]
+        start = time.perf_counter()
+        cost = analyze(layers, input_dims)
+        cost.total_bflops
+        seconds = time.perf_counter() - start
+        print(f'{count:>6} resolutions: {seconds * 1e3:8.2f} ms  {count / seconds:12,.0f} resolutions/s')
+        count *= 4
+
+
+if __name__ == '__main__':
+    main()
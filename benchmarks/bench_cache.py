@@ -0,0 +1,73 @@
+"""
+Config Cache Benchmark
+
+Regenerates a set of yolov3 configs with plain generate_config and through the ConfigCache when
+nothing changed (hits) and when one optimizer field changed (patches).
+
+usage: python benchmarks/bench_cache.py [--configs N] [--layers N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from darknet_config_generator.yolo_cache import ConfigCache
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import _get_downsample_conv2d, _get_mid_conv2d_block, get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--configs', type=int, default=200)
+    parser.add_argument('--layers', type=int, default=0, help='use synthetic networks of this many layers instead of yolov3')
+    args = parser.parse_args(argv)
+
+    def build_layers(index):
+        if args.layers:
+            return _get_downsample_conv2d(filters=128, stride=1) + _get_mid_conv2d_block(start_filters=64,
+                                                                                         repeats=args.layers // 3)
+        return get_yolov3(num_classes=1 + index % 80)
+
+    networks = [YOLONetwork(optimizer=YOLOOptimizer(), layers=build_layers(index)) for index in range(args.configs)]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        plain_paths = [os.path.join(work_dir, f'plain_{index}.cfg') for index in range(args.configs)]
+        paths = [os.path.join(work_dir, f'{index}.cfg') for index in range(args.configs)]
+        cache = ConfigCache(os.path.join(work_dir, 'cache'))
+
+        def plain():
+            for network, path in zip(networks, plain_paths):
+                network.generate_config(path)
+
+        def cached():
+            for network, path in zip(networks, paths):
+                network.generate_config(path, cache=cache)
+
+        def change_learning_rate():
+            for network in networks:
+                network.optimizer.learning_rate *= 2
+
+        results = [('plain generate_config', _timed(plain))]
+        _timed(cached)
+        results.append(('cache, unchanged', _timed(cached)))
+        change_learning_rate()
+        results.append(('plain, one field changed', _timed(plain)))
+        change_learning_rate()
+        results.append(('cache, one field changed', _timed(cached)))
+
+        for name, seconds in results:
+            print(f'{name:<26} {seconds * 1e3 / args.configs:8.3f} ms/config')
+        print(cache.stats)
+
+
+if __name__ == '__main__':
+    main()
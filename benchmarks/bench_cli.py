@@ -0,0 +1,69 @@
+"""
+CLI Cold-Start Benchmark
+
+Measures the wall time of short-lived darknet-config-gen processes against a bare interpreter and
+compares generating a batch of configs in one process with one process per config. Exits with
+status 1 if generating a single config takes longer than the cold-start budget.
+
+usage: python benchmarks/bench_cli.py [--repeats N] [--configs N] [--budget-ms MS]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CLI = [sys.executable, '-m', 'darknet_config_generator.cli']
+
+
+def _median_ms(command, repeats:int):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+def _write_manifest(path:str, out_dir:str, configs:int):
+    networks = [{'name': f'net_{index}', 'num_classes': 1 + index % 80} for index in range(configs)]
+    with open(path, 'w') as file_obj:
+        json.dump({'output_dir': out_dir, 'networks': networks}, file_obj)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--configs', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help='allowed wall time of generating one config in a fresh process')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        single = os.path.join(work_dir, 'single.json')
+        batch = os.path.join(work_dir, 'batch.json')
+        _write_manifest(single, os.path.join(work_dir, 'single'), 1)
+        _write_manifest(batch, os.path.join(work_dir, 'batch'), args.configs)
+
+        interpreter = _median_ms([sys.executable, '-c', 'pass'], args.repeats)
+        help_ms = _median_ms(CLI + ['--help'], args.repeats)
+        single_ms = _median_ms(CLI + ['generate', single], args.repeats)
+        batch_ms = _median_ms(CLI + ['generate', batch], max(1, args.repeats // 2))
+
+    print(f'interpreter startup          {interpreter:8.1f} ms')
+    print(f'darknet-config-gen --help    {help_ms:8.1f} ms')
+    print(f'generate 1 config            {single_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)')
+    print(f'generate {args.configs} configs, 1 process  {batch_ms:8.1f} ms')
+    print(f'generate {args.configs} configs, {args.configs} processes ~{single_ms * args.configs:8.1f} ms')
+    if single_ms > args.budget_ms:
+        print(f'cold start exceeds the budget by {single_ms - args.budget_ms:.1f} ms')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
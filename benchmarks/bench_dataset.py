@@ -0,0 +1,60 @@
+"""
+Dataset Manifest Benchmark
+
+Builds a synthetic image tree with darknet label files and times build_dataset on a cold run, on
+an unchanged re-run served from the label cache, and after touching a few label files.
+
+usage: python benchmarks/bench_dataset.py [--images N] [--workers N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from darknet_config_generator.yolo_dataset import build_dataset
+
+
+def _make_tree(root, images, per_directory=1000, seed=0):
+    rng = random.Random(seed)
+    for index in range(images):
+        part = f'part{index // per_directory}'
+        image_dir, label_dir = os.path.join(root, 'images', part), os.path.join(root, 'labels', part)
+        if index % per_directory == 0:
+            os.makedirs(image_dir)
+            os.makedirs(label_dir)
+        open(os.path.join(image_dir, f'{index}.jpg'), 'wb').close()
+        with open(os.path.join(label_dir, f'{index}.txt'), 'w') as file_obj:
+            for _ in range(rng.randint(1, 6)):
+                file_obj.write(f'{rng.randrange(3)} {rng.random():.6f} {rng.random():.6f} '
+                               f'{rng.uniform(0.01, 0.5):.6f} {rng.uniform(0.01, 0.5):.6f}\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        _make_tree(work_dir, args.images)
+        image_root, output_dir = os.path.join(work_dir, 'images'), os.path.join(work_dir, 'out')
+
+        def run():
+            return build_dataset(image_root, output_dir, ['a', 'b', 'c'], workers=args.workers)
+
+        cold = run()
+        cached = run()
+        for index in range(0, args.images, max(1, args.images // 100)):
+            os.utime(os.path.join(work_dir, 'labels', f'part{index // 1000}', f'{index}.txt'), ns=(0, index + 1))
+        touched = run()
+
+    print(f'{args.images} images, {cold.boxes} boxes')
+    for name, stats in [('cold', cold), ('unchanged re-run', cached), ('1% labels touched', touched)]:
+        print(f'{name:<18} {stats.seconds * 1e3:9.1f} ms ({stats.validated} label files read, {stats.cached} cached)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Multi-Target Export Benchmark
+
+Compares exporting train/test/multi-resolution variants by rebuilding and re-rendering the network
+per variant against the multi-target exporter, which renders the layers once.
+
+usage: python benchmarks/bench_export.py [--resolutions N] [--repeats N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_export import MultiTargetExporter, standard_variants
+from darknet_config_generator.yolo_network import get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+
+
+def _best(func, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--resolutions', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    network = YOLONetwork(optimizer=YOLOOptimizer(), layers=get_yolov3())
+    resolutions = [(320 + 32 * i, 320 + 32 * i, 3) for i in range(args.resolutions)]
+    variants = standard_variants(network, resolutions)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        def rebuild_each():
+            for variant in variants:
+                net = YOLONetwork(input_dim=variant.input_dim or network.input_dim,
+                                  image_augmentation=network.img_aug,
+                                  optimizer=variant.optimizer or network.optimizer, layers=get_yolov3())
+                net.generate_config(os.path.join(out_dir, f'{variant.name}.cfg'))
+
+        def multi_target():
+            MultiTargetExporter(network).export(variants, out_dir)
+
+        def render_only():
+            exporter = MultiTargetExporter(network)
+            for variant in variants:
+                exporter.render_bytes(variant)
+
+        results = {
+            'rebuild per variant': _best(rebuild_each, args.repeats),
+            'multi-target export': _best(multi_target, args.repeats),
+            'single generate_config': _best(lambda: network.generate_config(os.path.join(out_dir, 'single.cfg')),
+                                            args.repeats),
+            'multi-target render': _best(render_only, args.repeats),
+            'single render': _best(network.render_bytes, args.repeats),
+        }
+
+    print(f'variants: {len(variants)}')
+    for name, seconds in results.items():
+        print(f'{name:>24}: {seconds * 1e3:8.3f} ms')
+    print(f'{"speedup":>24}: {results["rebuild per variant"] / results["multi-target export"]:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Frozen Layer Specs Benchmark
+
+Holds many architecture-search candidates derived from yolov3 (one convolution widened per
+candidate) as lists of mutable layers and as NetworkSpecs of interned frozen layers, and reports
+construction time and the memory the candidates keep alive.
+
+usage: python benchmarks/bench_frozen.py [--candidates N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from darknet_config_generator.yolo_frozen import NetworkSpec, interned_count
+from darknet_config_generator.yolo_layers import ConvolutionLayer
+from darknet_config_generator.yolo_network import get_yolov3
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    candidates = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return candidates, seconds, current
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    conv_indices = [index for index, layer in enumerate(get_yolov3()) if isinstance(layer, ConvolutionLayer)]
+    rng = random.Random(args.seed)
+    edits = [(rng.choice(conv_indices), rng.choice([16, 32, 64, 128])) for _ in range(args.candidates)]
+
+    def build_mutable():
+        candidates = []
+        for index, extra_filters in edits:
+            layers = get_yolov3()
+            layers[index].filters += extra_filters
+            candidates.append(layers)
+        return candidates
+
+    def build_frozen():
+        base = NetworkSpec(get_yolov3())
+        return [base.replace_layer(index, filters=base[index].filters + extra_filters)
+                for index, extra_filters in edits]
+
+    mutable, mutable_seconds, mutable_bytes = _measure(build_mutable)
+    frozen, frozen_seconds, frozen_bytes = _measure(build_frozen)
+    assert all(''.join(layer.render() for layer in spec) == ''.join(layer.render() for layer in layers)
+               for spec, layers in zip(frozen[:20], mutable[:20]))
+
+    print(f'{args.candidates} candidates of {len(mutable[0])} layers')
+    print(f'mutable layer lists: {mutable_seconds * 1e3:9.1f} ms {mutable_bytes / 2**20:9.2f} MiB')
+    print(f'frozen NetworkSpecs: {frozen_seconds * 1e3:9.1f} ms {frozen_bytes / 2**20:9.2f} MiB '
+          f'({interned_count()} distinct layers)')
+    print(f'memory reduction: {mutable_bytes / frozen_bytes:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
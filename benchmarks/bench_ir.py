@@ -0,0 +1,71 @@
+"""
+Incremental Analysis Benchmark
+
+Edits the filters of random convolutions of a large synthetic network through NetworkIR and
+compares the update time with re-analyzing the whole network. Also reports the worst case of a
+stride edit near the input, which changes every later shape.
+
+usage: python benchmarks/bench_ir.py [--layers N] [--edits N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import random
+import statistics
+import time
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_ir import NetworkIR
+from darknet_config_generator.yolo_layers import ConvolutionLayer
+from darknet_config_generator.yolo_network import _get_downsample_conv2d, _get_mid_conv2d_block
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--layers', type=int, default=10000)
+    parser.add_argument('--edits', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    layers = _get_downsample_conv2d(filters=128, stride=1) + _get_mid_conv2d_block(start_filters=64,
+                                                                                   repeats=args.layers // 3)
+    input_dim = (416, 416, 3)
+
+    start = time.perf_counter()
+    ir = NetworkIR(layers, input_dim)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyze(layers, input_dim)
+    analyze_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    convolutions = [index for index, layer in enumerate(layers) if isinstance(layer, ConvolutionLayer)]
+    samples, recomputed = [], []
+    for _ in range(args.edits):
+        index = rng.choice(convolutions)
+        start = time.perf_counter()
+        ir.update(index, filters=rng.choice([32, 64, 128, 256]))
+        samples.append(time.perf_counter() - start)
+        recomputed.append(ir.recomputed)
+
+    full = analyze(layers, input_dim)
+    assert ir.total_params == int(full.total_params[0])
+    assert abs(ir.total_bflops - float(full.total_bflops[0])) < 1e-6 * max(1.0, ir.total_bflops)
+    assert ir.issues == full.issues
+
+    start = time.perf_counter()
+    ir.update(0, stride=2)
+    stride_seconds = time.perf_counter() - start
+
+    print(f'{len(layers)} layers')
+    print(f'build IR:                 {build_seconds * 1e3:9.2f} ms')
+    print(f'full analyze:             {analyze_seconds * 1e3:9.2f} ms')
+    print(f'filters edit, median:     {statistics.median(samples) * 1e3:9.3f} ms '
+          f'({statistics.median(recomputed):.0f} nodes recomputed)')
+    print(f'filters edit, max:        {max(samples) * 1e3:9.3f} ms ({max(recomputed)} nodes recomputed)')
+    print(f'stride edit at layer 0:   {stride_seconds * 1e3:9.2f} ms ({ir.recomputed} nodes recomputed)')
+
+
+if __name__ == '__main__':
+    main()
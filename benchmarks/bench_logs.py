@@ -0,0 +1,83 @@
+"""
+Training Log Benchmark
+
+Writes a synthetic darknet training log (summary line plus region IoU lines per iteration) and
+measures parse_log throughput, with and without the IoU column, against a per-line python parser.
+
+usage: python benchmarks/bench_logs.py [--iterations N] [--regions N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from darknet_config_generator.yolo_logs import parse_log
+
+
+def _write_log(path, iterations, regions, seed=0):
+    rng = random.Random(seed)
+    avg_loss = None
+    with open(path, 'w') as file_obj:
+        for iteration in range(1, iterations + 1):
+            for region in range(regions):
+                file_obj.write(f'Region {82 + 12 * (region % 3)} Avg IOU: {rng.random():f}, Class: 0.528, Obj: 0.460, '
+                               f'No Obj: 0.457, .5R: 0.176, .75R: 0.000,  count: {rng.randint(1, 9)}\n')
+            loss = 1 + 10 / iteration + rng.random() * 0.1
+            avg_loss = loss if avg_loss is None else avg_loss * 0.9 + loss * 0.1
+            file_obj.write(f'{iteration}: {loss:f}, {avg_loss:f} avg, 0.001000 rate, {rng.random():f} seconds, '
+                           f'{iteration * 64} images\n')
+
+
+def _python_parse(path):
+    rows, weighted, total = [], 0.0, 0
+    with open(path) as file_obj:
+        for line in file_obj:
+            if line.startswith('Region'):
+                count = int(line.rsplit('count: ', 1)[1])
+                weighted += float(line.split('IOU: ', 1)[1].split(',', 1)[0]) * count
+                total += count
+            elif line.endswith('images\n') and ': ' in line:
+                iteration, rest = line.split(': ', 1)
+                fields = rest.split(', ')
+                rows.append((int(iteration), float(fields[0]), float(fields[1].split()[0]),
+                             float(fields[2].split()[0]), float(fields[3].split()[0]), int(fields[4].split()[0]),
+                             weighted / total if total else float('nan')))
+                weighted, total = 0.0, 0
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--regions', type=int, default=24)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'train.log')
+        _write_log(path, args.iterations, args.regions)
+        size = os.path.getsize(path) / 2**20
+
+        start = time.perf_counter()
+        log = parse_log(path)
+        parse_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parse_log(path, iou=False)
+        no_iou_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = _python_parse(path)
+        python_seconds = time.perf_counter() - start
+        assert len(rows) == len(log.iteration) == args.iterations
+
+    print(f'{size:.1f} MiB, {args.iterations} iterations')
+    for name, seconds in [('parse_log', parse_seconds), ('parse_log, iou=False', no_iou_seconds),
+                          ('per-line python', python_seconds)]:
+        print(f'{name:<22} {seconds * 1e3:8.1f} ms ({size / seconds:6.1f} MiB/s)')
+
+
+if __name__ == '__main__':
+    main()
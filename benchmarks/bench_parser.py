@@ -0,0 +1,63 @@
+"""
+Parser Benchmark
+
+Measures indexing, streaming and random-access throughput of the cfg parser on a large
+synthetic configuration.
+
+usage: python benchmarks/bench_parser.py [--sections N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import _get_mid_conv2d_block
+from darknet_config_generator.yolo_parser import DarknetConfig, iter_layers
+
+
+def _report(name, seconds, count):
+    print(f'{name:>16}: {seconds * 1e3:10.1f} ms  {count / seconds:12,.0f} sections/s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sections', type=int, default=100000)
+    parser.add_argument('--random-reads', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    network = YOLONetwork(layers=_get_mid_conv2d_block(start_filters=64, repeats=max(1, args.sections // 3)))
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, 'synthetic.cfg')
+        network.generate_config(path)
+        size_mb = os.path.getsize(path) / 2**20
+        print(f'sections: {len(network.layers) + 1}, size: {size_mb:.1f} MiB')
+
+        start = time.perf_counter()
+        config = DarknetConfig(path)
+        _report('index', time.perf_counter() - start, len(config))
+
+        start = time.perf_counter()
+        with open(path) as file_obj:
+            count = sum(1 for _ in iter_layers(file_obj))
+        _report('stream', time.perf_counter() - start, count)
+
+        indices = [random.randrange(config.num_layers) for _ in range(args.random_reads)]
+        start = time.perf_counter()
+        for index in indices:
+            config.layer(index)
+        _report('random access', time.perf_counter() - start, len(indices))
+
+        start = time.perf_counter()
+        rendered = config.to_network().render_bytes()
+        _report('round-trip', time.perf_counter() - start, len(config))
+        with open(path, 'rb') as file_obj:
+            assert rendered == file_obj.read(), 'round-trip mismatch'
+        config.close()
+
+
+if __name__ == '__main__':
+    main()
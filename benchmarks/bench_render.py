@@ -0,0 +1,75 @@
+"""
+Rendering Benchmark
+
+Compares the previous line-by-line export path of generate_config against the buffered
+single-write rendering engine.
+
+usage: python benchmarks/bench_render.py [--repeats N] [--out-dir DIR]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import get_yolov3
+
+
+class _CountingFile:
+    """ wraps a file object and counts the number of write calls"""
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self.file_obj.write(data)
+
+
+def _legacy_generate_config(network, save_to):
+    """ reproduces the previous generate_config which issued one write per cfg line"""
+    with open(save_to, 'w') as file_obj:
+        counting_file = _CountingFile(file_obj)
+        for line in network.render().splitlines(keepends=True):
+            counting_file.write(line)
+    return counting_file.writes
+
+
+def _time(func, repeats):
+    """ returns the best wall-clock time of func over the given repeats"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--out-dir', default=None, help='directory to write configs to (default: a temp dir)')
+    args = parser.parse_args(argv)
+
+    network = YOLONetwork(layers=get_yolov3())
+    with tempfile.TemporaryDirectory(dir=args.out_dir) as out_dir:
+        save_to = os.path.join(out_dir, 'yolov3.cfg')
+        legacy_writes = _legacy_generate_config(network, save_to)
+
+        results = {
+            'render': _time(network.render, args.repeats),
+            'legacy generate_config': _time(lambda: _legacy_generate_config(network, save_to), args.repeats),
+            'generate_config': _time(lambda: network.generate_config(save_to), args.repeats),
+        }
+
+    print(f'layers: {len(network.layers)}, cfg bytes: {len(network.render_bytes())}')
+    print(f'legacy write calls: {legacy_writes}, buffered write calls: 1')
+    for name, seconds in results.items():
+        print(f'{name:>24}: {seconds * 1e3:8.3f} ms')
+    print(f'{"speedup":>24}: {results["legacy generate_config"] / results["generate_config"]:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Learning Rate Schedule Benchmark
+
+Simulates many candidate step schedules in one batched call and compares the time with a plain
+python loop over darknet's per-iteration rule.
+
+usage: python benchmarks/bench_schedule.py [--candidates N] [--max-batches N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import random
+import time
+
+from darknet_config_generator.yolo_schedule import Schedule, simulate_many
+
+
+def _python_rates(schedule):
+    rates = []
+    for iteration in range(schedule.max_batches):
+        if iteration < schedule.burn_in:
+            rates.append(schedule.learning_rate * (iteration / schedule.burn_in) ** schedule.power)
+            continue
+        rate = schedule.learning_rate
+        for step, scale in zip(schedule.steps, schedule.scales):
+            if step > iteration:
+                break
+            rate *= scale
+        rates.append(rate)
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=100)
+    parser.add_argument('--max-batches', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    schedules = []
+    for _ in range(args.candidates):
+        steps = sorted(rng.sample(range(args.max_batches), 3))
+        schedules.append(Schedule(learning_rate=rng.choice([1e-3, 2e-3, 5e-3]), max_batches=args.max_batches,
+                                  burn_in=1000, policy='steps', steps=tuple(steps), scales=(0.1, 0.1, 0.1), power=4))
+
+    start = time.perf_counter()
+    lr = simulate_many(schedules)
+    batched_seconds = time.perf_counter() - start
+
+    sample = schedules[:max(1, args.candidates // 20)]
+    start = time.perf_counter()
+    for schedule in sample:
+        _python_rates(schedule)
+    loop_seconds = (time.perf_counter() - start) * len(schedules) / len(sample)
+
+    print(f'{args.candidates} schedules x {args.max_batches} iterations ({lr.nbytes / 2**20:.1f} MiB)')
+    print(f'batched simulate_many: {batched_seconds * 1e3:9.1f} ms')
+    print(f'python loop (est.):    {loop_seconds * 1e3:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
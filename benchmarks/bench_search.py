@@ -0,0 +1,51 @@
+"""
+Architecture Search Benchmark
+
+Measures how many scaled yolov3 candidates per second the static cost model evaluates, compared
+with building and analyzing every candidate separately, then runs a short search.
+
+usage: python benchmarks/bench_search.py [--candidates N] [--workers N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import random
+import time
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_network import get_scaled_yolov3
+from darknet_config_generator.yolo_search import evaluate, random_candidate, search
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-bflops', type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    candidates = [random_candidate(rng) for _ in range(args.candidates)]
+
+    start = time.perf_counter()
+    evaluations = evaluate(candidates)
+    model_seconds = time.perf_counter() - start
+
+    sample = candidates[:max(1, args.candidates // 50)]
+    start = time.perf_counter()
+    for candidate, evaluation in zip(sample, evaluations):
+        layers = get_scaled_yolov3(depth_multiple=candidate.depth_multiple, width_multiple=candidate.width_multiple)
+        cost = analyze(layers, (candidate.resolution, candidate.resolution, 3))
+        assert int(cost.total_params[0]) == evaluation.params
+    separate_seconds = (time.perf_counter() - start) / len(sample)
+
+    result = search(max_bflops=args.max_bflops, workers=args.workers)
+
+    print(f'static cost model:       {args.candidates / model_seconds:9.0f} candidates/s')
+    print(f'build and analyze each:  {1 / separate_seconds:9.0f} candidates/s')
+    print(f'search (workers={args.workers}):     {len(result.evaluations)} candidates in {result.seconds:.2f}s, '
+          f'{len(result.front)} on the Pareto front under {args.max_bflops} BFLOPs')
+
+
+if __name__ == '__main__':
+    main()
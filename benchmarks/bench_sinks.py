@@ -0,0 +1,69 @@
+"""
+Streaming Export Benchmark
+
+Compares writing a large synthetic network by rendering it into one string against streaming it
+section by section into file and gzip sinks, reporting wall time and peak traced memory.
+
+usage: python benchmarks/bench_sinks.py [--layers N] [--buffer-size BYTES]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import gzip
+import os
+import tempfile
+import time
+import tracemalloc
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import _get_downsample_conv2d, _get_mid_conv2d_block
+from darknet_config_generator.yolo_sinks import FileSink, GzipSink, stream_to
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--layers', type=int, default=100000)
+    parser.add_argument('--buffer-size', type=int, default=1 << 16)
+    args = parser.parse_args(argv)
+
+    layers = _get_downsample_conv2d(filters=128, stride=1) + _get_mid_conv2d_block(start_filters=64,
+                                                                                   repeats=args.layers // 3)
+    network = YOLONetwork(layers=layers)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'net.cfg')
+
+        def render_file():
+            with open(path, 'wb') as file_obj:
+                file_obj.write(network.render_bytes())
+
+        def render_gzip():
+            with gzip.open(path + '.gz', 'wb') as file_obj:
+                file_obj.write(network.render_bytes())
+
+        def stream(sink_type):
+            def run():
+                with sink_type(path + ('.gz' if sink_type is GzipSink else ''), buffer_size=args.buffer_size) as sink:
+                    stream_to(network, sink)
+            return run
+
+        cases = [('render + write', render_file), ('stream FileSink', stream(FileSink)),
+                 ('render + gzip', render_gzip), ('stream GzipSink', stream(GzipSink))]
+        print(f'{len(layers)} layers, {len(network.render_bytes()) / 2**20:.1f} MiB config')
+        for name, func in cases:
+            seconds, peak = _measure(func)
+            print(f'{name:<18} {seconds * 1e3:9.1f} ms   peak {peak / 2**20:8.2f} MiB')
+
+
+if __name__ == '__main__':
+    main()
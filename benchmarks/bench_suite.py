@@ -0,0 +1,194 @@
+"""
+Benchmark Suite
+
+Benchmarks network construction, rendering, generate_config, parsing and analysis on synthetic
+networks from 100 to 100k layers, plus bulk generation of many configs. Reports throughput and
+peak traced memory, stores results as JSON and compares them against a saved baseline.
+
+usage:
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json      # exits 1 on regressions
+    python benchmarks/bench_suite.py --quick --filter parse
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import _get_downsample_conv2d, _get_mid_conv2d_block, get_alexnet, get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_parser import DarknetConfig, iter_layers
+
+LAYER_COUNTS = (100, 1000, 10000, 100000)
+QUICK_LAYER_COUNTS = (100, 1000, 10000)
+BULK_CONFIGS = 10000
+QUICK_BULK_CONFIGS = 1000
+
+
+class Case:
+    """
+    Benchmark Case
+
+    setup() returns the state passed to run(); run() processes `items` units of work.
+    """
+    def __init__(self, name:str, run, items:int, unit:str, setup=None, repeats:int=5):
+        self.name = name
+        self.run = run
+        self.items = items
+        self.unit = unit
+        self.setup = setup or (lambda: None)
+        self.repeats = repeats
+
+
+def synthetic_layers(num_layers:int):
+    """ returns a residual network of about num_layers layers: a stem convolution and residual blocks"""
+    stem = _get_downsample_conv2d(filters=128, stride=1)
+    return stem + _get_mid_conv2d_block(start_filters=64, repeats=max(1, num_layers // 3))
+
+
+def build_cases(layer_counts, bulk_configs:int, work_dir:str):
+    cases = [
+        Case('construct/yolov3', lambda _: get_yolov3(), 1, 'networks', repeats=5),
+        Case('construct/alexnet', lambda _: get_alexnet(), 1, 'networks', repeats=5),
+    ]
+
+    for count in layer_counts:
+        repeats = 5 if count < 100000 else 1
+        network_setup = lambda count=count: YOLONetwork(layers=synthetic_layers(count))
+        cfg_path = os.path.join(work_dir, f'synthetic_{count}.cfg')
+
+        def parse_setup(count=count, cfg_path=cfg_path):
+            YOLONetwork(layers=synthetic_layers(count)).generate_config(cfg_path)
+            return cfg_path
+
+        def stream_layers(path):
+            with open(path) as file_obj:
+                for _ in iter_layers(file_obj):
+                    pass
+
+        def round_trip(path):
+            with DarknetConfig(path) as config:
+                config.to_network().render()
+
+        cases += [
+            Case(f'construct/synthetic_{count}', lambda _, count=count: synthetic_layers(count),
+                 count, 'layers', repeats=repeats),
+            Case(f'render/synthetic_{count}', lambda network: network.render(),
+                 count, 'layers', setup=network_setup, repeats=repeats),
+            Case(f'generate_config/synthetic_{count}', lambda network, path=cfg_path: network.generate_config(path),
+                 count, 'layers', setup=network_setup, repeats=repeats),
+            Case(f'parse/index_{count}', lambda path: DarknetConfig(path).close(),
+                 count, 'sections', setup=parse_setup, repeats=repeats),
+            Case(f'parse/stream_{count}', stream_layers, count, 'sections', setup=parse_setup, repeats=repeats),
+            Case(f'parse/round_trip_{count}', round_trip, count, 'sections', setup=parse_setup, repeats=repeats),
+            Case(f'analyze/synthetic_{count}', lambda network: analyze(network).total_bflops,
+                 count, 'layers', setup=network_setup, repeats=repeats),
+        ]
+
+    bulk_dir = os.path.join(work_dir, 'bulk')
+    os.makedirs(bulk_dir, exist_ok=True)
+
+    def bulk_generate(_):
+        for index in range(bulk_configs):
+            optimizer = YOLOOptimizer(learning_rate=0.001 * (1 + index % 10), burn_in=1000 + index)
+            network = YOLONetwork(optimizer=optimizer, layers=get_yolov3(num_classes=1 + index % 80))
+            network.generate_config(os.path.join(bulk_dir, f'{index}.cfg'))
+
+    cases.append(Case(f'bulk/generate_{bulk_configs}', bulk_generate, bulk_configs, 'configs', repeats=1))
+    return cases
+
+
+def measure(case:Case, sample_time:float=0.05):
+    """
+    returns best wall time and peak traced memory of a case
+
+    Fast cases are run several times per sample, so every sample lasts about sample_time seconds.
+    """
+    state = case.setup()
+    start = time.perf_counter()
+    case.run(state)
+    number = max(1, int(sample_time / max(time.perf_counter() - start, 1e-9)))
+
+    best = float('inf')
+    for _ in range(case.repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.run(state)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    # a separate traced run, since tracing slows allocation-heavy code
+    tracemalloc.start()
+    case.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'seconds': best, 'throughput': case.items / best, 'unit': f'{case.unit}/s', 'peak_bytes': peak}
+
+
+def compare(results:dict, baseline:dict, threshold:float):
+    """ returns the cases whose throughput dropped more than threshold against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f'{name:<36} new')
+            continue
+        ratio = result['throughput'] / previous['throughput']
+        memory_ratio = result['peak_bytes'] / max(previous['peak_bytes'], 1)
+        flag = 'REGRESSION' if ratio < 1 - threshold else ''
+        print(f'{name:<36} throughput {ratio:6.2f}x  peak memory {memory_ratio:6.2f}x  {flag}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='skip the 100k-layer cases and use fewer bulk configs')
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this string')
+    parser.add_argument('--output', default=None, help='write results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='compare against this results JSON file')
+    parser.add_argument('--save-baseline', default=None, help='write results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed throughput drop (default 10%%)')
+    args = parser.parse_args(argv)
+
+    layer_counts = QUICK_LAYER_COUNTS if args.quick else LAYER_COUNTS
+    bulk_configs = QUICK_BULK_CONFIGS if args.quick else BULK_CONFIGS
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for case in build_cases(layer_counts, bulk_configs, work_dir):
+            if args.filter not in case.name:
+                continue
+            result = results[case.name] = measure(case)
+            print(f'{case.name:<36} {result["seconds"] * 1e3:10.2f} ms {result["throughput"]:14,.0f} '
+                  f'{result["unit"]:<12} peak {result["peak_bytes"] / 2**20:8.2f} MiB', flush=True)
+
+    report = {
+        'meta': {'python': sys.version.split()[0], 'platform': platform.platform(),
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as file_obj:
+            json.dump(report, file_obj, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            regressions = compare(results, json.load(file_obj), args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
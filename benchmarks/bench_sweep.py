@@ -0,0 +1,44 @@
+"""
+Sweep Benchmark
+
+Measures how hyperparameter sweep throughput scales with the number of worker processes.
+
+usage: python benchmarks/bench_sweep.py [--points N] [--max-workers N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import os
+import tempfile
+
+from darknet_config_generator.yolo_sweep import run_sweep
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    base_spec = {'architecture': 'yolov3', 'num_classes': 80}
+    space = {'grid': {'optimizer.learning_rate': [0.001, 0.002, 0.005, 0.01],
+                      'optimizer.burn_in': [500, 1000]},
+             'random': {'optimizer.momentum': {'uniform': [0.85, 0.95]},
+                        'augmentation.hue': {'uniform': [0.0, 0.2]},
+                        'augmentation.angle': {'randint': [0, 15]}}}
+    samples = max(1, args.points // 8)
+
+    workers, baseline = 1, None
+    with tempfile.TemporaryDirectory() as out_dir:
+        while workers <= args.max_workers:
+            stats = run_sweep(base_spec, space, os.path.join(out_dir, f'sweep_{workers}.tar'),
+                              samples=samples, workers=workers)
+            rate = stats.points / stats.seconds
+            baseline = baseline or rate
+            print(f'{workers:>3} workers: {stats.points} points in {stats.seconds:6.2f}s '
+                  f'{rate:10,.0f} points/s  {rate / baseline:5.2f}x')
+            workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Network Template Benchmark
+
+Renders get_yolov3 for a range of class counts through the full build-and-render path and through
+a compiled NetworkTemplate, checking that both produce the same bytes.
+
+usage: python benchmarks/bench_template.py [--variants N]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import time
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+from darknet_config_generator.yolo_template import compile_template
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--variants', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    input_dim = (416, 416, 3)
+    optimizer, image_augmentation = YOLOOptimizer(), YOLOImageAugmentation()
+    class_counts = range(1, args.variants + 1)
+
+    start = time.perf_counter()
+    full = [YOLONetwork(input_dim=input_dim, image_augmentation=image_augmentation, optimizer=optimizer,
+                        layers=get_yolov3(num_classes=num_classes)).render_bytes() for num_classes in class_counts]
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    template = compile_template(get_yolov3, input_dim=input_dim)
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    templated = [template.render(num_classes, optimizer, image_augmentation) for num_classes in class_counts]
+    template_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for num_classes in class_counts:
+        template.render_layers(num_classes)
+    layers_seconds = time.perf_counter() - start
+
+    assert templated == full
+
+    print(f'{args.variants} variants of get_yolov3, {len(template.slots)} slots')
+    print(f'build and render:         {full_seconds * 1e6 / args.variants:9.1f} us/variant')
+    print(f'compile template (once):  {compile_seconds * 1e3:9.1f} ms')
+    print(f'template render:          {template_seconds * 1e6 / args.variants:9.1f} us/variant')
+    print(f'template layers only:     {layers_seconds * 1e6 / args.variants:9.1f} us/variant')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Config Service Load Generator
+
+Sends POST /render requests over keep-alive connections to a running yolo_service instance, or to
+one it spawns, and reports throughput, latency percentiles and the X-Cache mix.
+
+Requests cycle through --distinct specifications (yolov3 with different class counts), so the mix
+of renders, coalesced requests and LRU hits follows from --distinct and --concurrency.
+
+usage: python benchmarks/loadgen.py --spawn [--requests N] [--concurrency N] [--distinct N]
+       python benchmarks/loadgen.py --port 8080 | --unix /tmp/darknet.sock
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def _connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def _request(reader, writer, body:bytes):
+    writer.write(b'POST /render HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('x-cache', 'error')
+
+
+async def _client(args, bodies, counter, latencies, sources):
+    reader, writer = await _connect(args)
+    try:
+        while True:
+            index = next(counter)
+            if index >= args.requests:
+                return
+            start = time.perf_counter()
+            status, source = await _request(reader, writer, bodies[index % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            sources[source if status == 200 else f'status {status}'] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(args):
+    import itertools
+
+    bodies = [json.dumps({'architecture': 'yolov3', 'num_classes': 1 + index}).encode('utf-8')
+              for index in range(args.distinct)]
+    counter, latencies, sources = itertools.count(), [], collections.Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(args, bodies, counter, latencies, sources) for _ in range(args.concurrency)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda fraction: latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1e3
+    print(f'{len(latencies)} requests, {args.concurrency} connections, {args.distinct} distinct specs')
+    print(f'throughput: {len(latencies) / seconds:9.1f} requests/s')
+    print(f'latency ms: mean {statistics.mean(latencies) * 1e3:.2f}, p50 {percentile(0.5):.2f}, '
+          f'p90 {percentile(0.9):.2f}, p99 {percentile(0.99):.2f}, max {latencies[-1] * 1e3:.2f}')
+    print('responses:  ' + ', '.join(f'{name} {count}' for name, count in sorted(sources.items())))
+
+
+def _spawn(args, work_dir):
+    """ starts a service on a Unix socket in work_dir and waits until it listens"""
+    args.unix = os.path.join(work_dir, 'service.sock')
+    command = [sys.executable, '-m', 'darknet_config_generator.yolo_service', '--unix', args.unix,
+               '--executor', args.executor]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(args.unix):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError('the service did not start')
+        time.sleep(0.05)
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--spawn', action='store_true', help='start a local service on a Unix socket')
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread', help='executor of a spawned service')
+    parser.add_argument('--workers', type=int, default=None, help='workers of a spawned service')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--distinct', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        process = _spawn(args, work_dir) if args.spawn else None
+        try:
+            asyncio.run(run_load(args))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Command Line Interface
+
+Entry point of the darknet-config-gen console script. Only argparse is imported at startup; the
+network descriptors are imported by the command that needs them, keeping short-lived invocations
+cheap.
+
+usage:
+    darknet-config-gen generate networks.json --out-dir cfg --workers 4
+    darknet-config-gen sweep --spec net.json --space space.json --out sweep.tar
+    darknet-config-gen search --max-bflops 20 --num-classes 3 --out-dir front
+    darknet-config-gen dataset data/images --names classes.txt --out-dir data --cfg net.cfg
+    darknet-config-gen serve --port 8080 --executor process
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import sys
+
+
+def _generate(args):
+    from darknet_config_generator.yolo_manifest import generate_manifest, load_manifest, manifest_jobs
+
+    jobs = manifest_jobs(load_manifest(args.manifest), output_dir=args.out_dir)
+
+    def on_result(result):
+        if result.error:
+            print(f'{result.name}: {result.error}', file=sys.stderr)
+        elif args.verbose:
+            print(f'{result.name} -> {result.path}')
+
+    stats = generate_manifest(jobs, workers=args.workers, chunk_size=args.chunk_size, on_result=on_result)
+    print(f'{stats.generated} generated, {stats.failed} failed in {stats.seconds:.2f}s')
+    return 1 if stats.failed else 0
+
+def _sweep(args):
+    from darknet_config_generator import yolo_sweep
+
+    yolo_sweep.main(args.arguments)
+    return 0
+
+def _search(args):
+    from darknet_config_generator import yolo_search
+
+    yolo_search.main(args.arguments)
+    return 0
+
+def _dataset(args):
+    from darknet_config_generator import yolo_dataset
+
+    yolo_dataset.main(args.arguments)
+    return 0
+
+def _serve(args):
+    from darknet_config_generator import yolo_service
+
+    yolo_service.main(args.arguments)
+    return 0
+
+# commands whose options are parsed by the module they run
+PASSTHROUGH_COMMANDS = ('sweep', 'search', 'dataset', 'serve')
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog='darknet-config-gen', description='Darknet configuration generator')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    generate = commands.add_parser('generate', help='generate every network of a JSON or YAML manifest')
+    generate.add_argument('manifest', help='manifest file (.json, .yaml or .yml)')
+    generate.add_argument('--out-dir', default=None, help='output directory, overrides output_dir of the manifest')
+    generate.add_argument('--workers', type=int, default=1, help='worker processes, 0 uses every CPU (default 1)')
+    generate.add_argument('--chunk-size', type=int, default=16, help='networks generated per worker task')
+    generate.add_argument('-v', '--verbose', action='store_true', help='print every generated file')
+    generate.set_defaults(func=_generate)
+
+    # the sweep options are parsed by yolo_sweep, so it is only imported when sweeping
+    sweep = commands.add_parser('sweep', add_help=False, help='render a hyperparameter sweep into an archive')
+    sweep.set_defaults(func=_sweep)
+
+    search = commands.add_parser('search', add_help=False, help='search scaled yolov3 variants within a budget')
+    search.set_defaults(func=_search)
+
+    dataset = commands.add_parser('dataset', add_help=False, help='write .data/.names/train.txt/valid.txt for an image tree')
+    dataset.set_defaults(func=_dataset)
+
+    serve = commands.add_parser('serve', add_help=False, help='serve config generation over HTTP')
+    serve.set_defaults(func=_serve)
+    return parser
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args, arguments = parser.parse_known_args(argv)
+    if arguments and args.command not in PASSTHROUGH_COMMANDS:
+        parser.error(f'unrecognized arguments: {" ".join(arguments)}')
+    args.arguments = arguments
+    if getattr(args, 'workers', None) == 0:
+        args.workers = None
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
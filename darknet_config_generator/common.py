@@ -1,6 +1,6 @@
+from contextlib import contextmanager
 from enum import Enum, auto
 import os
-from absl import logging
 
 # Defaults
 YOLO_ANCHORS = [10,13,  16,30,  33,23,  
@@ -9,6 +9,7 @@ YOLO_ANCHORS = [10,13,  16,30,  33,23,
 
 # Constants 
 NL = os.linesep
+BBOX_COORDS_WCLASS_COUNT = 5
 
 # Enumerations
 class Activations(Enum):
@@ -20,6 +21,32 @@ class LearningRateDecayPolicy:
     SCHEDULED ='steps'
     POLY = 'poly'
 
+# Base Classes
+class Descriptor:
+    """
+    Base of every config descriptor
+
+    render() returns the complete config text of the descriptor; the other methods are derived from it.
+    """
+    __slots__ = ()
+
+    def render(self):
+        """ renders the descriptor as config text"""
+        return ''
+
+    def export(self, file_obj):
+        """ writes the descriptor to the file object"""
+        file_obj.write(self.render())
+
+    def iter_sections(self):
+        """ lazily yields the config sections of the descriptor"""
+        yield self.render()
+
+    def iter_lines(self):
+        """ lazily yields the config lines of the descriptor, with their line endings"""
+        for section in self.iter_sections():
+            yield from section.splitlines(keepends=True)
+
 # Functions
 def list_to_str(lst, space=False):
     """ convers list as a comma seperated string"""
@@ -43,4 +70,49 @@ def anchors_to_str(anchors, space=False):
     else:
         base_str = ','
     
-    return ', '.join([f'{pt[0]},{pt[1]}'  for pt in anchor_tuple]).rstrip()
\ No newline at end of file
+    return ', '.join([f'{pt[0]},{pt[1]}'  for pt in anchor_tuple]).rstrip()
+
+def _tmp_path(path):
+    """ returns a unique temporary path next to path"""
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{filename}.{os.urandom(16).hex()}.tmp')
+
+def write_atomic(path, data:bytes):
+    """
+    writes data to path in a single write and atomically replaces the target
+
+    The data is written to a temporary file in the same directory which is then renamed over
+    the target, so readers never observe a partially written file.
+    """
+    tmp_path = _tmp_path(path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+@contextmanager
+def open_atomic(path, mode:str='wb'):
+    """
+    opens a temporary file for streamed writing that atomically replaces path on success
+
+    The target is left untouched if the block raises.
+    """
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, mode) as file_obj:
+            yield file_obj
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
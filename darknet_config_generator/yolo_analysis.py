@@ -0,0 +1,211 @@
+"""
+Network Analysis
+
+Static shape inference and cost estimation of layer lists, following darknet's own layer
+arithmetic so that shapes and BFLOPs match darknet's printout without invoking darknet.
+
+Every quantity is computed with NumPy arrays over a batch of candidate input resolutions,
+so a single linear pass over the layers evaluates all resolutions at once.
+
+@author: Abdullahi S. Adamu
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from darknet_config_generator.common import BBOX_COORDS_WCLASS_COUNT
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_layers import *
+
+"""
+Per-layer cost
+
+- in_w, in_h, in_c - shape of the input consumed by the layer
+- out_w, out_h, out_c - shape of the layer output
+- params - number of values darknet stores in the .weights file for the layer
+  (kernels, biases and, with batch normalization, scales, rolling means and variances)
+- bflops - billions of floating point operations, as printed by darknet
+"""
+LayerCost = namedtuple('LayerCost', ['index', 'header', 'in_w', 'in_h', 'in_c',
+                                     'out_w', 'out_h', 'out_c', 'params', 'bflops'])
+
+# input dimensions assumed for plain layer lists, the YOLONetwork default
+DEFAULT_INPUT_DIM = (608, 608, 3)
+
+
+def _any(condition):
+    """ np.any that avoids NumPy overhead for plain Python scalars"""
+    if isinstance(condition, np.ndarray):
+        return bool(condition.any())
+    return bool(condition)
+
+
+def network_input_dim(network, input_dim=None):
+    """ returns input_dim if given, else the input_dim of the network, else DEFAULT_INPUT_DIM for layer lists"""
+    if input_dim is not None:
+        return input_dim
+    return getattr(network, 'input_dim', None) or DEFAULT_INPUT_DIM
+
+
+def resolve_layer_index(index:int, reference:int):
+    """ converts a darknet layer reference (relative if negative) to an absolute index"""
+    return index + reference if reference < 0 else reference
+
+
+def layer_cost(layer, index:int, outputs:list, input_shape):
+    """
+    computes the output shape and cost of a single layer
+
+    params:
+    - layer - layer descriptor
+    - index (int) - index of the layer in the network
+    - outputs (list) - (w, h, c) output shapes of every preceding layer
+    - input_shape (tuple) - (w, h, c) input shape of the network
+
+    Shape components may be ints or NumPy arrays (one entry per candidate resolution).
+
+    returns:
+    - (LayerCost, list of issue strings)
+    """
+    in_w, in_h, in_c = outputs[index - 1] if index > 0 else input_shape
+    out_w, out_h, out_c = in_w, in_h, in_c
+    params, bflops = 0, 0.0
+    issues = []
+
+    if isinstance(layer, ConvolutionLayer):
+        padding = layer.size // 2 if layer.pad else 0
+        out_w = (in_w + 2 * padding - layer.size) // layer.stride + 1
+        out_h = (in_h + 2 * padding - layer.size) // layer.stride + 1
+        out_c = layer.filters
+        num_weights = in_c * layer.filters * layer.size * layer.size
+        params = num_weights + layer.filters * (4 if layer.batch_normalize else 1)
+        bflops = 2.0 * num_weights * out_w * out_h / 1e9
+
+    elif isinstance(layer, MaxPoolingLayer):
+        out_w = (in_w + layer.padding - layer.size) // layer.stride + 1
+        out_h = (in_h + layer.padding - layer.size) // layer.stride + 1
+        bflops = float(layer.size * layer.size) * in_c * out_w * out_h / 1e9
+
+    elif isinstance(layer, UpsampleLayer):
+        if layer.stride < 0:
+            out_w, out_h = in_w // -layer.stride, in_h // -layer.stride
+        else:
+            out_w, out_h = in_w * layer.stride, in_h * layer.stride
+
+    elif isinstance(layer, FullyConnectedLayer):
+        num_inputs = in_w * in_h * in_c
+        out_w, out_h, out_c = 1, 1, layer.size
+        params = num_inputs * layer.size + layer.size
+        bflops = 2.0 * num_inputs * layer.size / 1e9
+
+    elif isinstance(layer, RouteConnection):
+        sources = [resolve_layer_index(index, reference) for reference in layer.layers]
+        for source in sources:
+            if not 0 <= source < index:
+                raise ValueError(f'layer {index} [route] references layer {source} which is not a preceding layer')
+        out_w, out_h, _ = outputs[sources[0]]
+        out_c = sum(outputs[source][2] for source in sources)
+        for source in sources[1:]:
+            if _any(outputs[source][0] != out_w) or _any(outputs[source][1] != out_h):
+                issues.append(f'layer {index} [route] concatenates layers {sources[0]} and {source} '
+                              f'with different spatial sizes')
+        in_w, in_h, in_c = out_w, out_h, out_c
+
+    elif isinstance(layer, SkipConnection):
+        source = resolve_layer_index(index, layer.from_layer)
+        if not 0 <= source < index:
+            raise ValueError(f'layer {index} [shortcut] references layer {source} which is not a preceding layer')
+        src_w, src_h, src_c = outputs[source]
+        if _any(src_w != in_w) or _any(src_h != in_h) or _any(src_c != in_c):
+            issues.append(f'layer {index} [shortcut] adds layer {source} to layer {index - 1} '
+                          f'with a different shape')
+        bflops = 1.0 * out_w * out_h * out_c / 1e9
+
+    elif isinstance(layer, YOLOLayer):
+        expected_c = len(layer.masks) * (layer.classes + BBOX_COORDS_WCLASS_COUNT)
+        if _any(in_c != expected_c):
+            issues.append(f'layer {index} [yolo] expects {expected_c} input channels '
+                          f'for {len(layer.masks)} masks and {layer.classes} classes')
+
+    if _any(out_w <= 0) or _any(out_h <= 0):
+        issues.append(f'layer {index} {layer.__HEADER__} produces an empty output')
+
+    cost = LayerCost(index, layer.__HEADER__, in_w, in_h, in_c, out_w, out_h, out_c, params, bflops)
+    return cost, issues
+
+
+class NetworkCost:
+    """
+    Network Cost
+
+    Per-layer shapes and costs of a network for one or more input resolutions.
+    Array attributes have one entry per input resolution.
+    """
+    def __init__(self, input_dims, layers:list, issues:list):
+        self.input_dims = input_dims
+        self.layers = layers
+        self.issues = issues
+
+    @property
+    def total_bflops(self):
+        """ total BFLOPs per input resolution"""
+        return sum((np.broadcast_to(layer.bflops, len(self.input_dims)) for layer in self.layers),
+                   np.zeros(len(self.input_dims)))
+
+    @property
+    def total_params(self):
+        """ total parameter count per input resolution"""
+        return sum((np.broadcast_to(layer.params, len(self.input_dims)) for layer in self.layers),
+                   np.zeros(len(self.input_dims), dtype=np.int64))
+
+    def within_budget(self, max_bflops:float=None, max_params:int=None):
+        """ returns a boolean mask of the input resolutions within the given budget"""
+        mask = np.ones(len(self.input_dims), dtype=bool)
+        if max_bflops is not None:
+            mask &= self.total_bflops <= max_bflops
+        if max_params is not None:
+            mask &= self.total_params <= max_params
+        return mask
+
+    def report(self, resolution:int=0):
+        """ returns a darknet-style summary table for one of the input resolutions"""
+        def at(value):
+            return np.broadcast_to(value, len(self.input_dims))[resolution]
+
+        lines = [f'{"layer":>5} {"type":<16} {"input":>20} {"output":>20} {"params":>12} {"BFLOPs":>9}']
+        for layer in self.layers:
+            shape_in = f'{at(layer.in_w)} x {at(layer.in_h)} x {at(layer.in_c)}'
+            shape_out = f'{at(layer.out_w)} x {at(layer.out_h)} x {at(layer.out_c)}'
+            lines.append(f'{layer.index:>5} {layer.header:<16} {shape_in:>20} {shape_out:>20} '
+                         f'{at(layer.params):>12} {at(layer.bflops):>9.3f}')
+        lines.append(f'Total BFLOPS {self.total_bflops[resolution]:.3f}, '
+                     f'Total params {self.total_params[resolution]}')
+        return '\n'.join(lines)
+
+
+def analyze(network, input_dims=None):
+    """
+    propagates input dimensions through the network
+
+    params:
+    - network - YOLONetwork or list of layers
+    - input_dims - (w, h, c) or a sequence of (w, h, c) candidate resolutions.
+                   Defaults to the input_dim of the YOLONetwork, or DEFAULT_INPUT_DIM for a list of layers.
+
+    returns:
+    - NetworkCost
+    """
+    layers = getattr(network, 'layers', network)
+    input_dims = np.atleast_2d(np.asarray(network_input_dim(network, input_dims), dtype=np.int64))
+    if input_dims.ndim != 2 or input_dims.shape[1] != 3:
+        raise ValueError('input_dims must be (w, h, c) or a sequence of (w, h, c)')
+
+    input_shape = (input_dims[:, 0], input_dims[:, 1], input_dims[:, 2])
+    outputs, costs, issues = [], [], []
+    for index, layer in enumerate(layers):
+        cost, layer_issues = layer_cost(layer, index, outputs, input_shape)
+        outputs.append((cost.out_w, cost.out_h, cost.out_c))
+        costs.append(cost)
+        issues.extend(layer_issues)
+
+    return NetworkCost(input_dims, costs, issues)
@@ -0,0 +1,351 @@
+"""
+Anchor Generation
+
+Computes YOLO anchors from darknet label files with IoU-distance k-means.
+
+Label files are streamed on a thread pool into a compact float32 array of box widths and heights;
+past max_boxes (MAX_BOXES by default) a reservoir sample keeps memory flat however many label files
+are read.
+
+usage:
+    wh = load_label_boxes(iter_label_files('data/labels'), input_dim=(608, 608))
+    anchors = anchors_to_list(kmeans_anchors(wh, k=9))
+    layers = get_yolov3(num_classes=3, anchors=anchors)
+    print(anchor_fitness(wh, anchors))
+    assign_masks(layers, anchors, input_dim=(608, 608, 3))
+
+@author: Abdullahi S. Adamu
+"""
+import collections
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from darknet_config_generator.common import BBOX_COORDS_WCLASS_COUNT
+from darknet_config_generator.yolo_analysis import analyze, network_input_dim
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+
+LABEL_COLUMNS = 5   # class x y w h
+
+# boxes kept for clustering by default, 8 MB of float32 widths and heights
+MAX_BOXES = 1000000
+
+
+""" Label Files """
+def iter_label_files(root:str, extension:str='.txt'):
+    """ recursively yields darknet label files under root"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(extension):
+                    yield entry.path
+
+def read_label_file(path:str):
+    """
+    reads a darknet label file
+
+    returns:
+    - float64 array of shape (N, 5) with class, x, y, w, h per row; empty if the file is malformed
+    """
+    with open(path, 'rb') as file_obj:
+        text = file_obj.read().decode('ascii', 'replace')
+    try:
+        values = np.array(text.split(), dtype=np.float64)
+    except ValueError:
+        return np.empty((0, LABEL_COLUMNS))
+    if values.size % LABEL_COLUMNS:
+        return np.empty((0, LABEL_COLUMNS))
+    return values.reshape(-1, LABEL_COLUMNS)
+
+def _read_box_sizes(paths:list):
+    """ reads the relative box widths and heights of a chunk of label files"""
+    sizes = [read_label_file(path)[:, 3:5] for path in paths]
+    if not sizes:
+        return np.empty((0, 2), dtype=np.float32)
+    return np.concatenate(sizes).astype(np.float32)
+
+
+class BoxBuffer:
+    """
+    Growable float32 (N, 2) array of box widths and heights
+
+    A uniform reservoir sample of at most max_boxes boxes is kept; max_boxes=None keeps every box.
+    """
+    def __init__(self, max_boxes:int=MAX_BOXES, seed:int=0, capacity:int=1024):
+        self.max_boxes = max_boxes
+        self.rng = np.random.default_rng(seed)
+        self.data = np.empty((min(capacity, max_boxes or capacity), 2), dtype=np.float32)
+        self.size = 0
+        self.seen = 0
+
+    def extend(self, boxes):
+        """ adds boxes to the buffer"""
+        boxes = np.asarray(boxes, dtype=np.float32)
+        if self.max_boxes is not None and self.size + len(boxes) > self.max_boxes:
+            # fill the reservoir, then replace entries with decreasing probability
+            free = self.max_boxes - self.size
+            self._append(boxes[:free])
+            self.seen += free
+            boxes = boxes[free:]
+            slots = self.rng.integers(0, self.seen + np.arange(1, len(boxes) + 1))
+            accepted = slots < self.max_boxes
+            self.data[slots[accepted]] = boxes[accepted]
+            self.seen += len(boxes)
+            return
+        self._append(boxes)
+        self.seen += len(boxes)
+
+    def _append(self, boxes):
+        required = self.size + len(boxes)
+        if required > len(self.data):
+            capacity = max(required, 2 * len(self.data))
+            if self.max_boxes is not None:
+                capacity = min(capacity, self.max_boxes)
+            data = np.empty((capacity, 2), dtype=np.float32)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:required] = boxes
+        self.size = required
+
+    def array(self):
+        """ returns the collected boxes"""
+        return self.data[:self.size]
+
+
+def load_label_boxes(label_paths, input_dim=(608, 608), workers:int=8, chunk_size:int=256,
+                     max_boxes:int=MAX_BOXES, seed:int=0):
+    """
+    streams label files into an array of box widths and heights in pixels
+
+    params:
+    - label_paths - iterable of label file paths, consumed lazily
+    - input_dim (tuple) - network (width, height, ...) the relative box sizes are scaled to
+    - workers (int) - reader threads
+    - chunk_size (int) - label files per task
+    - max_boxes (int) - keep a uniform sample of at most this many boxes, None keeps every box
+    - seed (int) - random seed of the sample
+
+    returns:
+    - float32 array of shape (N, 2)
+    """
+    buffer = BoxBuffer(max_boxes=max_boxes, seed=seed)
+    paths = iter(label_paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = collections.deque()
+        while True:
+            chunk = list(itertools.islice(paths, chunk_size))
+            if chunk:
+                in_flight.append(executor.submit(_read_box_sizes, chunk))
+            if in_flight and (not chunk or len(in_flight) >= workers * 2):
+                buffer.extend(in_flight.popleft().result())
+            elif not chunk:
+                break
+    return buffer.array() * np.asarray(input_dim[:2], dtype=np.float32)
+
+
+""" K-Means """
+def iou_wh(boxes, anchors):
+    """ IoU of (N, 2) box sizes against (K, 2) anchor sizes, with boxes and anchors sharing a centre"""
+    intersection = (np.minimum(boxes[:, None, 0], anchors[None, :, 0])
+                    * np.minimum(boxes[:, None, 1], anchors[None, :, 1]))
+    union = (boxes[:, 0] * boxes[:, 1])[:, None] + (anchors[:, 0] * anchors[:, 1])[None, :] - intersection
+    return intersection / union
+
+def _assign(boxes, anchors, block_size:int=1 << 20):
+    """ returns the nearest anchor and its IoU for every box, computed in blocks to bound memory"""
+    labels = np.empty(len(boxes), dtype=np.int64)
+    best_iou = np.empty(len(boxes), dtype=np.float32)
+    for start in range(0, len(boxes), block_size):
+        iou = iou_wh(boxes[start:start + block_size], anchors)
+        labels[start:start + block_size] = iou.argmax(axis=1)
+        best_iou[start:start + block_size] = iou.max(axis=1)
+    return labels, best_iou
+
+def _kmeans_plus_plus(boxes, k:int, rng):
+    """ picks k initial anchors spread out in 1 - IoU distance"""
+    anchors = boxes[rng.integers(len(boxes))][None, :]
+    closest = 1.0 - iou_wh(boxes, anchors)[:, 0]
+    for _ in range(1, k):
+        weights = closest ** 2
+        total = weights.sum()
+        index = rng.choice(len(boxes), p=weights / total) if total > 0 else rng.integers(len(boxes))
+        anchors = np.vstack([anchors, boxes[index]])
+        closest = np.minimum(closest, 1.0 - iou_wh(boxes, anchors[-1:])[:, 0])
+    return anchors
+
+def sort_by_area(anchors):
+    """ sorts (K, 2) anchors by increasing area"""
+    anchors = np.asarray(anchors)
+    return anchors[np.argsort(anchors[:, 0] * anchors[:, 1], kind='stable')]
+
+def kmeans_anchors(boxes, k:int=9, iterations:int=300, batch_size:int=None, init_sample:int=100000,
+                   tol:float=1e-6, seed:int=0):
+    """
+    clusters box sizes into anchors with 1 - IoU as the distance
+
+    params:
+    - boxes - (N, 2) box widths and heights
+    - k (int) - number of anchors
+    - iterations (int) - maximum iterations
+    - batch_size (int) - run mini-batch k-means on batches of this many boxes; full k-means if None
+    - init_sample (int) - boxes sampled for the k-means++ initialisation
+    - tol (float) - stop once no anchor moves more than this
+    - seed (int) - random seed
+
+    returns:
+    - float64 array of shape (k, 2), sorted by area
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if len(boxes) < k:
+        raise ValueError(f'need at least {k} boxes to compute {k} anchors, got {len(boxes)}')
+    rng = np.random.default_rng(seed)
+    sample = boxes if len(boxes) <= init_sample else boxes[rng.choice(len(boxes), init_sample, replace=False)]
+    anchors = _kmeans_plus_plus(sample, k, rng)
+
+    counts = np.zeros(k)
+    for _ in range(iterations):
+        if batch_size:
+            batch = boxes[rng.integers(0, len(boxes), batch_size)]
+            labels, _ = _assign(batch, anchors)
+            batch_counts = np.bincount(labels, minlength=k)
+            sums = np.stack([np.bincount(labels, weights=batch[:, axis], minlength=k) for axis in range(2)], axis=1)
+            counts += batch_counts
+            # per-centre learning rate of 1 / (number of boxes assigned so far)
+            rate = np.divide(batch_counts, counts, out=np.zeros(k), where=counts > 0)[:, None]
+            means = np.divide(sums, batch_counts[:, None], out=anchors.copy(), where=batch_counts[:, None] > 0)
+            updated = anchors + rate * (means - anchors)
+        else:
+            labels, _ = _assign(boxes, anchors)
+            batch_counts = np.bincount(labels, minlength=k)
+            sums = np.stack([np.bincount(labels, weights=boxes[:, axis], minlength=k) for axis in range(2)], axis=1)
+            updated = np.divide(sums, batch_counts[:, None], out=anchors.copy(), where=batch_counts[:, None] > 0)
+
+        shift = np.abs(updated - anchors).max()
+        anchors = updated
+        if not batch_size and shift <= tol:
+            break
+
+    return sort_by_area(anchors)
+
+def anchors_to_list(anchors):
+    """ converts (K, 2) anchors to the flat integer list taken by YOLOLayer and get_yolov3"""
+    return [int(value) for value in np.rint(np.asarray(anchors)).reshape(-1)]
+
+def generate_anchors(label_paths, k:int=9, input_dim=(608, 608), max_boxes:int=MAX_BOXES, batch_size:int=None,
+                     workers:int=8, seed:int=0):
+    """
+    computes anchors for a dataset
+
+    params:
+    - label_paths - iterable of label file paths or a directory to search for label files
+    - k (int) - number of anchors
+    - input_dim (tuple) - network (width, height, ...)
+    - max_boxes (int) - cluster a uniform sample of at most this many boxes, None clusters every box
+    - batch_size (int) - mini-batch size for mini-batch k-means
+    - workers (int) - reader threads
+    - seed (int) - random seed
+
+    returns:
+    - flat list of anchors [w_1, h_1, ..., w_k, h_k] sorted by area
+    """
+    if isinstance(label_paths, str):
+        label_paths = iter_label_files(label_paths)
+    boxes = load_label_boxes(label_paths, input_dim=input_dim, workers=workers, max_boxes=max_boxes, seed=seed)
+    return anchors_to_list(kmeans_anchors(boxes, k=k, batch_size=batch_size, seed=seed))
+
+
+""" Fitness """
+AnchorFitness = collections.namedtuple('AnchorFitness', ['best_possible_recall', 'mean_best_iou',
+                                                         'anchors_above_threshold'])
+
+def _as_anchor_array(anchors):
+    """ converts a flat anchor list or (K, 2) array to a (K, 2) float32 array"""
+    return np.asarray(anchors, dtype=np.float32).reshape(-1, 2)
+
+def anchor_fitness(boxes, anchors, threshold:float=0.25, block_size:int=1 << 16):
+    """
+    evaluates how well anchors fit a set of boxes
+
+    params:
+    - boxes - (N, 2) box widths and heights, in the same units as the anchors
+    - anchors - flat anchor list [w_1, h_1, ...] or (K, 2) array
+    - threshold (float) - IoU above which an anchor is considered to match a box
+    - block_size (int) - boxes evaluated per vectorized block
+
+    returns:
+    - AnchorFitness with
+      best_possible_recall - fraction of boxes matched by at least one anchor
+      mean_best_iou - mean IoU between each box and its best anchor
+      anchors_above_threshold - mean number of anchors matching each box
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    anchors = _as_anchor_array(anchors)
+    matched, best_iou_sum, above_sum = 0, 0.0, 0
+    for start in range(0, len(boxes), block_size):
+        iou = iou_wh(boxes[start:start + block_size], anchors)
+        best_iou = iou.max(axis=1)
+        matched += int(np.count_nonzero(best_iou > threshold))
+        best_iou_sum += float(best_iou.sum(dtype=np.float64))
+        above_sum += int(np.count_nonzero(iou > threshold))
+    count = max(len(boxes), 1)
+    return AnchorFitness(matched / count, best_iou_sum / count, above_sum / count)
+
+
+""" Mask Assignment """
+def head_strides(network, input_dim=None):
+    """
+    returns the index and output stride of every YOLO layer
+
+    params:
+    - network - YOLONetwork or list of layers
+    - input_dim (tuple) - (w, h, c), defaults to the input_dim of the YOLONetwork or DEFAULT_INPUT_DIM
+    """
+    layers = getattr(network, 'layers', network)
+    cost = analyze(layers, network_input_dim(network, input_dim))
+    input_width = int(cost.input_dims[0, 0])
+    return [(index, input_width // int(np.asarray(layer_cost.out_w).reshape(-1)[0]))
+            for index, (layer, layer_cost) in enumerate(zip(layers, cost.layers))
+            if isinstance(layer, YOLOLayer)]
+
+def assign_masks(network, anchors, input_dim=None):
+    """
+    assigns anchors to YOLO layers by output stride and writes their masks
+
+    Anchors are sorted by area and split evenly across the YOLO layers; the layer with the largest
+    stride (coarsest grid) gets the largest anchors. When the number of anchors per layer changes,
+    the filters of the convolution feeding each YOLO layer are updated to match.
+
+    params:
+    - network - YOLONetwork or list of layers
+    - anchors - flat anchor list [w_1, h_1, ...] or (K, 2) array
+    - input_dim (tuple) - (w, h, c), defaults to the input_dim of the YOLONetwork or DEFAULT_INPUT_DIM
+
+    returns:
+    - list of (layer index, stride, masks) per YOLO layer
+    """
+    layers = getattr(network, 'layers', network)
+    anchors = sort_by_area(_as_anchor_array(anchors))
+    heads = sorted(head_strides(network, input_dim), key=lambda head: head[1])
+    if not heads:
+        raise ValueError('network has no YOLO layers')
+    if len(anchors) % len(heads):
+        raise ValueError(f'{len(anchors)} anchors cannot be split evenly across {len(heads)} YOLO layers')
+
+    per_head = len(anchors) // len(heads)
+    flat_anchors = anchors_to_list(anchors)
+    assignments = []
+    for position, (index, stride) in enumerate(heads):
+        layer = layers[index]
+        layer.masks = list(range(position * per_head, (position + 1) * per_head))
+        layer.anchors = list(flat_anchors)
+        layer.num_anchors = len(anchors)
+        previous = layers[index - 1] if index > 0 else None
+        if isinstance(previous, ConvolutionLayer):
+            previous.filters = per_head * (layer.classes + BBOX_COORDS_WCLASS_COUNT)
+        assignments.append((index, stride, layer.masks))
+    return assignments
@@ -0,0 +1,263 @@
+"""
+Config Cache
+
+Content-addressed on-disk cache for incremental config generation. Every section of a network
+(the [net] header, optimizer, image augmentation and each layer) is keyed by a digest of its
+descriptor's fields, so nothing has to be rendered to find out what changed.
+
+- rendered sections are stored once per digest under <cache_dir>/objects; when the store grows
+  beyond max_bytes, the least recently used ones are evicted down to EVICT_TO of max_bytes, so the
+  store is only scanned once per batch of evictions rather than on every new section
+- next to every generated cfg, <cfg>.sections.json records the digest and byte length of each
+  section, plus the size and mtime of the cfg it describes
+- generate_config() skips rendering and writing entirely when the network digest and the cfg on
+  disk both match the sidecar; when only some sections changed, it renders just those and splices
+  them between the unchanged bytes of the existing cfg, which is then replaced atomically
+
+usage:
+    cache = ConfigCache('.cfg-cache')
+    yolo_net.generate_config('yolov3.cfg', cache=cache)
+    print(cache.stats)
+
+@author: Abdullahi S. Adamu
+"""
+import collections
+import hashlib
+import io
+import json
+import operator
+import os
+import pickle
+
+from darknet_config_generator.common import NL, write_atomic
+
+# bump when rendering changes, so stale cached sections are never reused
+CACHE_VERSION = 1
+SIDECAR_SUFFIX = '.sections.json'
+DIGEST_SIZE = 16
+# fraction of max_bytes the section store is evicted down to once it is full
+EVICT_TO = 0.9
+
+_STATE_GETTERS = {}
+
+
+def _slot_names(descriptor_type:type):
+    names = []
+    for cls in reversed(descriptor_type.__mro__):
+        slots = vars(cls).get('__slots__', ())
+        names += [slots] if isinstance(slots, str) else [name for name in slots
+                                                          if name not in ('__weakref__', '__dict__', '_hash')]
+    return tuple(names)
+
+def _state_getter(descriptor_type:type):
+    """ returns a function reading the type tag and field values of a descriptor"""
+    names = _slot_names(descriptor_type)
+    # frozen layers are keyed like the descriptor they were frozen from
+    base = getattr(descriptor_type, '_descriptor', descriptor_type)
+    tag = (f'{base.__module__}.{base.__qualname__}', getattr(descriptor_type, '__HEADER__', None))
+    slots = operator.attrgetter(*names) if names else (lambda descriptor: ())
+    if descriptor_type.__dictoffset__:
+        return lambda descriptor: (tag, slots(descriptor), tuple(vars(descriptor).items()))
+    return lambda descriptor: (tag, slots(descriptor))
+
+def _state(descriptor):
+    getter = _STATE_GETTERS.get(type(descriptor))
+    if getter is None:
+        getter = _STATE_GETTERS[type(descriptor)] = _state_getter(type(descriptor))
+    return getter(descriptor)
+
+def _digests(states):
+    """ digests of states made of builtin values, independent of object identity"""
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=4)
+    pickler.fast = True   # no memo, so equal values always give equal bytes
+    digests = []
+    for state in states:
+        buffer.seek(0)
+        buffer.truncate()
+        pickler.dump((CACHE_VERSION, NL, state))
+        digests.append(hashlib.blake2b(buffer.getvalue(), digest_size=DIGEST_SIZE).hexdigest())
+    return digests
+
+def _digest(state):
+    return _digests([state])[0]
+
+def _header_state(network):
+    return ('header', type(network).__qualname__, network.__HEADER__, tuple(network.input_dim))
+
+def _network_parts(network):
+    """ returns the descriptors of the sections after the [net] header, in file order"""
+    return [part for part in [network.optimizer, network.img_aug] + list(network.layers or []) if part]
+
+def descriptor_digest(descriptor):
+    """ digest of a descriptor's type and field values, identifying its rendered section"""
+    return _digest(_state(descriptor))
+
+def network_digest(network):
+    """ canonical digest of a complete network descriptor"""
+    return _digest([_header_state(network)] + [_state(part) for part in _network_parts(network)])
+
+
+class CacheStats:
+    """ Cache Statistics"""
+    FIELDS = ('hits', 'patches', 'misses', 'section_hits', 'section_misses', 'evictions', 'bytes_written')
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return 'CacheStats(' + ', '.join(f'{name}={value}' for name, value in self.as_dict().items()) + ')'
+
+
+class ConfigCache:
+    """
+    Config Cache
+
+    params:
+    - cache_dir (str) - directory of the section store, created if missing
+    - max_bytes (int) - size bound of the section store
+    - memory_entries (int) - sections additionally kept in memory by this process
+    """
+    def __init__(self, cache_dir:str, max_bytes:int=256 << 20, memory_entries:int=4096):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.stats = CacheStats()
+        self._memory = collections.OrderedDict()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        for directory in os.scandir(self.objects_dir):
+            if directory.is_dir():
+                yield from (entry for entry in os.scandir(directory.path) if entry.is_file())
+
+    def _object_path(self, digest:str):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _remember(self, digest:str, data:bytes):
+        self._memory[digest] = data
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def section(self, digest:str, descriptor):
+        """ returns the rendered bytes of a section, rendering and storing it on a miss"""
+        data = self._memory.get(digest)
+        if data is not None:
+            self._memory.move_to_end(digest)
+            self.stats.section_hits += 1
+            return data
+        path = self._object_path(digest)
+        try:
+            with open(path, 'rb') as file_obj:
+                data = file_obj.read()
+            os.utime(path)   # marks the section as recently used for eviction
+            self.stats.section_hits += 1
+        except FileNotFoundError:
+            data = descriptor.render().encode('utf-8')
+            self._store(path, data)
+            self.stats.section_misses += 1
+        self._remember(digest, data)
+        return data
+
+    def _store(self, path:str, data:bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # another process may have stored the same section meanwhile
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        write_atomic(path, data)
+        self._size += len(data) - replaced
+        if self._size > self.max_bytes:
+            self.evict(int(self.max_bytes * EVICT_TO))
+
+    def evict(self, max_bytes:int):
+        """ removes least recently used sections until the store holds at most max_bytes"""
+        entries = sorted((stat.st_mtime_ns, stat.st_size, entry.path)
+                         for entry, stat in ((entry, entry.stat()) for entry in self._entries()))
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._memory.pop(os.path.basename(path), None)
+            self._size -= size
+            self.stats.evictions += 1
+
+    def clear(self):
+        """ removes every stored section"""
+        self.evict(0)
+
+    def _read_sidecar(self, save_to:str):
+        """ returns the sidecar of a cfg if it still describes the cfg on disk, else None"""
+        try:
+            with open(save_to + SIDECAR_SUFFIX) as file_obj:
+                sidecar = json.load(file_obj)
+            stat = os.stat(save_to)
+        except (OSError, ValueError):
+            return None
+        if sidecar.get('version') != CACHE_VERSION or sidecar.get('size') != stat.st_size \
+                or sidecar.get('mtime_ns') != stat.st_mtime_ns:
+            return None
+        return sidecar
+
+    def generate_config(self, network, save_to:str='net.cfg'):
+        """
+        writes the config of a network to save_to, reusing as much as possible
+
+        returns:
+        - 'hit' if the cfg was already up to date, 'patched' if only changed sections were
+          rendered into the existing cfg, or 'written' if it was generated from the section store
+        """
+        parts = _network_parts(network)
+        states = [_header_state(network)] + [_state(part) for part in parts]
+        digest = _digest(states)
+        sidecar = self._read_sidecar(save_to)
+        if sidecar is not None and sidecar['digest'] == digest:
+            self.stats.hits += 1
+            return 'hit'
+
+        # the [net] header is cheap to render and is not stored
+        sections = list(zip(_digests(states), [None] + parts))
+        previous = {}
+        if sidecar is not None:
+            # byte ranges of the sections of the existing cfg, by digest
+            with open(save_to, 'rb') as file_obj:
+                existing = file_obj.read()
+            offset = 0
+            for section_digest, length in sidecar['sections']:
+                previous.setdefault(section_digest, existing[offset:offset + length])
+                offset += length
+
+        chunks = []
+        for section_digest, descriptor in sections:
+            data = previous.get(section_digest)
+            if data is None:
+                data = (network.render_header().encode('utf-8') if descriptor is None
+                        else self.section(section_digest, descriptor))
+            chunks.append(data)
+
+        data = b''.join(chunks)
+        write_atomic(save_to, data)
+        stat = os.stat(save_to)
+        write_atomic(save_to + SIDECAR_SUFFIX, json.dumps({
+            'version': CACHE_VERSION, 'digest': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sections': [[section_digest, len(chunk)] for (section_digest, _), chunk in zip(sections, chunks)],
+        }).encode('utf-8'))
+        self.stats.bytes_written += len(data)
+
+        if sidecar is not None:
+            self.stats.patches += 1
+            return 'patched'
+        self.stats.misses += 1
+        return 'written'
@@ -6,35 +6,42 @@ Connection Descriptors
 from darknet_config_generator.common import *
 
 """ Connections """
-class Connection:
+class Connection(Descriptor):
+    __slots__ = ()
+
     def __init__(self):
         pass
     
 class RouteConnection(Connection):
     """Routing Connection"""
-    def __init__(self, layers=[-4]):
-        self.__HEADER__= '[route]'
-        self.layers = layers
-    def export(self, file_obj):
-        """ exports the route connection to the file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
+    __HEADER__ = '[route]'
+    __slots__ = ('layers',)
+
+    def __init__(self, layers=None):
+        self.layers = [-4] if layers is None else list(layers)
+    def render(self):
+        """ renders the route connection as a config section"""
         if len(self.layers) > 1:
-            file_obj.write(f'layers={list_to_str(self.layers, space=True)}{NL}')
+            layers = list_to_str(self.layers, space=True)
         else:
-            file_obj.write(f'layers={self.layers[0]}{NL}')
-        file_obj.write(NL)
+            layers = self.layers[0]
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'layers={layers}{NL}'
+                f'{NL}')
         
 class SkipConnection(Connection):
     """ Skip connection"""
+    __HEADER__ = '[shortcut]'
+    __slots__ = ('from_layer', 'activation')
+
     def __init__(self, from_layer=-3,activation=Activations.LINEAR):
-        self.__HEADER__ = '[shortcut]'
         self.from_layer = from_layer
         self.activation = activation
-    def export(self, file_obj):
-        """ exports the skip connection to the file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'from={self.from_layer}{NL}')
-        file_obj.write(f'activation={self.activation}{NL}')
-        file_obj.write(NL) 
\ No newline at end of file
+    def render(self):
+        """ renders the skip connection as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'from={self.from_layer}{NL}'
+                f'activation={self.activation}{NL}'
+                f'{NL}')
@@ -4,57 +4,84 @@ YOLO Network Descriptor
 
 @author: Abdullahi S. Adamu
 """
-from absl import logging
 from darknet_config_generator.yolo_optimizers import *
 from darknet_config_generator.yolo_preprocess import *
 from darknet_config_generator.yolo_layers import Layer
 from darknet_config_generator.yolo_network import get_yolov3
-from darknet_config_generator.common import NL
+from darknet_config_generator.common import NL, Descriptor, write_atomic
 
-class YOLONetwork:
+# stands for a fresh default section, as None leaves the section out
+DEFAULT = object()
+
+class YOLONetwork(Descriptor):
     """
     YOLO Object Detection Network
     
     This is a network descriptor that is able to generate a darknet network configuration file.
+    image_augmentation and optimizer default to new YOLOImageAugmentation and YOLOOptimizer
+    instances; pass None to leave the section out.
     """
-    def __init__(self, input_dim=(608,608,3), image_augmentation=YOLOImageAugmentation(), optimizer=YOLOOptimizer(), layers:Layer=[]):
-        self.__HEADER__= '[net]'
+    __HEADER__ = '[net]'
+
+    def __init__(self, input_dim=(608,608,3), image_augmentation=DEFAULT, optimizer=DEFAULT, layers:Layer=None):
         self.input_dim = input_dim
-        self.img_aug = image_augmentation
-        self.optimizer = optimizer
-        self.layers = layers 
+        self.img_aug = YOLOImageAugmentation() if image_augmentation is DEFAULT else image_augmentation
+        self.optimizer = YOLOOptimizer() if optimizer is DEFAULT else optimizer
+        self.layers = [] if layers is None else layers
         
+    def render_header(self):
+        """renders the network dimensions section"""
+        return (f'{self.__HEADER__}{NL}'
+                f'# Network Dimensions{NL}'
+                f'width={self.input_dim[0]}{NL}'
+                f'height={self.input_dim[1]}{NL}'
+                f'channels={self.input_dim[2]}{NL}'
+                f'{NL}')
+
     def export(self, file_obj):
         """exports the given layer"""
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'# Network Dimensions{NL}')
-        file_obj.write(f'width={self.input_dim[0]}{NL}')
-        file_obj.write(f'height={self.input_dim[1]}{NL}')
-        file_obj.write(f'channels={self.input_dim[2]}{NL}')
-        file_obj.write(NL)
-        
-    def generate_config(self, save_to='net.cfg'):
-        """ generates network configuration"""
-        file_obj = open(save_to,'w')
-        
-        # export network
-        self.export(file_obj)
-        
+        file_obj.write(self.render_header())
+
+    def iter_sections(self):
+        """lazily yields the sections of the network configuration, one layer at a time"""
+        yield self.render_header()
+
         # optimizer
         if self.optimizer:
-            self.optimizer.export(file_obj)
-        
+            yield from self.optimizer.iter_sections()
+
         # image augmentation
         if self.img_aug:
-            self.img_aug.export(file_obj)
-        
-        # export layers
+            yield from self.img_aug.iter_sections()
+
+        # layers
         if self.layers:
             for layer_i in self.layers:
-                layer_i.export(file_obj)
+                yield from layer_i.iter_sections()
+
+    def render(self):
+        """renders the complete network configuration as a single string"""
+        return ''.join(self.iter_sections())
+
+    def render_bytes(self):
+        """renders the complete network configuration as bytes"""
+        return self.render().encode('utf-8')
+        
+    def generate_config(self, save_to='net.cfg', cache=None):
+        """
+        generates network configuration
+
+        params:
+        - save_to (str) - path of the configuration file
+        - cache (ConfigCache) - optional cache that skips or patches unchanged configurations
+        """
+        if cache is not None:
+            return cache.generate_config(self, save_to)
+        write_atomic(save_to, self.render_bytes())
     
 
 def test():
+    from absl import logging
     logging.set_verbosity('debug')
     img_aug = YOLOImageAugmentation()
     yolo_optimizer = YOLOOptimizer(batch_size=1, subdivisions=1, learning_rate=0.05, lr_decay_schedule={5000: 0.001, 2000:0.001})
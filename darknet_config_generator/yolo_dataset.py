@@ -0,0 +1,349 @@
+"""
+Dataset Manifests
+
+Builds the darknet files a generated cfg is trained with: <name>.names, train.txt, valid.txt and
+<name>.data, from a tree of images with darknet label files.
+
+- the image tree is walked on a thread pool, one directory per task, stat-ing each image's label
+  file (images/x.jpg -> labels/x.txt, as darknet does, or x.txt next to the image)
+- label files are validated in bulk on the same pool: rows of class x y w h with integral class
+  ids within num_classes and coordinates in [0, 1]
+- validation results are cached by label path, mtime and size in <output_dir>/.<name>.cache.json,
+  so re-runs only read new or changed label files
+- images are split into train and valid by a hash of their path relative to the image root, so
+  splits are deterministic and stay stable as images are added
+- the class count is cross-checked against the [yolo] layers of the network being generated
+
+usage:
+    stats = build_dataset('data/images', 'data', class_names=['car', 'bus'], network=yolo_net)
+    print(stats)
+
+usage: python -m darknet_config_generator.yolo_dataset data/images --names classes.txt --out-dir data --cfg net.cfg
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from darknet_config_generator.common import BBOX_COORDS_WCLASS_COUNT, NL, write_atomic
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+from darknet_config_generator.yolo_sinks import FileSink
+
+# bump when label_stats changes, so results of the previous rules are not reused
+CACHE_VERSION = 2
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+LABEL_COLUMNS = 5   # class x y w h
+# darknet reads class ids as C ints
+MAX_CLASS_ID = 2**31 - 1
+# label file statistics: box count, smallest and largest valid class id, class ids that are not
+# finite integers darknet can read, boxes with non-finite coordinates, coordinates outside [0, 1] or
+# empty sizes, and whether the file is malformed
+LABEL_FIELDS = ('boxes', 'min_class', 'max_class', 'bad_ids', 'bad_coords', 'malformed')
+
+ImageRecord = collections.namedtuple('ImageRecord', ['image', 'label', 'label_mtime_ns', 'label_size'])
+LabelStats = collections.namedtuple('LabelStats', LABEL_FIELDS)
+DatasetStats = collections.namedtuple('DatasetStats', ['images', 'train', 'valid', 'boxes', 'missing_labels',
+                                                       'validated', 'cached', 'issues', 'seconds'])
+
+
+""" Scanning """
+def label_path(image_path:str):
+    """ returns the darknet label file of an image"""
+    directory, name = os.path.split(image_path)
+    parts = directory.split(os.sep)
+    for folder in ('images', 'JPEGImages'):
+        if folder in parts:
+            index = len(parts) - 1 - parts[::-1].index(folder)
+            parts[index] = 'labels'
+            directory = os.sep.join(parts)
+            break
+    return os.path.join(directory, os.path.splitext(name)[0] + '.txt')
+
+def _scan_directory(path:str, extensions:tuple):
+    """ lists one directory, returning its image records and subdirectories"""
+    records, directories = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(entry.path)
+            elif entry.name.lower().endswith(extensions):
+                label = label_path(entry.path)
+                try:
+                    stat = os.stat(label)
+                    records.append(ImageRecord(entry.path, label, stat.st_mtime_ns, stat.st_size))
+                except FileNotFoundError:
+                    records.append(ImageRecord(entry.path, label, None, None))
+    return records, directories
+
+def scan_images(root:str, workers:int=16, extensions:tuple=IMAGE_EXTENSIONS):
+    """
+    walks an image tree on a thread pool
+
+    yields:
+    - ImageRecord for every image, in no particular order; label_mtime_ns is None without a label
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory, root, extensions)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records, directories = future.result()
+                pending.update(executor.submit(_scan_directory, directory, extensions) for directory in directories)
+                yield from records
+
+
+""" Label Validation """
+def label_stats(path:str):
+    """ reads a darknet label file and returns its LabelStats"""
+    with open(path, 'rb') as file_obj:
+        tokens = file_obj.read().split()
+    try:
+        values = np.array(tokens).astype(np.float64) if tokens else np.empty(0)
+    except ValueError:
+        return LabelStats(0, None, None, 0, 0, True)
+    if values.size % LABEL_COLUMNS:
+        return LabelStats(0, None, None, 0, 0, True)
+    if not values.size:
+        return LabelStats(0, None, None, 0, 0, False)
+
+    rows = values.reshape(-1, LABEL_COLUMNS)
+    classes, coords = rows[:, 0], rows[:, 1:]
+    # comparisons with nan are False, so non-finite values are checked first
+    with np.errstate(invalid='ignore'):
+        good_ids = np.isfinite(classes) & (classes % 1 == 0) & (np.abs(classes) <= MAX_CLASS_ID)
+        bad_coords = (~np.isfinite(coords).all(axis=1) | np.any((coords < 0) | (coords > 1), axis=1)
+                      | np.any(coords[:, 2:] <= 0, axis=1))
+    ids = classes[good_ids]
+    return LabelStats(len(rows), int(ids.min()) if ids.size else None, int(ids.max()) if ids.size else None,
+                      int(np.count_nonzero(~good_ids)), int(np.count_nonzero(bad_coords)), False)
+
+def _label_stats_chunk(paths:list):
+    return [label_stats(path) for path in paths]
+
+def label_issues(path:str, stats:LabelStats, num_classes:int):
+    """ describes what is wrong with a label file, empty when it is valid"""
+    if stats.malformed:
+        return [f'{path}: not rows of {LABEL_COLUMNS} numbers (class x y w h)']
+    issues = []
+    if stats.bad_ids:
+        issues.append(f'{path}: {stats.bad_ids} class ids are not finite integers')
+    if stats.min_class is not None and (stats.min_class < 0 or stats.max_class >= num_classes):
+        issues.append(f'{path}: class ids {stats.min_class}..{stats.max_class} are outside 0..{num_classes - 1}')
+    if stats.bad_coords:
+        issues.append(f'{path}: {stats.bad_coords} boxes have non-finite coordinates, coordinates outside [0, 1] '
+                      f'or an empty size')
+    return issues
+
+
+class LabelCache:
+    """
+    Label validation cache
+
+    Maps label paths to their mtime, size and LabelStats, stored as JSON.
+    """
+    def __init__(self, path:str=None):
+        self.path = path
+        self.entries = {}
+        if path is not None:
+            try:
+                with open(path) as file_obj:
+                    data = json.load(file_obj)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data['labels']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def get(self, record:ImageRecord):
+        """ returns the cached LabelStats of a record if its label file is unchanged, else None"""
+        entry = self.entries.get(record.label)
+        if entry is None or entry[0] != record.label_mtime_ns or entry[1] != record.label_size:
+            return None
+        return LabelStats(*entry[2:])
+
+    def put(self, record:ImageRecord, stats:LabelStats):
+        self.entries[record.label] = [record.label_mtime_ns, record.label_size, *stats]
+
+    def save(self, labels:set=None):
+        """ writes the cache, keeping only the given label paths when set"""
+        if self.path is None:
+            return
+        if labels is not None:
+            self.entries = {label: entry for label, entry in self.entries.items() if label in labels}
+        write_atomic(self.path, json.dumps({'version': CACHE_VERSION, 'labels': self.entries}).encode('utf-8'))
+
+
+def validate_labels(records:list, num_classes:int, cache:LabelCache=None, workers:int=16, chunk_size:int=256):
+    """
+    validates the label files of image records, reading only the ones not in the cache
+
+    returns:
+    - (list of LabelStats or None for images without labels, number of label files read, list of issues)
+    """
+    cache = cache or LabelCache()
+    results = [None] * len(records)
+    stale = []
+    for index, record in enumerate(records):
+        if record.label_mtime_ns is None:
+            continue
+        results[index] = cache.get(record)
+        if results[index] is None:
+            stale.append(index)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunks = [stale[offset:offset + chunk_size] for offset in range(0, len(stale), chunk_size)]
+        futures = [executor.submit(_label_stats_chunk, [records[index].label for index in chunk]) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            for index, stats in zip(chunk, future.result()):
+                results[index] = stats
+                cache.put(records[index], stats)
+
+    issues = list(itertools.chain.from_iterable(label_issues(record.label, stats, num_classes)
+                                                for record, stats in zip(records, results) if stats is not None))
+    return results, len(stale), issues
+
+
+""" Network Cross-Check """
+def check_network_classes(network, num_classes:int):
+    """
+    checks that every [yolo] layer of a network, and the convolution feeding it, expects num_classes
+
+    raises:
+    - ValueError listing every mismatch
+    """
+    layers = getattr(network, 'layers', network) or []
+    errors = []
+    heads = [(index, layer) for index, layer in enumerate(layers) if isinstance(layer, YOLOLayer)]
+    if not heads:
+        errors.append('the network has no [yolo] layers')
+    for index, layer in heads:
+        if layer.classes != num_classes:
+            errors.append(f'layer {index} [yolo] has classes={layer.classes} but the dataset has {num_classes} classes')
+        previous = layers[index - 1] if index > 0 else None
+        expected = len(layer.masks) * (num_classes + BBOX_COORDS_WCLASS_COUNT)
+        if isinstance(previous, ConvolutionLayer) and previous.filters != expected:
+            errors.append(f'layer {index - 1} [convolutional] has filters={previous.filters}, '
+                          f'{expected} are needed for {num_classes} classes')
+    if errors:
+        raise ValueError('\n'.join(errors))
+
+
+""" Output """
+def split_of(relative_path:str, valid_fraction:float):
+    """ returns 'valid' or 'train' for an image, from a hash of its path"""
+    digest = hashlib.blake2b(relative_path.replace(os.sep, '/').encode('utf-8'), digest_size=8).digest()
+    return 'valid' if int.from_bytes(digest, 'big') < valid_fraction * 2**64 else 'train'
+
+def _write_list(path:str, lines):
+    with FileSink(path) as sink:
+        for line in lines:
+            sink.write(line + NL)
+
+def read_names(path:str):
+    """ reads class names, one per line"""
+    with open(path) as file_obj:
+        return [line.strip() for line in file_obj if line.strip()]
+
+def build_dataset(image_root:str, output_dir:str, class_names:list, name:str='obj', valid_fraction:float=0.1,
+                  network=None, workers:int=16, use_cache:bool=True, require_labels:bool=False, strict:bool=True,
+                  backup:str='backup/', extensions:tuple=IMAGE_EXTENSIONS):
+    """
+    writes <name>.names, train.txt, valid.txt and <name>.data for an image tree
+
+    params:
+    - image_root (str) - root of the image tree
+    - output_dir (str) - directory of the written files and the cache
+    - class_names (list(str)) - class names; their count is the number of classes
+    - valid_fraction (float) - fraction of images in valid.txt
+    - network - YOLONetwork or layers whose [yolo] layers must match the class count
+    - use_cache (bool) - reuse validation results of unchanged label files
+    - require_labels (bool) - treat images without a label file as invalid instead of background
+    - strict (bool) - raise instead of writing the files when labels are invalid
+
+    returns:
+    - DatasetStats
+
+    raises:
+    - ValueError if the network does not match the class count, or with strict, if labels are invalid
+    """
+    start = time.perf_counter()
+    num_classes = len(class_names)
+    if not num_classes:
+        raise ValueError('no class names given')
+    if network is not None:
+        check_network_classes(network, num_classes)
+
+    os.makedirs(output_dir, exist_ok=True)
+    cache = LabelCache(os.path.join(output_dir, f'.{name}.cache.json') if use_cache else None)
+    records = sorted(scan_images(image_root, workers=workers, extensions=extensions))
+    label_results, validated, issues = validate_labels(records, num_classes, cache, workers=workers)
+    missing = [record.image for record, stats in zip(records, label_results) if stats is None]
+    if require_labels:
+        issues += [f'{image}: no label file' for image in missing]
+    cache.save({record.label for record in records})
+    if issues and strict:
+        shown = issues[:20] + ([f'... and {len(issues) - 20} more'] if len(issues) > 20 else [])
+        raise ValueError(f'{len(issues)} label issues:\n' + '\n'.join(shown))
+
+    splits = {'train': [], 'valid': []}
+    for record in records:
+        splits[split_of(os.path.relpath(record.image, image_root), valid_fraction)].append(os.path.abspath(record.image))
+
+    paths = {key: os.path.abspath(os.path.join(output_dir, file_name)) for key, file_name in
+             [('train', 'train.txt'), ('valid', 'valid.txt'), ('names', f'{name}.names'), ('data', f'{name}.data')]}
+    _write_list(paths['train'], splits['train'])
+    _write_list(paths['valid'], splits['valid'])
+    _write_list(paths['names'], class_names)
+    write_atomic(paths['data'], (f'classes = {num_classes}{NL}'
+                                 f'train = {paths["train"]}{NL}'
+                                 f'valid = {paths["valid"]}{NL}'
+                                 f'names = {paths["names"]}{NL}'
+                                 f'backup = {backup}{NL}').encode('utf-8'))
+
+    boxes = sum(stats.boxes for stats in label_results if stats is not None)
+    return DatasetStats(len(records), len(splits['train']), len(splits['valid']), boxes, len(missing), validated,
+                        len(records) - len(missing) - validated, issues, time.perf_counter() - start)
+
+
+""" CLI """
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description='Write darknet .data/.names/train.txt/valid.txt for an image tree')
+    parser.add_argument('images', help='root of the image tree')
+    parser.add_argument('--names', required=True, help='class names file, one name per line')
+    parser.add_argument('--out-dir', required=True)
+    parser.add_argument('--name', default='obj', help='base name of the .data and .names files')
+    parser.add_argument('--valid-fraction', type=float, default=0.1)
+    parser.add_argument('--cfg', default=None, help='network cfg whose [yolo] layers must match the classes')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--no-cache', action='store_true', help='validate every label file again')
+    parser.add_argument('--require-labels', action='store_true', help='fail on images without a label file')
+    parser.add_argument('--keep-going', action='store_true', help='write the files despite label issues')
+    return parser
+
+def run(args):
+    network = None
+    if args.cfg:
+        from darknet_config_generator.yolo_parser import load_config
+        network = load_config(args.cfg)
+    stats = build_dataset(args.images, args.out_dir, read_names(args.names), name=args.name,
+                          valid_fraction=args.valid_fraction, network=network, workers=args.workers,
+                          use_cache=not args.no_cache, require_labels=args.require_labels, strict=not args.keep_going)
+    for issue in stats.issues:
+        print(issue)
+    print(f'{stats.images} images ({stats.train} train, {stats.valid} valid), {stats.boxes} boxes, '
+          f'{stats.missing_labels} without labels; {stats.validated} label files read, {stats.cached} cached, '
+          f'in {stats.seconds:.2f}s -> {args.out_dir}')
+
+def main(argv=None):
+    run(build_arg_parser().parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Multi-Target Export
+
+Emits several configurations of one network (training, inference, other input resolutions) in a
+single pass. The layer sections are rendered once and cached; each variant only renders its own
+[net], optimizer and image augmentation headers.
+
+usage:
+    exporter = MultiTargetExporter(yolo_net)
+    exporter.export(standard_variants(yolo_net, resolutions=[(416, 416, 3), (320, 320, 3)]), 'cfg/')
+
+@author: Abdullahi S. Adamu
+"""
+import copy
+import os
+
+from darknet_config_generator.common import write_atomic
+from darknet_config_generator.yolo_darknet import YOLONetwork
+
+
+class ExportVariant:
+    """
+    Export Variant
+
+    Per-variant [net] settings; any setting left as None is taken from the exported network.
+    """
+    def __init__(self, name:str, input_dim=None, optimizer=None, image_augmentation=None):
+        self.name = name
+        self.input_dim = input_dim
+        self.optimizer = optimizer
+        self.img_aug = image_augmentation
+
+
+def inference_optimizer(optimizer):
+    """ returns a copy of the optimizer with batch=1 and subdivisions=1"""
+    optimizer = copy.deepcopy(optimizer)
+    optimizer.batch = 1
+    optimizer.subdivisions = 1
+    return optimizer
+
+def standard_variants(network, resolutions=()):
+    """
+    returns the usual variants of a network
+
+    - train - the network as described
+    - test - batch=1 and subdivisions=1 for inference
+    - test_<w>x<h> - inference variant for every extra resolution
+    """
+    variants = [ExportVariant('train')]
+    test_optimizer = inference_optimizer(network.optimizer) if network.optimizer else None
+    variants.append(ExportVariant('test', optimizer=test_optimizer))
+    for input_dim in resolutions:
+        variants.append(ExportVariant(f'test_{input_dim[0]}x{input_dim[1]}', input_dim=tuple(input_dim),
+                                      optimizer=test_optimizer))
+    return variants
+
+
+class MultiTargetExporter:
+    """
+    Multi-Target Exporter
+
+    Renders the layers of a network once and combines them with the headers of each variant.
+    Call invalidate() after editing the layers of the network.
+    """
+    def __init__(self, network:YOLONetwork):
+        self.network = network
+        self._body = None
+
+    def invalidate(self):
+        """ drops the cached layer sections"""
+        self._body = None
+
+    @property
+    def body(self):
+        """ rendered layer sections, as bytes"""
+        if self._body is None:
+            self._body = ''.join(layer.render() for layer in self.network.layers).encode('utf-8')
+        return self._body
+
+    def render_header(self, variant:ExportVariant):
+        """ renders the [net], optimizer and image augmentation sections of a variant"""
+        network = self.network
+        header = YOLONetwork(input_dim=variant.input_dim or network.input_dim,
+                             image_augmentation=variant.img_aug or network.img_aug,
+                             optimizer=variant.optimizer or network.optimizer,
+                             layers=[])
+        return header.render()
+
+    def render_bytes(self, variant:ExportVariant):
+        """ renders the complete configuration of a variant as bytes"""
+        return self.render_header(variant).encode('utf-8') + self.body
+
+    def render(self, variant:ExportVariant):
+        """ renders the complete configuration of a variant"""
+        return self.render_bytes(variant).decode('utf-8')
+
+    def export(self, variants, out_dir:str, filename:str='{name}.cfg'):
+        """
+        writes every variant to out_dir
+
+        params:
+        - variants - iterable of ExportVariant
+        - out_dir (str) - output directory, created if missing
+        - filename (str) - file name pattern, formatted with the variant name
+
+        returns:
+        - dict of variant name to written path
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {}
+        for variant in variants:
+            path = os.path.join(out_dir, filename.format(name=variant.name))
+            write_atomic(path, self.render_bytes(variant))
+            paths[variant.name] = path
+        return paths
@@ -0,0 +1,301 @@
+"""
+Frozen Layer Specs
+
+Immutable, interned versions of the layer and connection descriptors for holding very many
+networks at once (e.g. candidates of an architecture search).
+
+freeze(layer) returns a frozen subclass of the layer's descriptor, so it renders, analyzes and
+passes isinstance checks exactly like the original, but:
+- it has no __dict__ and cannot be modified; replace() returns an edited copy
+- equality and hashing are structural
+- identical layers are interned, so a layer repeated across a network or across thousands of
+  candidate networks is stored once
+
+NetworkSpec is the matching immutable network: a tuple of frozen layers plus the [net] settings,
+with copy-on-write editing that shares every unchanged layer with the original.
+
+usage:
+    base = NetworkSpec.from_network(YOLONetwork(layers=get_yolov3()))
+    candidate = base.replace_layer(12, filters=256)      # shares all other layers with base
+    candidate.to_network().generate_config('candidate.cfg')
+
+@author: Abdullahi S. Adamu
+"""
+import copy
+import weakref
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+
+# (descriptor class, typed field values) -> frozen layer, for every frozen layer still referenced
+_INTERNED = weakref.WeakValueDictionary()
+# descriptor class -> frozen subclass
+_FROZEN_TYPES = {}
+
+
+class FrozenDict(dict):
+    """ read-only, hashable dict used for dict-valued options"""
+    __slots__ = ()
+
+    def __hash__(self):
+        # order-independent, like dict equality
+        return hash(frozenset(self.items()))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('options of a frozen layer are read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze_value(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze_value(item)) for key, item in value.items())
+    return value
+
+def _typed(value):
+    """
+    pairs every value with its type, recursing into tuples and FrozenDicts
+
+    1, 1.0 and True are equal in Python but render differently, so interning keys must keep them apart.
+    """
+    if isinstance(value, tuple):
+        return (tuple, tuple(_typed(item) for item in value))
+    if isinstance(value, FrozenDict):
+        return (FrozenDict, frozenset((_typed(key), _typed(item)) for key, item in value.items()))
+    return (type(value), value)
+
+def _thaw_value(value):
+    if isinstance(value, tuple):
+        return [_thaw_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _thaw_value(item) for key, item in value.items()}
+    return value
+
+def _fields(descriptor:type):
+    """ slot names of a descriptor class, base classes first"""
+    fields = []
+    for cls in reversed(descriptor.__mro__[:-1]):
+        if '__slots__' not in vars(cls):
+            raise ValueError(f'{descriptor.__name__} cannot be frozen, {cls.__name__} does not define __slots__')
+        slots = cls.__slots__
+        fields += [slots] if isinstance(slots, str) else [name for name in slots if name != '__weakref__']
+    return tuple(fields)
+
+
+class FrozenLayer:
+    """
+    Frozen Layer
+
+    Base of the frozen subclasses created by freeze(); use freeze() rather than instantiating it.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is frozen, use replace({name}=...) for an edited copy')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is frozen')
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, FrozenLayer):
+            return NotImplemented
+        return (type(self) is type(other) and self._hash == other._hash
+                and _typed(self._values()) == _typed(other._values()))
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (_make_frozen, (self._descriptor, self._values()))
+
+    def __repr__(self):
+        options = ', '.join(f'{name}={value!r}' for name, value in zip(self._fields, self._values()))
+        return f'{type(self).__name__}({options})'
+
+    def replace(self, **changes):
+        """ returns a frozen copy with the given fields changed"""
+        unknown = set(changes) - set(self._fields)
+        if unknown:
+            raise ValueError(f'{self._descriptor.__name__} has no fields {sorted(unknown)}, '
+                             f'expected some of {list(self._fields)}')
+        values = tuple(_freeze_value(changes[name]) if name in changes else value
+                       for name, value in zip(self._fields, self._values()))
+        return _make_frozen(self._descriptor, values)
+
+    def thaw(self):
+        """ returns a mutable descriptor equal to the frozen layer"""
+        layer = self._descriptor.__new__(self._descriptor)
+        for name, value in zip(self._fields, self._values()):
+            setattr(layer, name, _thaw_value(value))
+        return layer
+
+
+def _frozen_type(descriptor:type):
+    frozen_type = _FROZEN_TYPES.get(descriptor)
+    if frozen_type is None:
+        frozen_type = type(f'Frozen{descriptor.__name__}', (FrozenLayer, descriptor), {
+            '__slots__': ('_hash', '__weakref__'),
+            '__module__': __name__,
+            '_descriptor': descriptor,
+            '_fields': _fields(descriptor),
+        })
+        _FROZEN_TYPES[descriptor] = frozen_type
+    return frozen_type
+
+def _make_frozen(descriptor:type, values:tuple):
+    """ returns the interned frozen layer of a descriptor class with the given field values"""
+    try:
+        key = (descriptor, _typed(values))
+        layer = _INTERNED.get(key)
+    except TypeError as error:
+        raise ValueError(f'{descriptor.__name__} has an unhashable option value: {error}') from error
+    if layer is None:
+        frozen_type = _frozen_type(descriptor)
+        layer = object.__new__(frozen_type)
+        for name, value in zip(frozen_type._fields, values):
+            object.__setattr__(layer, name, value)
+        object.__setattr__(layer, '_hash', hash(key))
+        _INTERNED[key] = layer
+    return layer
+
+
+def freeze(layer):
+    """
+    returns the interned frozen version of a layer or connection
+
+    Lists become tuples and dicts become FrozenDicts; thaw() converts them back.
+
+    raises:
+    - ValueError if the descriptor does not define __slots__ or has unhashable option values
+    """
+    if isinstance(layer, FrozenLayer):
+        return layer
+    descriptor = type(layer)
+    values = tuple(_freeze_value(getattr(layer, name)) for name in _frozen_type(descriptor)._fields)
+    return _make_frozen(descriptor, values)
+
+def thaw(layer):
+    """ returns a mutable copy of a frozen layer; other layers are returned unchanged"""
+    return layer.thaw() if isinstance(layer, FrozenLayer) else layer
+
+def interned_count():
+    """ number of distinct frozen layers currently alive"""
+    return len(_INTERNED)
+
+
+class NetworkSpec:
+    """
+    Network Spec
+
+    Immutable network of frozen layers. The optimizer and image augmentation descriptors are
+    copied on construction; equality and hashing use the layers, the input dimensions and the
+    rendered optimizer and augmentation sections.
+    """
+    __slots__ = ('input_dim', 'layers', 'optimizer', 'img_aug', '_key', '_hash')
+
+    def __init__(self, layers, input_dim=(608, 608, 3), optimizer=None, image_augmentation=None):
+        values = {
+            'input_dim': tuple(input_dim),
+            'layers': tuple(freeze(layer) for layer in layers),
+            'optimizer': copy.copy(optimizer),
+            'img_aug': copy.copy(image_augmentation),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        key = (values['input_dim'], values['layers'],
+               optimizer.render() if optimizer else None,
+               image_augmentation.render() if image_augmentation else None)
+        object.__setattr__(self, '_key', key)
+        object.__setattr__(self, '_hash', hash(key))
+
+    @classmethod
+    def from_network(cls, network:YOLONetwork):
+        """ freezes a YOLONetwork"""
+        return cls(network.layers, network.input_dim, network.optimizer, network.img_aug)
+
+    def to_network(self, thaw_layers:bool=False):
+        """
+        returns a YOLONetwork of the spec
+
+        params:
+        - thaw_layers (bool) - give the network mutable copies of the layers instead of the frozen layers
+        """
+        layers = [thaw(layer) for layer in self.layers] if thaw_layers else list(self.layers)
+        return YOLONetwork(input_dim=self.input_dim, image_augmentation=copy.copy(self.img_aug),
+                           optimizer=copy.copy(self.optimizer), layers=layers)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'NetworkSpec is frozen, use replace({name}=...) for an edited copy')
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __getitem__(self, index):
+        return self.layers[index]
+
+    def __iter__(self):
+        return iter(self.layers)
+
+    def __eq__(self, other):
+        if not isinstance(other, NetworkSpec):
+            return NotImplemented
+        return self is other or (self._hash == other._hash and self._key == other._key)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (NetworkSpec, (self.layers, self.input_dim, self.optimizer, self.img_aug))
+
+    def __repr__(self):
+        return f'NetworkSpec(layers={len(self.layers)}, input_dim={self.input_dim})'
+
+    def iter_sections(self):
+        """ lazily yields the sections of the network configuration"""
+        return self.to_network().iter_sections()
+
+    def render(self):
+        """ renders the complete network configuration as a single string"""
+        return self.to_network().render()
+
+    def replace(self, **changes):
+        """ returns a copy with any of layers, input_dim, optimizer or image_augmentation replaced"""
+        values = {'layers': self.layers, 'input_dim': self.input_dim,
+                  'optimizer': self.optimizer, 'image_augmentation': self.img_aug}
+        unknown = set(changes) - set(values)
+        if unknown:
+            raise ValueError(f'NetworkSpec has no fields {sorted(unknown)}, expected some of {list(values)}')
+        values.update(changes)
+        return NetworkSpec(**values)
+
+    def replace_layer(self, index:int, layer=None, **changes):
+        """
+        returns a copy with one layer replaced, sharing every other layer
+
+        params:
+        - index (int) - layer index
+        - layer - replacement layer; if omitted, the current layer with the given fields changed
+        """
+        layer = freeze(layer) if layer is not None else self.layers[index].replace(**changes)
+        layers = list(self.layers)
+        layers[index] = layer
+        return self.replace(layers=layers)
+
+    def insert(self, index:int, *layers):
+        """ returns a copy with layers inserted before index"""
+        return self.replace(layers=self.layers[:index] + tuple(layers) + self.layers[index:])
+
+    def delete(self, index):
+        """ returns a copy without the layer (or slice of layers) at index"""
+        layers = list(self.layers)
+        del layers[index]
+        return self.replace(layers=layers)
@@ -0,0 +1,148 @@
+"""
+Network Graph Builder
+
+Builds layer lists in which route and shortcut connections refer to tagged layers by name instead
+of hand-computed darknet indices, so inserting or removing layers (e.g. changing the repeats of a
+block) never silently breaks a connection.
+
+Names are resolved in a single O(n) pass; route references become absolute indices and shortcut
+references become relative indices, as in the darknet reference configs. Shapes of the resolved
+network are then checked in a second linear pass.
+
+usage:
+    builder = NetworkBuilder(input_dim=(608, 608, 3))
+    builder.extend(_get_mid_conv2d_block(start_filters=128, repeats=8), name='stage_3')
+    ...
+    builder.add(RouteConnection(layers=[-1, 'stage_3']))
+    layers = builder.build()
+
+@author: Abdullahi S. Adamu
+"""
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+
+
+class GraphError(ValueError):
+    """ raised when references cannot be resolved or connected shapes do not match"""
+    def __init__(self, errors:list):
+        super().__init__('\n'.join(errors))
+        self.errors = errors
+
+
+class NetworkBuilder:
+    """
+    Network Builder
+
+    Collects layers, optionally tagged with a unique name. RouteConnection.layers and
+    SkipConnection.from_layer may contain names of tagged layers in addition to darknet indices.
+    """
+    def __init__(self, input_dim=(608, 608, 3)):
+        self.input_dim = input_dim
+        self.layers = []
+        self.names = {}
+
+    def __len__(self):
+        return len(self.layers)
+
+    def _check_name(self, name:str):
+        """ raises GraphError if the name is taken, before anything is appended"""
+        if name is not None and name in self.names:
+            raise GraphError([f'layer name {name!r} is already used by layer {self.names[name]}'])
+
+    def _tag(self, name:str, index:int):
+        if name is not None:
+            self.names[name] = index
+        return index
+
+    def add(self, layer, name:str=None):
+        """ appends a layer, optionally tagging it with a name; returns its index"""
+        self._check_name(name)
+        self.layers.append(layer)
+        return self._tag(name, len(self.layers) - 1)
+
+    def extend(self, layers:list, name:str=None):
+        """ appends layers, optionally tagging the last one with a name; returns its index"""
+        self._check_name(name)
+        self.layers.extend(layers)
+        return self._tag(name, len(self.layers) - 1)
+
+    def index(self, name:str):
+        """ returns the index of a tagged layer"""
+        return self.names[name]
+
+    def resolve(self):
+        """
+        resolves layer names to darknet indices
+
+        returns:
+        - list of layers where connections referring to names are replaced by resolved copies
+        """
+        errors, resolved = [], []
+        for index, layer in enumerate(self.layers):
+            if isinstance(layer, RouteConnection) and any(isinstance(ref, str) for ref in layer.layers):
+                references = [self._resolve_reference(index, layer, ref, absolute=True, errors=errors)
+                              for ref in layer.layers]
+                layer = RouteConnection(layers=references)
+            elif isinstance(layer, SkipConnection) and isinstance(layer.from_layer, str):
+                reference = self._resolve_reference(index, layer, layer.from_layer, absolute=False, errors=errors)
+                layer = SkipConnection(from_layer=reference, activation=layer.activation)
+            resolved.append(layer)
+        if errors:
+            raise GraphError(errors)
+        return resolved
+
+    def _resolve_reference(self, index:int, layer, reference, absolute:bool, errors:list):
+        if not isinstance(reference, str):
+            return reference
+        target = self.names.get(reference)
+        if target is None:
+            errors.append(f'layer {index} {layer.__HEADER__} references unknown layer name {reference!r}')
+            return reference
+        if target >= index:
+            errors.append(f'layer {index} {layer.__HEADER__} references layer {reference!r} ({target}) '
+                          f'which is not a preceding layer')
+        return target if absolute else target - index
+
+    def build(self, validate:bool=True):
+        """
+        returns the resolved layer list
+
+        params:
+        - validate (bool) - also check that routed and shortcut layers have compatible shapes
+
+        raises:
+        - GraphError listing every unresolved reference or shape mismatch
+        """
+        layers = self.resolve()
+        if validate:
+            validate_layers(layers, self.input_dim, names=self.names)
+        return layers
+
+
+def validate_layers(layers:list, input_dim=(608, 608, 3), names:dict=None):
+    """
+    checks references and connected shapes of a layer list in a single linear pass
+
+    raises:
+    - GraphError listing every problem found
+    """
+    # imported here so that building networks without validation does not import numpy
+    from darknet_config_generator.yolo_analysis import layer_cost
+
+    labels = {index: name for name, index in (names or {}).items()}
+    outputs, errors = [], []
+    input_shape = tuple(int(dim) for dim in input_dim)
+    for index, layer in enumerate(layers):
+        try:
+            cost, issues = layer_cost(layer, index, outputs, input_shape)
+        except (ValueError, TypeError, IndexError) as error:
+            errors.append(str(error))
+            # keep propagating shapes so later problems are reported too
+            outputs.append(outputs[index - 1] if index > 0 else input_shape)
+            continue
+        if index in labels:
+            issues = [f'{issue} ({labels[index]!r})' for issue in issues]
+        errors.extend(issues)
+        outputs.append((cost.out_w, cost.out_h, cost.out_c))
+    if errors:
+        raise GraphError(errors)
+    return outputs
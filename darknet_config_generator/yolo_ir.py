@@ -0,0 +1,230 @@
+"""
+Incremental Network Analysis
+
+Intermediate representation of a layer list for interactive architecture tuning. Each layer is a
+node with memoized output shape, cost and issues, and dependency edges to the layers it reads:
+the previous layer, the sources of a [route] and the source of a [shortcut].
+
+Editing a layer recomputes that node and walks its dependents in index order, stopping wherever
+a recomputed node's output shape is unchanged. Changing the filters of one convolution therefore
+touches a handful of nodes regardless of network size; only edits that change spatial sizes
+(e.g. a stride) ripple through every later layer.
+
+usage:
+    ir = NetworkIR(get_yolov3(), input_dim=(416, 416, 3))
+    ir.update(12, filters=256)
+    print(ir.total_bflops, ir.total_params, ir.issues)
+
+@author: Abdullahi S. Adamu
+"""
+import heapq
+
+import numpy as np
+
+from darknet_config_generator.yolo_analysis import (LayerCost, NetworkCost, layer_cost, network_input_dim,
+                                                    resolve_layer_index)
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_frozen import FrozenLayer
+
+
+def _edited(layer, changes:dict):
+    """ returns an edited copy of a frozen layer, or edits a mutable layer in place and returns it"""
+    if isinstance(layer, FrozenLayer):
+        return layer.replace(**changes)
+    for name, value in changes.items():
+        setattr(layer, name, value)
+    return layer
+
+
+class NetworkIR:
+    """
+    Network IR
+
+    Shapes are plain ints for a single input resolution. Layers may be mutable descriptors or
+    frozen layers; update() edits either kind.
+    """
+    def __init__(self, network, input_dim=None):
+        self.input_shape = tuple(int(dim) for dim in network_input_dim(network, input_dim))
+        self.layers = list(getattr(network, 'layers', network))
+        # number of nodes recomputed by the last update
+        self.recomputed = 0
+        self._build()
+
+    def _build(self):
+        count = len(self.layers)
+        self.costs = [None] * count
+        self.outputs = [None] * count
+        self.node_issues = [()] * count
+        self.sources = [()] * count
+        self.dependents = [[] for _ in range(count)]
+        self.total_params, self.total_bflops = 0, 0.0
+        for index in range(count):
+            self._link(index)
+            self._compute(index)
+        self.recomputed = count
+
+    def __len__(self):
+        return len(self.layers)
+
+    def _layer_sources(self, index:int, layer):
+        """ valid indices of the layers a layer reads"""
+        if isinstance(layer, RouteConnection):
+            references = [resolve_layer_index(index, reference) for reference in layer.layers]
+        else:
+            references = [index - 1] if index > 0 else []
+            if isinstance(layer, SkipConnection):
+                references.append(resolve_layer_index(index, layer.from_layer))
+        return tuple(sorted({source for source in references if 0 <= source < index}))
+
+    def _link(self, index:int):
+        """ (re)creates the dependency edges of a node"""
+        for source in self.sources[index]:
+            self.dependents[source].remove(index)
+        self.sources[index] = self._layer_sources(index, self.layers[index])
+        for source in self.sources[index]:
+            self.dependents[source].append(index)
+
+    def _compute(self, index:int):
+        """ recomputes a node, keeping the totals up to date"""
+        layer = self.layers[index]
+        try:
+            cost, issues = layer_cost(layer, index, self.outputs, self.input_shape)
+        except (ValueError, TypeError, IndexError) as error:
+            # keep propagating shapes so later problems are reported too
+            shape = self.outputs[index - 1] if index > 0 else self.input_shape
+            cost, issues = LayerCost(index, layer.__HEADER__, *shape, *shape, 0, 0.0), [str(error)]
+
+        previous = self.costs[index]
+        if previous is not None:
+            self.total_params -= previous.params
+            self.total_bflops -= previous.bflops
+        self.total_params += cost.params
+        self.total_bflops += cost.bflops
+        self.costs[index] = cost
+        self.node_issues[index] = tuple(issues)
+        self.outputs[index] = (cost.out_w, cost.out_h, cost.out_c)
+
+    def _propagate(self, start:int):
+        """ recomputes a node and every dependent whose inputs changed, in index order"""
+        pending, queued, recomputed = [start], {start}, 0
+        while pending:
+            index = heapq.heappop(pending)
+            queued.discard(index)
+            output = self.outputs[index]
+            self._compute(index)
+            recomputed += 1
+            if self.outputs[index] != output:
+                for dependent in self.dependents[index]:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(pending, dependent)
+        self.recomputed = recomputed
+
+    def update(self, index:int, **changes):
+        """
+        changes fields of a layer and recomputes the affected nodes
+
+        Frozen layers are replaced by an edited copy; mutable layers are edited in place.
+
+        raises:
+        - ValueError if the layer has no such field
+        """
+        layer = self.layers[index]
+        unknown = [name for name in changes if not hasattr(layer, name)]
+        if unknown:
+            raise ValueError(f'layer {index} {layer.__HEADER__} has no fields {unknown}')
+        self.set_layer(index, _edited(layer, changes))
+
+    def set_layer(self, index:int, layer):
+        """ replaces a layer and recomputes the affected nodes"""
+        self.layers[index] = layer
+        self.touch(index)
+
+    def touch(self, index:int):
+        """ recomputes the affected nodes after a layer was edited elsewhere"""
+        self._link(index)
+        self._propagate(index)
+
+    def _rewire(self, new_index, deleted:int=None):
+        """
+        returns the reference changes that keep every route and shortcut pointing at the same layers
+        once each layer i moves to new_index(i)
+
+        raises:
+        - ValueError if a layer references the deleted layer
+        """
+        edits = {}
+        for index, layer in enumerate(self.layers):
+            if index == deleted:
+                continue
+            if isinstance(layer, RouteConnection):
+                name, references = 'layers', list(layer.layers)
+            elif isinstance(layer, SkipConnection):
+                name, references = 'from_layer', [layer.from_layer]
+            else:
+                continue
+            moved_to, rewired = new_index(index), []
+            for reference in references:
+                target = resolve_layer_index(index, reference)
+                if not 0 <= target < index:
+                    # already broken, the analysis reports it
+                    rewired.append(reference)
+                elif target == deleted:
+                    raise ValueError(f'layer {index} {layer.__HEADER__} references layer {deleted}, '
+                                     f'which cannot be deleted')
+                else:
+                    target = new_index(target)
+                    # absolute references stay absolute, relative ones stay relative
+                    rewired.append(target if reference >= 0 else target - moved_to)
+            if rewired != references:
+                edits[moved_to] = {name: rewired if name == 'layers' else rewired[0]}
+        return edits
+
+    def _apply_rewiring(self, edits:dict):
+        for index, changes in edits.items():
+            self.layers[index] = _edited(self.layers[index], changes)
+
+    def insert(self, index:int, layer):
+        """
+        inserts a layer before index
+
+        Route and shortcut references of the other layers are rewired to keep pointing at the same
+        layers; the references of the inserted layer are taken as they are. Indices shift, so the
+        whole network is recomputed.
+        """
+        index = min(max(index + len(self.layers) if index < 0 else index, 0), len(self.layers))
+        edits = self._rewire(lambda old: old + 1 if old >= index else old)
+        self.layers.insert(index, layer)
+        self._apply_rewiring(edits)
+        self._build()
+
+    def delete(self, index:int):
+        """
+        deletes a layer
+
+        Route and shortcut references of the other layers are rewired to keep pointing at the same
+        layers. Indices shift, so the whole network is recomputed.
+
+        raises:
+        - ValueError if a route or shortcut references the layer; the IR is left unchanged
+        """
+        index = index + len(self.layers) if index < 0 else index
+        if not 0 <= index < len(self.layers):
+            raise IndexError('layer index out of range')
+        edits = self._rewire(lambda old: old - 1 if old > index else old, deleted=index)
+        del self.layers[index]
+        self._apply_rewiring(edits)
+        self._build()
+
+    @property
+    def issues(self):
+        """ issues of every node in layer order"""
+        return [issue for issues in self.node_issues for issue in issues]
+
+    def output_shape(self, index:int=-1):
+        """ (w, h, c) output shape of a layer"""
+        return self.outputs[index]
+
+    def to_network_cost(self):
+        """ returns the memoized results as a NetworkCost, e.g. for report()"""
+        return NetworkCost(np.array([self.input_shape]), list(self.costs), self.issues)
@@ -3,21 +3,23 @@ Layer Descriptors
 
 @author: Abdullahi S. Adamu
 """
-from darknet_config_generator.common import NL, Activations
+from darknet_config_generator.common import NL, Activations, Descriptor, YOLO_ANCHORS, list_to_str, anchors_to_str
 
 """ Layers """
-class Layer:
+class Layer(Descriptor):
     """ Layer"""
+    __slots__ = ()
+
     def __init__(self):
         pass
-    def export(self):
-        pass
 
 class ConvolutionLayer(Layer):
     """ Convolution Layer"""
+    __HEADER__ = '[convolutional]'
+    __slots__ = ('size', 'filters', 'stride', 'pad', 'activation', 'batch_normalize')
+
     def __init__(self, size:int=1, filters:int=255, stride:int=3, pad:int=1,
                          activation=Activations.LEAKY_RELU.value, batch_normalize:bool=True):
-        self.__HEADER__='[convolutional]'
         self.size = size
         self.filters = filters
         self.stride = stride
@@ -25,18 +27,21 @@ class ConvolutionLayer(Layer):
         self.activation = activation
         self.batch_normalize = batch_normalize
         
-    def export(self, file_obj):
-        """ writes to layer to file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
+    def render(self):
+        """ renders the layer as a config section"""
         if self.batch_normalize:
-            file_obj.write(f'batch_normalize={int(self.batch_normalize)}{NL}')
-        file_obj.write(f'size={self.size}{NL}')
-        file_obj.write(f'stride={self.stride}{NL}')
-        file_obj.write(f'pad={self.pad}{NL}')
-        file_obj.write(f'filters={self.filters}{NL}')
-        file_obj.write(f'activation={self.activation}{NL}')
-        file_obj.write(NL)
+            batch_normalize = f'batch_normalize={int(self.batch_normalize)}{NL}'
+        else:
+            batch_normalize = ''
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'{batch_normalize}'
+                f'size={self.size}{NL}'
+                f'stride={self.stride}{NL}'
+                f'pad={self.pad}{NL}'
+                f'filters={self.filters}{NL}'
+                f'activation={self.activation}{NL}'
+                f'{NL}')
 
 
 class SoftmaxLayer(Layer):
@@ -44,69 +49,77 @@ class SoftmaxLayer(Layer):
     Softmax Layer
     """
 
+    __HEADER__ = '[softmax]'
+    __slots__ = ('groups',)
+
     def __init__(self, groups=1):
-        self.__HEADER__ = '[softmax]'
         self.groups = groups
 
-    def export(self, file_obj):
-        """exports to fileobject"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'groups={self.groups}{NL}')
-        file_obj.write(NL)
+    def render(self):
+        """renders the layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'groups={self.groups}{NL}'
+                f'{NL}')
 
 
 class MaxPoolingLayer(Layer):
     """
     MaxPooling layer
     """
+    __HEADER__ = '[maxpool]'
+    __slots__ = ('size', 'stride', 'padding')
+
     def __init__(self, size:int=3, stride:int=2, padding:int=0):
-        self.__HEADER__ = '[maxpool]'
         self.size = size
         self.stride = stride
         self.padding = padding
 
-    def export(self, file_obj):
-        """exports maxpooling layer to file"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'size={self.size}{NL}')
-        file_obj.write(f'stride={self.stride}{NL}')
-        file_obj.write(f'padding={self.padding}{NL}')
-        file_obj.write(NL)
+    def render(self):
+        """renders maxpooling layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'size={self.size}{NL}'
+                f'stride={self.stride}{NL}'
+                f'padding={self.padding}{NL}'
+                f'{NL}')
 
 class FullyConnectedLayer(Layer):
     """
     Fully Connected Layer
     """
+    __HEADER__ = '[connected]'
+    __slots__ = ('size', 'activation')
+
     def __init__(self, size:int=1000, activation=Activations.LINEAR.value):
-        self.__HEADER__ = '[connected]'
         self.size = size
         self.activation = activation
     
-    def export(self, file_obj):
-        """exports to fileobject"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'output={self.size}{NL}')
-        file_obj.write(f'activation={self.activation}{NL}')
-        file_obj.write(NL)
+    def render(self):
+        """renders the layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'output={self.size}{NL}'
+                f'activation={self.activation}{NL}'
+                f'{NL}')
 
 class DropOutLayer(Layer):
     """
     DropOut Layer
     """
 
+    __HEADER__ = '[dropout]'
+    __slots__ = ('dropout_prob',)
+
     def __init__(self, dropout_prob:float=0.5):
-        self.__HEADER__ = '[dropout]'
         self.dropout_prob = dropout_prob
 
-    def export(self, file_obj):
-        """exports dropout layer to the config file"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'probability={self.dropout_prob}{NL}')
-        file_obj.write(NL)
+    def render(self):
+        """renders dropout layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'probability={self.dropout_prob}{NL}'
+                f'{NL}')
 
 class YOLOLayer(Layer):
     """ 
@@ -114,41 +127,46 @@ class YOLOLayer(Layer):
     
     This is normally placed at different levels of the network to perform detections at different resolutions
     """
-    def __init__(self, anchors:list=YOLO_ANCHORS, num_classes:int=80, jitter:float=0.5, masks:list=[6,7,8],
+    __HEADER__ = '[yolo]'
+    __slots__ = ('masks', 'anchors', 'num_anchors', 'classes', 'jitter', 'ignore_thresh', 'truth_thresh', 'random')
+
+    def __init__(self, anchors:list=None, num_classes:int=80, jitter:float=0.5, masks:list=None,
                         ignore_thresh:float=0.5, truth_thresh:float=1.0, random:bool=True):
-        self.__HEADER__ = '[yolo]'
-        self.masks = masks
-        self.anchors = anchors
-        self.num_anchors = len(anchors)//2
+        # copied, so layers never share (and mutate) the same lists
+        self.masks = [6,7,8] if masks is None else list(masks)
+        self.anchors = list(YOLO_ANCHORS if anchors is None else anchors)
+        self.num_anchors = len(self.anchors)//2
         self.classes = num_classes
         self.jitter = jitter
         self.ignore_thresh = ignore_thresh
         self.truth_thresh = truth_thresh
         self.random = int(random)
         
-    def export(self, file_obj):
-        """exports the layer to the given file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'mask={list_to_str(self.masks, space=False)}{NL}')
-        file_obj.write(f'anchors={anchors_to_str(self.anchors)}{NL}')
-        file_obj.write(f'classes={self.classes}{NL}')
-        file_obj.write(f'num={self.num_anchors}{NL}')
-        file_obj.write(f'jitter={self.jitter}{NL}')
-        file_obj.write(f'ignore_thresh={self.ignore_thresh}{NL}')
-        file_obj.write(f'truth_thresh={self.truth_thresh}{NL}')
-        file_obj.write(f'random={self.random}{NL}')
+    def render(self):
+        """renders the layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'mask={list_to_str(self.masks, space=False)}{NL}'
+                f'anchors={anchors_to_str(self.anchors)}{NL}'
+                f'classes={self.classes}{NL}'
+                f'num={self.num_anchors}{NL}'
+                f'jitter={self.jitter}{NL}'
+                f'ignore_thresh={self.ignore_thresh}{NL}'
+                f'truth_thresh={self.truth_thresh}{NL}'
+                f'random={self.random}{NL}')
         
 class UpsampleLayer(Layer):
     """ Upsampling Layer"""
+    __HEADER__ = '[upsample]'
+    __slots__ = ('stride',)
+
     def __init__(self, stride:int=2):
-        self.__HEADER__ = '[upsample]'
         self.stride = stride
         
-    def export(self, file_obj):
-        """exports the layer to the given file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'stride={self.stride}{NL}')
-        file_obj.write(NL)
+    def render(self):
+        """renders the layer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'stride={self.stride}{NL}'
+                f'{NL}')
 
@@ -0,0 +1,287 @@
+"""
+Darknet Training Logs
+
+Extracts columns from darknet training output into numpy arrays, for tuning the optimizer of the
+next run. Each iteration ends with a summary line such as
+
+    1000: 3.182913, 3.521027 avg loss, 0.001000 rate, 5.603279 seconds, 64000 images
+
+preceded by the per-region IoU lines of that iteration (darknet and AlexeyAB formats both work).
+
+Logs are processed in large chunks: the summary lines are matched with one regex over each chunk
+and their numbers parsed by a single np.fromstring call, and the IoU of every iteration is reduced
+with numpy. Only the matched text is held as python objects (one bytes object per summary line and
+two per region line), never a python float per field. Whole logs are memory-mapped; LogTailer
+follows a log that is still being written. suggest_schedule() places lr_decay_schedule steps where the average loss
+plateaus.
+
+usage:
+    log = parse_log('train.log')
+    suggestion = suggest_schedule(log, burn_in=yolo_optimizer.burn_in)
+    apply_suggestion(yolo_optimizer, suggestion)
+
+@author: Abdullahi S. Adamu
+"""
+import itertools
+import mmap
+import os
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+
+COLUMNS = ('iteration', 'loss', 'avg_loss', 'rate', 'seconds', 'images', 'iou')
+CHUNK_SIZE = 64 << 20
+
+_NUMBER = rb'[-+]?(?:\d+\.?\d*(?:[eE][-+]?\d+)?|nan|inf)'
+# anchored on a literal newline rather than ^, which lets the regex engine skip ahead quickly
+_SUMMARY = re.compile(rb'\n[ \t]*(\d+: ' + _NUMBER + rb', ' + _NUMBER + rb' avg(?: loss)?, ' + _NUMBER + rb' rate, '
+                      + _NUMBER + rb' seconds, \d+ images)')
+_REGION = re.compile(rb'IOU: (' + _NUMBER + rb'),[^\n]*count: (\d+)')
+# turn summary lines into six space separated numbers each
+_WORDS = re.compile(rb'avg loss|avg|rate|seconds|images')
+_NUMERIC = bytes.maketrans(b':,', b'  ')
+
+TrainingLog = namedtuple('TrainingLog', COLUMNS)
+TrainingLog.__doc__ = ' columns of a training log, one row per iteration; iou is nan without region lines'
+
+ScheduleSuggestion = namedtuple('ScheduleSuggestion', ['lr_decay_schedule', 'learning_rate', 'reasons'])
+
+
+def _summary_numbers(lines):
+    """ converts matched summary lines to an (n, 6) array"""
+    text = _WORDS.sub(b'', b' '.join(lines)).translate(_NUMERIC)
+    return np.fromstring(text, sep=' ').reshape(-1, 6)
+
+
+class LogParser:
+    """
+    Incremental Training Log Parser
+
+    feed() accepts arbitrary pieces of a log; output after the last complete summary line is kept
+    until more data arrives.
+
+    params:
+    - iou (bool) - also average the region IoU lines of every iteration, which dominates the
+      parsing time of verbose logs
+    """
+    def __init__(self, iou:bool=True):
+        self.iou = iou
+        # a newline in front of the log lets its first line match like any other; the unparsed tail
+        # is a bytearray so appending a chunk does not copy it
+        self._pending = bytearray(b'\n')
+        self._blocks = []
+        self._log = None
+
+    def __len__(self):
+        return sum(len(block) for block in self._blocks)
+
+    def feed(self, data):
+        """
+        parses the complete iterations in data
+
+        params:
+        - data (bytes-like) - the next piece of the log, e.g. a slice of an mmap
+
+        returns:
+        - number of iterations parsed
+        """
+        buffer = self._pending
+        buffer += data
+        lines, regions, lengths = [], [], []
+        start = 0
+        for match in _SUMMARY.finditer(buffer):
+            if self.iou:
+                found = _REGION.findall(buffer, start, match.start())
+                regions += found
+                lengths.append(len(found))
+            lines.append(match.group(1))
+            start = match.end()
+        del buffer[:start]
+        if not lines:
+            return 0
+
+        numbers = _summary_numbers(lines)
+        iou = np.full(len(lines), np.nan)
+        if regions:
+            values, weights = np.fromstring(b' '.join(itertools.chain.from_iterable(regions)), sep=' ').reshape(-1, 2).T
+            valid = np.isfinite(values) & (weights > 0)
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            has_regions = np.asarray(lengths) > 0
+            weighted = np.add.reduceat(np.where(valid, values * weights, 0), offsets[has_regions])
+            total = np.add.reduceat(np.where(valid, weights, 0), offsets[has_regions])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                iou[has_regions] = weighted / total
+        self._blocks.append(np.column_stack([numbers, iou]))
+        self._log = None
+        return len(lines)
+
+    @property
+    def log(self):
+        """ TrainingLog of everything parsed so far"""
+        if self._log is None:
+            table = np.concatenate(self._blocks) if self._blocks else np.empty((0, len(COLUMNS)))
+            if len(self._blocks) > 1:
+                self._blocks = [table]
+            self._log = TrainingLog(table[:, 0].astype(np.int64), *table[:, 1:5].T,
+                                    table[:, 5].astype(np.int64), table[:, 6])
+        return self._log
+
+
+def parse_log(path:str, chunk_size:int=CHUNK_SIZE, iou:bool=True):
+    """
+    parses a complete training log, memory-mapping it
+
+    params:
+    - iou (bool) - whether to fill the iou column from the region lines
+
+    returns:
+    - TrainingLog
+    """
+    parser = LogParser(iou)
+    with open(path, 'rb') as file_obj:
+        size = os.fstat(file_obj.fileno()).st_size
+        if not size:
+            return parser.log
+        with mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in range(0, size, chunk_size):
+                parser.feed(data[offset:offset + chunk_size])
+    return parser.log
+
+
+class LogTailer:
+    """
+    Follows a training log that is still being written
+
+    usage:
+        tailer = LogTailer('train.log')
+        for log in tailer.follow(interval=5):
+            print(log.avg_loss[-1])
+    """
+    def __init__(self, path:str, chunk_size:int=CHUNK_SIZE, iou:bool=True):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.iou = iou
+        self.offset = 0
+        self.parser = LogParser(iou)
+
+    def poll(self):
+        """ parses whatever was appended since the last poll and returns the new iteration count"""
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+        if size < self.offset:
+            # the log was truncated or replaced: start over
+            self.offset, self.parser = 0, LogParser(self.iou)
+        parsed = 0
+        with open(self.path, 'rb') as file_obj:
+            file_obj.seek(self.offset)
+            while True:
+                data = file_obj.read(self.chunk_size)
+                if not data:
+                    break
+                self.offset += len(data)
+                parsed += self.parser.feed(data)
+        return parsed
+
+    @property
+    def log(self):
+        return self.parser.log
+
+    def follow(self, interval:float=5.0, timeout:float=None):
+        """
+        yields the TrainingLog whenever new iterations were parsed
+
+        params:
+        - interval (float) - seconds between polls
+        - timeout (float) - stop after this many seconds without new iterations
+        """
+        idle_since = time.monotonic()
+        while True:
+            if self.poll():
+                idle_since = time.monotonic()
+                yield self.log
+            elif timeout is not None and time.monotonic() - idle_since >= timeout:
+                return
+            else:
+                time.sleep(interval)
+
+
+""" Schedule Suggestions """
+def find_plateaus(log, window:int=1000, min_improvement:float=0.02, start:int=0):
+    """
+    finds iterations at which the average loss stops improving
+
+    A plateau begins where avg_loss improved by less than min_improvement (relative) over the
+    previous window iterations, after having improved faster for at least window iterations, so
+    noise around the threshold does not start new plateaus.
+
+    returns:
+    - int array of iterations
+    """
+    mask = log.iteration >= start
+    iterations, avg_loss = log.iteration[mask], log.avg_loss[mask]
+    if len(avg_loss) <= window:
+        return np.empty(0, dtype=np.int64)
+    previous, current = avg_loss[:-window], avg_loss[window:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        improvement = (previous - current) / np.abs(previous)
+    flat = np.isfinite(improvement) & (improvement < min_improvement)
+    begins = np.flatnonzero(flat[1:] & ~flat[:-1]) + 1
+    # starts of the improving runs before each plateau
+    improving = np.flatnonzero(~flat[1:] & flat[:-1]) + 1
+    if not flat[0]:
+        improving = np.concatenate([[0], improving])
+    previous = np.searchsorted(improving, begins, side='right') - 1
+    valid = previous >= 0
+    valid[valid] = begins[valid] - improving[previous[valid]] >= window
+    return iterations[window:][begins[valid]]
+
+
+def suggest_schedule(log, burn_in:int=0, window:int=1000, min_improvement:float=0.02, scale:float=0.1,
+                     max_steps:int=2, min_gap:int=None):
+    """
+    suggests optimizer changes from a finished or running training log
+
+    - one lr_decay_schedule step of the given scale at each plateau of the average loss after
+      burn_in, at most max_steps and at least min_gap (default: window) iterations apart
+    - half the learning rate when the loss diverged (became nan/inf)
+
+    returns:
+    - ScheduleSuggestion(lr_decay_schedule, learning_rate, reasons); learning_rate is None when
+      it should stay unchanged
+    """
+    min_gap = window if min_gap is None else min_gap
+    reasons, steps = [], {}
+    for iteration in find_plateaus(log, window, min_improvement, start=burn_in):
+        if len(steps) == max_steps:
+            break
+        if steps and iteration - max(steps) < min_gap:
+            continue
+        steps[int(iteration)] = scale
+        reasons.append(f'avg loss improved less than {min_improvement:.1%} over the {window} iterations '
+                       f'before {iteration}')
+
+    learning_rate = None
+    diverged = np.flatnonzero(~np.isfinite(log.loss))
+    if len(diverged):
+        rate = log.rate[diverged[0] - 1] if diverged[0] else log.rate[0]
+        learning_rate = float(rate) / 2 if rate > 0 else None
+        reasons.append(f'loss diverged at iteration {log.iteration[diverged[0]]}')
+    return ScheduleSuggestion(steps, learning_rate, reasons)
+
+
+def apply_suggestion(optimizer, suggestion):
+    """
+    applies a ScheduleSuggestion to a YOLOOptimizer, keeping steps sorted
+
+    returns:
+    - the optimizer
+    """
+    if suggestion.lr_decay_schedule:
+        optimizer.lr_decay_schedule = dict(sorted(suggestion.lr_decay_schedule.items()))
+    if suggestion.learning_rate is not None:
+        optimizer.learning_rate = suggestion.learning_rate
+    return optimizer
@@ -0,0 +1,147 @@
+"""
+Network Manifests
+
+Generates many network configurations described in one JSON or YAML manifest in a single process,
+optionally fanning out over a worker pool, so interpreter startup is paid once per batch rather
+than once per configuration.
+
+A manifest looks like:
+    {
+        "output_dir": "cfg",
+        "defaults": {"architecture": "yolov3", "optimizer": {"batch_size": 64}},
+        "networks": [
+            {"name": "coco", "num_classes": 80},
+            {"name": "faces", "num_classes": 1, "optimizer": {"learning_rate": 0.01}},
+            {"name": "tiny_input", "input_dim": [320, 320, 3], "output": "cfg/extra/tiny.cfg"}
+        ]
+    }
+
+Every network is a specification (see yolo_spec) merged over "defaults"; nested optimizer and
+augmentation settings are merged key by key. A network is written to its "output" path or to
+<output_dir>/<name>.cfg. A manifest may also be a plain list of networks.
+
+@author: Abdullahi S. Adamu
+"""
+import collections
+import json
+import os
+import time
+
+from darknet_config_generator.common import write_atomic
+from darknet_config_generator.yolo_spec import render_spec
+
+# manifest keys of a network entry that are not part of its specification
+ENTRY_KEYS = ('name', 'output')
+
+ManifestJob = collections.namedtuple('ManifestJob', ['name', 'spec', 'path'])
+ManifestResult = collections.namedtuple('ManifestResult', ['name', 'path', 'error'])
+ManifestStats = collections.namedtuple('ManifestStats', ['generated', 'failed', 'seconds'])
+
+
+def load_manifest(path:str):
+    """ reads a JSON manifest, or a YAML manifest if PyYAML is installed"""
+    with open(path) as file_obj:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as error:
+                raise ImportError('reading YAML manifests requires PyYAML (pip install pyyaml)') from error
+            return yaml.safe_load(file_obj)
+        return json.load(file_obj)
+
+def merge_spec(defaults:dict, entry:dict):
+    """ returns the entry merged over the defaults, merging nested dictionaries key by key"""
+    spec = dict(defaults)
+    for key, value in entry.items():
+        if key in ENTRY_KEYS:
+            continue
+        if isinstance(value, dict) and isinstance(spec.get(key), dict):
+            value = {**spec[key], **value}
+        spec[key] = value
+    return spec
+
+def manifest_jobs(manifest, output_dir:str=None):
+    """
+    expands a manifest into ManifestJobs
+
+    params:
+    - manifest (dict or list) - loaded manifest
+    - output_dir (str) - overrides the output_dir of the manifest
+
+    raises:
+    - ValueError if a network has neither a name nor an output path, or two networks share an output
+    """
+    if isinstance(manifest, list):
+        manifest = {'networks': manifest}
+    defaults = manifest.get('defaults') or {}
+    output_dir = output_dir or manifest.get('output_dir') or '.'
+
+    jobs, paths = [], {}
+    for index, entry in enumerate(manifest.get('networks') or []):
+        name = entry.get('name')
+        if name is None and 'output' not in entry:
+            raise ValueError(f'network {index} of the manifest needs a name or an output path')
+        path = entry.get('output') or os.path.join(output_dir, f'{name}.cfg')
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        if path in paths:
+            raise ValueError(f'networks {paths[path]!r} and {name!r} are both written to {path}')
+        paths[path] = name
+        jobs.append(ManifestJob(name, merge_spec(defaults, entry), path))
+    return jobs
+
+
+def _generate(job:ManifestJob):
+    try:
+        data = render_spec(job.spec)
+        os.makedirs(os.path.dirname(job.path) or '.', exist_ok=True)
+        write_atomic(job.path, data)
+    except (ValueError, TypeError, OSError) as error:
+        return ManifestResult(job.name, job.path, f'{type(error).__name__}: {error}')
+    return ManifestResult(job.name, job.path, None)
+
+def _generate_chunk(jobs:list):
+    return [_generate(job) for job in jobs]
+
+def generate_manifest(jobs:list, workers:int=1, chunk_size:int=16, on_result=None):
+    """
+    generates the configuration of every job
+
+    A failing network does not stop the batch; its error is reported in its ManifestResult.
+
+    params:
+    - jobs (list) - ManifestJobs, see manifest_jobs()
+    - workers (int) - worker processes; 1 generates in the calling process, None uses every CPU
+    - chunk_size (int) - jobs generated per task
+    - on_result (callable) - called with every ManifestResult in job order
+
+    returns:
+    - ManifestStats
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+    start = time.perf_counter()
+    generated = failed = 0
+
+    def report(results):
+        nonlocal generated, failed
+        for result in results:
+            if result.error:
+                failed += 1
+            else:
+                generated += 1
+            if on_result is not None:
+                on_result(result)
+
+    if workers == 1 or len(chunks) <= 1:
+        # no pool: spawning workers costs more than small batches take to render
+        for chunk in chunks:
+            report(_generate_chunk(chunk))
+    else:
+        # imported here since it adds noticeably to the startup of short-lived processes
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            for results in executor.map(_generate_chunk, chunks):
+                report(results)
+
+    return ManifestStats(generated, failed, time.perf_counter() - start)
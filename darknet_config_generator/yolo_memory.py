@@ -0,0 +1,189 @@
+"""
+Memory Planner
+
+Models darknet's training memory (weights, workspace and activations) for a layer list and picks
+the largest batch/subdivisions and input resolution that fit a per-device memory budget.
+
+The model is pure computation on top of the static analysis, so it runs on CPU-only hosts.
+
+@author: Abdullahi S. Adamu
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_layers import *
+
+FLOAT_SIZE = 4
+
+# YOLOLayer(random=True) resizes the network by up to this factor during training
+RANDOM_RESIZE_FACTOR = 1.4
+RESIZE_STEP = 32
+
+# weights, biases and scales are held alongside their updates on the device
+WEIGHT_BUFFERS = 2
+
+# float buffers darknet allocates per output value of each layer type (output, delta, ...)
+DEFAULT_ACTIVATION_BUFFERS = 2
+ACTIVATION_BUFFERS = {
+    MaxPoolingLayer: 3,   # output, delta, indexes
+    DropOutLayer: 1,      # rand
+}
+BATCH_NORM_ACTIVATION_BUFFERS = 4   # output, delta, x, x_norm
+
+
+def _activation_buffers(layer):
+    """ number of per-output buffers allocated for the layer"""
+    if isinstance(layer, ConvolutionLayer) and layer.batch_normalize:
+        return BATCH_NORM_ACTIVATION_BUFFERS
+    return ACTIVATION_BUFFERS.get(type(layer), DEFAULT_ACTIVATION_BUFFERS)
+
+
+def uses_random_resize(layers):
+    """ returns True if any YOLO layer resizes the network during training"""
+    return any(isinstance(layer, YOLOLayer) and layer.random for layer in layers)
+
+
+def random_resize_dims(input_dims):
+    """ returns the largest input dimensions darknet allocates for random resizing"""
+    input_dims = np.atleast_2d(np.asarray(input_dims, dtype=np.int64)).copy()
+    input_dims[:, :2] = np.ceil(input_dims[:, :2] * RANDOM_RESIZE_FACTOR / RESIZE_STEP) * RESIZE_STEP
+    return input_dims
+
+
+MemoryEstimate = namedtuple('MemoryEstimate', ['input_dims', 'weight_bytes', 'workspace_bytes',
+                                               'activation_bytes_per_image'])
+
+def estimate_memory(layers, input_dims):
+    """
+    estimates darknet's device memory for the given layers
+
+    params:
+    - layers (list) - layer descriptors
+    - input_dims - (w, h, c) or a sequence of (w, h, c) candidate resolutions. When any YOLOLayer
+                   uses random resizing the estimate is made for the largest resized input.
+
+    returns:
+    - MemoryEstimate with one entry per resolution; the total for a mini-batch of n images is
+      weight_bytes + workspace_bytes + n * activation_bytes_per_image
+    """
+    if uses_random_resize(layers):
+        input_dims = random_resize_dims(input_dims)
+    cost = analyze(layers, input_dims)
+    num_dims = len(cost.input_dims)
+
+    weight_bytes = np.zeros(num_dims, dtype=np.int64)
+    workspace_bytes = np.zeros(num_dims, dtype=np.int64)
+    activation_bytes = np.zeros(num_dims, dtype=np.int64)
+    for layer, layer_cost in zip(layers, cost.layers):
+        weight_bytes += np.asarray(layer_cost.params) * FLOAT_SIZE * WEIGHT_BUFFERS
+        outputs = np.asarray(layer_cost.out_w * layer_cost.out_h * layer_cost.out_c)
+        activation_bytes += outputs * FLOAT_SIZE * _activation_buffers(layer)
+        if isinstance(layer, ConvolutionLayer):
+            # im2col buffer, shared by all layers and sized for a single image
+            workspace = (layer_cost.out_w * layer_cost.out_h * layer.size * layer.size
+                         * layer_cost.in_c * FLOAT_SIZE)
+            workspace_bytes = np.maximum(workspace_bytes, workspace)
+
+    # network input and its delta
+    activation_bytes += cost.input_dims.prod(axis=1) * FLOAT_SIZE * 2
+    return MemoryEstimate(cost.input_dims, weight_bytes, workspace_bytes, activation_bytes)
+
+
+class MemoryPlan:
+    """
+    Memory Plan
+
+    Batch size, subdivisions and input resolution chosen to fit a per-device memory budget.
+    Each GPU holds a full replica with the same mini-batch, so the effective batch grows with num_gpus.
+    """
+    def __init__(self, input_dim, batch:int, subdivisions:int, num_gpus:int, estimated_bytes:int):
+        self.input_dim = input_dim
+        self.batch = batch
+        self.subdivisions = subdivisions
+        self.num_gpus = num_gpus
+        self.estimated_bytes = estimated_bytes
+
+    @property
+    def mini_batch(self):
+        """ images processed per forward/backward pass"""
+        return self.batch // self.subdivisions
+
+    @property
+    def effective_batch(self):
+        """ images per weight update across all GPUs"""
+        return self.batch * self.num_gpus
+
+    def apply(self, network):
+        """ writes the plan into a YOLONetwork and its optimizer"""
+        network.input_dim = self.input_dim
+        if network.optimizer:
+            network.optimizer.batch = self.batch
+            network.optimizer.subdivisions = self.subdivisions
+        return network
+
+    def __repr__(self):
+        return (f'MemoryPlan(input_dim={self.input_dim}, batch={self.batch}, subdivisions={self.subdivisions}, '
+                f'num_gpus={self.num_gpus}, estimated_bytes={self.estimated_bytes})')
+
+
+def _default_resolutions(channels:int=3):
+    """ square resolutions from 320 to 1024 in steps of 32"""
+    return [(size, size, channels) for size in range(320, 1024 + RESIZE_STEP, RESIZE_STEP)]
+
+
+def plan_memory(network, memory_budget:int, num_gpus:int=None, batch:int=None, resolutions=None,
+                min_mini_batch:int=1, prefer:str='resolution'):
+    """
+    picks the input resolution and batch/subdivisions that make the most of the memory budget
+
+    params:
+    - network - YOLONetwork or list of layers
+    - memory_budget (int) - usable memory per device in bytes
+    - num_gpus (int) - number of GPUs, defaults to the network optimizer's
+    - batch (int) - batch size to subdivide, defaults to the network optimizer's or 64
+    - resolutions (list) - candidate (w, h, c) input dimensions, defaults to squares from 320 to 1024
+    - min_mini_batch (int) - smallest acceptable mini-batch
+    - prefer (str) - 'resolution' picks the largest feasible resolution, then its largest mini-batch;
+                     'mini_batch' picks the largest feasible mini-batch, then its largest resolution
+
+    returns:
+    - MemoryPlan
+    """
+    layers = getattr(network, 'layers', network)
+    optimizer = getattr(network, 'optimizer', None)
+    if num_gpus is None:
+        num_gpus = optimizer.num_gpus if optimizer else 1
+    if batch is None:
+        batch = optimizer.batch if optimizer else 64
+    if resolutions is None:
+        channels = network.input_dim[2] if hasattr(network, 'input_dim') else 3
+        resolutions = _default_resolutions(channels)
+    resolutions = np.atleast_2d(np.asarray(resolutions, dtype=np.int64))
+
+    estimate = estimate_memory(layers, resolutions)
+    available = memory_budget - estimate.weight_bytes - estimate.workspace_bytes
+    max_mini_batch = np.maximum(available, 0) // estimate.activation_bytes_per_image
+
+    # mini-batches darknet can use are batch / subdivisions for each divisor of batch
+    mini_batches = np.array(sorted(size for size in range(1, batch + 1) if batch % size == 0))
+    best = np.searchsorted(mini_batches, max_mini_batch, side='right') - 1
+    feasible = (best >= 0) & (mini_batches[np.maximum(best, 0)] >= min_mini_batch)
+    if not np.any(feasible):
+        raise ValueError(f'no resolution fits a mini-batch of {min_mini_batch} in {memory_budget} bytes')
+
+    area = resolutions[:, 0] * resolutions[:, 1]
+    mini_batch = np.where(feasible, mini_batches[np.maximum(best, 0)], 0)
+    if prefer == 'resolution':
+        order = np.lexsort((mini_batch, area, feasible))
+    elif prefer == 'mini_batch':
+        order = np.lexsort((area, mini_batch, feasible))
+    else:
+        raise ValueError(f"prefer must be 'resolution' or 'mini_batch', got {prefer!r}")
+    choice = order[-1]
+    mini_batch = int(mini_batch[choice])
+    estimated_bytes = int(estimate.weight_bytes[choice] + estimate.workspace_bytes[choice]
+                          + mini_batch * estimate.activation_bytes_per_image[choice])
+    return MemoryPlan(input_dim=tuple(int(dim) for dim in resolutions[choice]), batch=batch,
+                      subdivisions=batch // mini_batch, num_gpus=num_gpus, estimated_bytes=estimated_bytes)
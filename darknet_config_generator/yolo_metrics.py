@@ -4,20 +4,22 @@ Loss Descriptors
 @author: Abdullahi S. Adamu
 """
 
-from darknet_config_generator.common import NL
+from darknet_config_generator.common import NL, Descriptor
 
 
-class Loss:
+class Loss(Descriptor):
     """
     Base Loss Class
     """
+    __HEADER__ = '[cost]'
+    __slots__ = ('loss_type',)
+
     def __init__(self, loss_type=''):
-        self.__HEADER__ = '[cost]'
         self.loss_type = loss_type
 
-    def export(self, file_obj):
-        """ export loss """
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'type={self.loss_type}{NL}')
-        file_obj.write(NL)
\ No newline at end of file
+    def render(self):
+        """ renders loss as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'type={self.loss_type}{NL}'
+                f'{NL}')
@@ -11,6 +11,7 @@ from darknet_config_generator.yolo_layers import *
 from darknet_config_generator.yolo_optimizers import *
 from darknet_config_generator.yolo_preprocess import *
 from darknet_config_generator.common import *
+from darknet_config_generator.yolo_graph import NetworkBuilder
 
 
 """ 
@@ -18,7 +19,6 @@ YOLO NETWORK STRUCTURE
 
 Line Comments included (see https://github.com/AlexeyAB/darknet/blob/master/cfg/yolov3.cfg)
 """
-BBOX_COORDS_WCLASS_COUNT = 5
 
 def get_pre_yolo3d_filters_count(num_classes=80, num_anchors=9, num_yolo_layers=3):
     """ returns the number of filters required for the convolution before the YOLO Object detection layer """
@@ -30,14 +30,14 @@ def _get_first_conv2d_block(start_filters=32, start_stride=1):
             ConvolutionLayer(batch_normalize=True, filters=start_filters*2, size=3, stride=2, pad=1, activation=Activations.LEAKY_RELU.value)]
 
 def _get_mid_conv2d_block(start_filters=32, repeats=1, activation=Activations.LEAKY_RELU.value, no_residual=False):
-    """ middle convolution blocks """
-    if no_residual:
-        return [ConvolutionLayer(batch_normalize=True, filters=start_filters, size=1, stride=1, pad=1, activation=activation),
-                ConvolutionLayer(batch_normalize=True, filters=start_filters * 2, size=3, stride=1, pad=1, activation=activation)] * repeats
-    else:
-        return [ConvolutionLayer(batch_normalize=True, filters=start_filters, size=1, stride=1, pad=1, activation=activation),
-                ConvolutionLayer(batch_normalize=True, filters=start_filters * 2, size=3, stride=1, pad=1, activation=activation),
-                SkipConnection(from_layer=-3, activation=Activations.LINEAR.value)] * repeats
+    """ middle convolution blocks, every repeat has its own layer instances """
+    layers = []
+    for _ in range(repeats):
+        layers += [ConvolutionLayer(batch_normalize=True, filters=start_filters, size=1, stride=1, pad=1, activation=activation),
+                   ConvolutionLayer(batch_normalize=True, filters=start_filters * 2, size=3, stride=1, pad=1, activation=activation)]
+        if not no_residual:
+            layers.append(SkipConnection(from_layer=-3, activation=Activations.LINEAR.value))
+    return layers
 
 def _get_downsample_conv2d(filters=128, size=3, stride=2, pad=1, activation=Activations.LEAKY_RELU.value):
     """downsample"""
@@ -45,62 +45,98 @@ def _get_downsample_conv2d(filters=128, size=3, stride=2, pad=1, activation=Acti
 
 
 
-def get_yolov3(num_classes=80, anchors=YOLO_ANCHORS, num_anchors=9):
-    """ 
-    returns YOLO v3 Network Architecture 
+# residual repeats of the yolov3 backbone stages, from stride 2 to stride 32
+YOLOV3_REPEATS = (1, 2, 8, 8, 4)
+
+def _scale_depth(repeats:int, depth_multiple:float=1.0):
+    """ scales the number of repeats of a block, keeping at least one"""
+    return max(1, round(repeats * depth_multiple))
+
+def _scale_width(filters:int, width_multiple=1.0, divisor:int=8):
+    """
+    scales a filter count, rounding up to a multiple of divisor
+
+    width_multiple may be a NumPy array of candidate multipliers, giving an array of filter counts
+    that yolo_analysis can evaluate for all candidates at once.
+    """
+    scaled = -(-(filters * width_multiple) // divisor) * divisor
+    scaled = scaled + (divisor - scaled) * (scaled < divisor)
+    return scaled.astype('int64') if hasattr(scaled, 'astype') else int(scaled)
+
+def get_scaled_yolov3(num_classes=80, anchors=YOLO_ANCHORS, num_anchors=9, depth_multiple=1.0, width_multiple=1.0,
+                      repeats=YOLOV3_REPEATS):
+    """
+    returns a YOLO v3 Network Architecture scaled in depth and width
 
     params:
     - num_classes (int) - number of classes
     - anchors (list(int)) - List of anchors  [x_1,y_1,..x_2,y_2...x_n,y_n]
     - num_anchors (int) - number of anchors
+    - depth_multiple (float) - scales the residual repeats of every backbone stage
+    - width_multiple (float) - scales every filter count except the ones feeding the YOLO layers
+    - repeats (tuple(int)) - residual repeats of the five backbone stages before scaling
     """
-    layers = []
+    stage_repeats = [_scale_depth(stage, depth_multiple) for stage in repeats]
+    # downsampling layers output twice the scaled width of the next stage, so shortcuts line up
+    width = lambda filters: _scale_width(filters, width_multiple)
+    builder = NetworkBuilder()
 
-    layers = _get_first_conv2d_block(start_filters=32)
-    layers += _get_mid_conv2d_block(start_filters=32, repeats=1)
-    layers += _get_downsample_conv2d(filters=128, size=3, stride=2)
+    builder.extend(_get_first_conv2d_block(start_filters=width(32)))
+    builder.extend(_get_mid_conv2d_block(start_filters=width(32), repeats=stage_repeats[0]))
+    builder.extend(_get_downsample_conv2d(filters=2 * width(64), size=3, stride=2))
 
-    layers += _get_mid_conv2d_block(start_filters=64, repeats=2)
-    layers += _get_downsample_conv2d(filters=256, size=3, stride=2)
+    builder.extend(_get_mid_conv2d_block(start_filters=width(64), repeats=stage_repeats[1]))
+    builder.extend(_get_downsample_conv2d(filters=2 * width(128), size=3, stride=2))
 
-    layers += _get_mid_conv2d_block(start_filters=128, repeats=8)
-    layers += _get_downsample_conv2d(filters=512, size=3, stride=2)
+    builder.extend(_get_mid_conv2d_block(start_filters=width(128), repeats=stage_repeats[2]), name='backbone_stride_8')
+    builder.extend(_get_downsample_conv2d(filters=2 * width(256), size=3, stride=2))
 
-    layers += _get_mid_conv2d_block(start_filters=256, repeats=8)
-    layers += _get_downsample_conv2d(filters=1024, size=3, stride=2)
+    builder.extend(_get_mid_conv2d_block(start_filters=width(256), repeats=stage_repeats[3]), name='backbone_stride_16')
+    builder.extend(_get_downsample_conv2d(filters=2 * width(512), size=3, stride=2))
 
-    layers += _get_mid_conv2d_block(start_filters=512, repeats=4)
+    builder.extend(_get_mid_conv2d_block(start_filters=width(512), repeats=stage_repeats[4]))
     
 
     # YOLO Layer - First Resolution
-    layers += _get_mid_conv2d_block(start_filters=512, repeats=3, no_residual=True)
-    layers += [ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
-                                size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False)]
-    layers += [YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[6,7,8])]
-
-    layers += [RouteConnection(layers=[-4]),
-               ConvolutionLayer(filters=256, size=1, stride=1, pad=1, activation=Activations.LEAKY_RELU.value),
-               UpsampleLayer(stride=2),
-               RouteConnection(layers=[-1, 61])]
+    builder.extend(_get_mid_conv2d_block(start_filters=width(512), repeats=3, no_residual=True))
+    builder.add(ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
+                                 size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False))
+    builder.add(YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[6,7,8]))
+
+    builder.extend([RouteConnection(layers=[-4]),
+                    ConvolutionLayer(filters=width(256), size=1, stride=1, pad=1, activation=Activations.LEAKY_RELU.value),
+                    UpsampleLayer(stride=2),
+                    RouteConnection(layers=[-1, 'backbone_stride_16'])])
     
     # YOLO Layer - Second Resolution
-    layers += _get_mid_conv2d_block(start_filters=256, repeats=3, no_residual=True)
-    layers += [ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
-                                size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False)]
-    layers += [YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[3,4,5])]
+    builder.extend(_get_mid_conv2d_block(start_filters=width(256), repeats=3, no_residual=True))
+    builder.add(ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
+                                 size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False))
+    builder.add(YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[3,4,5]))
 
-    layers += [RouteConnection(layers=[-4]),
-               ConvolutionLayer(filters=128, size=1, stride=1, pad=1, activation=Activations.LEAKY_RELU.value),
-               UpsampleLayer(stride=2),
-               RouteConnection(layers=[-1, 36])]
+    builder.extend([RouteConnection(layers=[-4]),
+                    ConvolutionLayer(filters=width(128), size=1, stride=1, pad=1, activation=Activations.LEAKY_RELU.value),
+                    UpsampleLayer(stride=2),
+                    RouteConnection(layers=[-1, 'backbone_stride_8'])])
 
     # YOLO Layer - Third Resolution
-    layers += _get_mid_conv2d_block(start_filters=128, repeats=3, no_residual=True)
-    layers += [ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
-                                size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False)]
-    layers += [YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[0,1,2])]
+    builder.extend(_get_mid_conv2d_block(start_filters=width(128), repeats=3, no_residual=True))
+    builder.add(ConvolutionLayer(filters=get_pre_yolo3d_filters_count(num_classes=num_classes, num_anchors=num_anchors),
+                                 size=1, stride=1, pad=1, activation=Activations.LINEAR.value, batch_normalize=False))
+    builder.add(YOLOLayer(anchors=anchors, num_classes=num_classes, masks=[0,1,2]))
     
-    return layers
+    return builder.build(validate=False)
+
+def get_yolov3(num_classes=80, anchors=YOLO_ANCHORS, num_anchors=9):
+    """ 
+    returns YOLO v3 Network Architecture 
+
+    params:
+    - num_classes (int) - number of classes
+    - anchors (list(int)) - List of anchors  [x_1,y_1,..x_2,y_2...x_n,y_n]
+    - num_anchors (int) - number of anchors
+    """
+    return get_scaled_yolov3(num_classes=num_classes, anchors=anchors, num_anchors=num_anchors)
 
 
 def get_alexnet(num_classes=80):
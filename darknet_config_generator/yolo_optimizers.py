@@ -10,29 +10,32 @@ from darknet_config_generator.common import *
 
 
 """ Learning Rate Decay Policies """
-class ScheduledLRDecay:
+class ScheduledLRDecay(Descriptor):
     """
     Learning rate decay policy
     """
-    def __init__(self, lr_decay_schedule={400000:0.1, 450000:0.1}):
-        self.__HEADER__= '# LR Policy'
+    __HEADER__ = '# LR Policy'
+
+    def __init__(self, lr_decay_schedule:dict=None):
         self.policy = LearningRateDecayPolicy.SCHEDULED
-        self.lr_decay_schedule = lr_decay_schedule
+        self.lr_decay_schedule = {400000:0.1, 450000:0.1} if lr_decay_schedule is None else dict(lr_decay_schedule)
 
-    def export(self, file_obj):
-        """ exports learning rate decay policy """
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'policy={self.policy}{NL}')
-        file_obj.write(f'steps={list_to_str(self.lr_decay_schedule.keys())}{NL}')
-        file_obj.write(f'scales={list_to_str(self.lr_decay_schedule.values())}{NL}')
+    def render(self):
+        """ renders learning rate decay policy as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'policy={self.policy}{NL}'
+                f'steps={list_to_str(self.lr_decay_schedule.keys())}{NL}'
+                f'scales={list_to_str(self.lr_decay_schedule.values())}{NL}')
 
 """Network Optimization """
-class YOLOOptimizer:
+class YOLOOptimizer(Descriptor):
+    __HEADER__ = '# Optimization Parameters'
+
     def __init__(self, learning_rate:float=0.001, batch_size=64, subdivisions=64, num_gpus:int=2,
                      policy=LearningRateDecayPolicy.SCHEDULED, momentum=0.9, lr_decay=0.0005,
-                     lr_decay_schedule={400000:0.1, 450000:0.1}, burn_in:int=1000, batches_per_class=2000, num_classes=80):
-        self.__HEADER__= '# Optimization Parameters'
+                     lr_decay_schedule:dict=None, burn_in:int=1000, batches_per_class=2000, num_classes=80,
+                     power:float=4):
         self.batch = batch_size
         self.subdivisions = subdivisions
         self.num_gpus = num_gpus
@@ -42,20 +45,27 @@ class YOLOOptimizer:
         self.learning_rate = learning_rate
         self.lr_decay = lr_decay
         self.momentum = momentum
-        self.lr_decay_schedule = lr_decay_schedule
+        self.lr_decay_schedule = {400000:0.1, 450000:0.1} if lr_decay_schedule is None else dict(lr_decay_schedule)
+        # exponent of the burn_in warmup and of the poly policy (darknet's default is 4)
+        self.power = power
    
-    def export(self, file_obj):
-        """exports the optimizer to the given file object"""
-        file_obj.write(f'{NL}')
-        file_obj.write(f'{self.__HEADER__}{NL}')
-        file_obj.write(f'batch={self.batch}{NL}')
-        file_obj.write(f'subdivisions={self.subdivisions}{NL}')
-        file_obj.write(f'decay={self.lr_decay}{NL}')
-        file_obj.write(f'learning_rate={self.learning_rate}{NL}')
-        file_obj.write(f'momentum={self.momentum}{NL}')
-        file_obj.write(f'burn_in={self.burn_in}{NL}')
-        file_obj.write(f'max_batches={self.max_batches}{NL}')
-        file_obj.write(f'policy={self.policy}{NL}')
-        file_obj.write(f'steps={list_to_str(self.lr_decay_schedule.keys())}{NL}')
-        file_obj.write(f'scales={list_to_str(self.lr_decay_schedule.values())}{NL}')
-        file_obj.write(NL)
\ No newline at end of file
+    def _renders_power(self):
+        """ power is written for the poly policy and whenever darknet's default of 4 would change the burn_in warmup"""
+        return self.policy == LearningRateDecayPolicy.POLY or self.power != 4
+
+    def render(self):
+        """renders the optimizer as a config section"""
+        return (f'{NL}'
+                f'{self.__HEADER__}{NL}'
+                f'batch={self.batch}{NL}'
+                f'subdivisions={self.subdivisions}{NL}'
+                f'decay={self.lr_decay}{NL}'
+                f'learning_rate={self.learning_rate}{NL}'
+                f'momentum={self.momentum}{NL}'
+                f'burn_in={self.burn_in}{NL}'
+                f'max_batches={self.max_batches}{NL}'
+                f'policy={self.policy}{NL}'
+                + (f'power={self.power}{NL}' if self._renders_power() else '') +
+                f'steps={list_to_str(self.lr_decay_schedule.keys())}{NL}'
+                f'scales={list_to_str(self.lr_decay_schedule.values())}{NL}'
+                f'{NL}')
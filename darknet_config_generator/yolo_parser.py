@@ -0,0 +1,333 @@
+"""
+Darknet Config Parser
+
+Reads darknet network configuration files back into network descriptors. Configurations
+written by YOLONetwork.generate_config round-trip byte-for-byte through the parser.
+
+@author: Abdullahi S. Adamu
+"""
+import mmap
+import re
+from collections import namedtuple
+from collections.abc import Sequence
+
+from darknet_config_generator.common import NL
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_layers import *
+from darknet_config_generator.yolo_metrics import Loss
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+
+NET_HEADERS = ('[net]', '[network]')
+
+# matches the header line of every section, e.g. '[convolutional]'
+_HEADER_PATTERN = re.compile(rb'^[ \t]*(\[[^\]\r\n]*\])', re.MULTILINE)
+
+# index is the position of the section in the file, counting [net]; byte offsets are in DarknetConfig.offsets
+Section = namedtuple('Section', ['header', 'options', 'index'])
+
+
+class UnparsedSection(Layer):
+    """
+    Section without a matching descriptor
+
+    Keeps the options of sections the generator has no descriptor for so they can be written back out.
+    """
+    __slots__ = ('__HEADER__', 'options')
+
+    def __init__(self, header:str, options:dict):
+        self.__HEADER__ = header
+        self.options = options
+
+    def render(self):
+        """ renders the section with its options in their original order"""
+        options = ''.join(f'{key}={value}{NL}' for key, value in self.options.items())
+        return f'{NL}{self.__HEADER__}{NL}{options}{NL}'
+
+
+""" Option Parsing """
+def _parse_value(value:str):
+    """ converts an option value to int or float where possible"""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def _parse_list(value:str):
+    """ converts a comma seperated option value to a list"""
+    return [_parse_value(item.strip()) for item in value.split(',') if item.strip()]
+
+def _parse_options(lines):
+    """ parses key=value lines of a section, skipping blank lines and comments"""
+    options = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        key, _, value = line.partition('=')
+        options[key.strip()] = value.strip()
+    return options
+
+
+""" Section Builders """
+def _build_convolutional(options):
+    return ConvolutionLayer(size=_parse_value(options.get('size', '1')),
+                            filters=_parse_value(options.get('filters', '1')),
+                            stride=_parse_value(options.get('stride', '1')),
+                            pad=_parse_value(options.get('pad', '0')),
+                            activation=options.get('activation', 'logistic'),
+                            batch_normalize=bool(_parse_value(options.get('batch_normalize', '0'))))
+
+def _build_maxpool(options):
+    size = _parse_value(options.get('size', '1'))
+    return MaxPoolingLayer(size=size,
+                           stride=_parse_value(options.get('stride', '1')),
+                           padding=_parse_value(options.get('padding', str(size - 1))))
+
+def _build_connected(options):
+    return FullyConnectedLayer(size=_parse_value(options.get('output', '1')),
+                               activation=options.get('activation', 'logistic'))
+
+def _build_dropout(options):
+    return DropOutLayer(dropout_prob=_parse_value(options.get('probability', '0.5')))
+
+def _build_softmax(options):
+    return SoftmaxLayer(groups=_parse_value(options.get('groups', '1')))
+
+def _build_upsample(options):
+    return UpsampleLayer(stride=_parse_value(options.get('stride', '2')))
+
+def _build_yolo(options):
+    anchors = _parse_list(options.get('anchors', ''))
+    layer = YOLOLayer(anchors=anchors,
+                      num_classes=_parse_value(options.get('classes', '20')),
+                      jitter=_parse_value(options.get('jitter', '0.2')),
+                      masks=_parse_list(options.get('mask', '')),
+                      ignore_thresh=_parse_value(options.get('ignore_thresh', '0.5')),
+                      truth_thresh=_parse_value(options.get('truth_thresh', '1')),
+                      random=_parse_value(options.get('random', '0')))
+    if 'num' in options:
+        layer.num_anchors = _parse_value(options['num'])
+    return layer
+
+def _build_route(options):
+    return RouteConnection(layers=_parse_list(options.get('layers', '')))
+
+def _build_shortcut(options):
+    return SkipConnection(from_layer=_parse_value(options.get('from', '-1')),
+                          activation=options.get('activation', 'linear'))
+
+def _build_cost(options):
+    return Loss(loss_type=options.get('type', 'sse'))
+
+SECTION_BUILDERS = {
+    '[convolutional]': _build_convolutional,
+    '[conv]': _build_convolutional,
+    '[maxpool]': _build_maxpool,
+    '[max]': _build_maxpool,
+    '[connected]': _build_connected,
+    '[conn]': _build_connected,
+    '[dropout]': _build_dropout,
+    '[softmax]': _build_softmax,
+    '[soft]': _build_softmax,
+    '[upsample]': _build_upsample,
+    '[yolo]': _build_yolo,
+    '[route]': _build_route,
+    '[shortcut]': _build_shortcut,
+    '[cost]': _build_cost,
+}
+
+def build_layer(header:str, options:dict):
+    """ builds the layer descriptor for a parsed section"""
+    builder = SECTION_BUILDERS.get(header)
+    if builder is None:
+        return UnparsedSection(header, options)
+    return builder(options)
+
+def build_network(options:dict, layers=None):
+    """
+    builds a YOLONetwork from the options of the [net] section
+
+    Only options known to YOLONetwork, YOLOOptimizer and YOLOImageAugmentation are retained.
+    """
+    input_dim = (_parse_value(options.get('width', '416')),
+                 _parse_value(options.get('height', '416')),
+                 _parse_value(options.get('channels', '3')))
+
+    optimizer = None
+    if 'batch' in options:
+        steps = _parse_list(options.get('steps', ''))
+        scales = _parse_list(options.get('scales', ''))
+        optimizer = YOLOOptimizer(learning_rate=_parse_value(options.get('learning_rate', '0.001')),
+                                  batch_size=_parse_value(options['batch']),
+                                  subdivisions=_parse_value(options.get('subdivisions', '1')),
+                                  num_gpus=1,
+                                  policy=options.get('policy', 'constant'),
+                                  momentum=_parse_value(options.get('momentum', '0.9')),
+                                  lr_decay=_parse_value(options.get('decay', '0.0001')),
+                                  lr_decay_schedule=dict(zip(steps, scales)),
+                                  burn_in=_parse_value(options.get('burn_in', '0')),
+                                  batches_per_class=_parse_value(options.get('max_batches', '0')),
+                                  num_classes=1,
+                                  power=_parse_value(options.get('power', '4')))
+
+    image_augmentation = None
+    if 'hue' in options:
+        image_augmentation = YOLOImageAugmentation(hue=_parse_value(options['hue']),
+                                                   saturation=_parse_value(options.get('saturation', '1')),
+                                                   exposure=_parse_value(options.get('exposure', '1')),
+                                                   angle=_parse_value(options.get('angle', '0')))
+
+    return YOLONetwork(input_dim=input_dim, image_augmentation=image_augmentation,
+                       optimizer=optimizer, layers=[] if layers is None else layers)
+
+
+""" Streaming """
+def iter_sections(lines):
+    """
+    parses sections from an iterable of lines in a single pass
+
+    params:
+    - lines - any iterable of str lines, e.g. an open text file or sys.stdin
+
+    yields:
+    - Section(header, options, index)
+    """
+    header, body, index = None, [], 0
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('['):
+            if header is not None:
+                yield Section(header, _parse_options(body), index)
+                index += 1
+            header, body = stripped, []
+        elif header is not None:
+            body.append(line)
+    if header is not None:
+        yield Section(header, _parse_options(body), index)
+
+def iter_layers(lines):
+    """ yields layer descriptors from an iterable of lines, skipping the [net] section"""
+    for section in iter_sections(lines):
+        if section.header not in NET_HEADERS:
+            yield build_layer(section.header, section.options)
+
+
+""" Indexed Access """
+class DarknetConfig:
+    """
+    Indexed darknet configuration file
+
+    The file is memory-mapped and scanned once for section headers. Sections are parsed and
+    layers built only when accessed, so random access to layer N does not re-scan the file.
+
+    usage:
+        with DarknetConfig('yolov3.cfg') as config:
+            network = config.to_network()
+            conv = config.layer(10)
+    """
+    def __init__(self, path):
+        self.path = path
+        self._buffer = b''
+        with open(path, 'rb') as file_obj:
+            try:
+                self._buffer = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files cannot be memory-mapped
+                pass
+
+        self.headers = []
+        self.offsets = []
+        for match in _HEADER_PATTERN.finditer(self._buffer):
+            self.headers.append(match.group(1).decode('utf-8'))
+            self.offsets.append(match.start())
+        self.offsets.append(len(self._buffer))
+
+        self._net_index = next((i for i, header in enumerate(self.headers) if header in NET_HEADERS), None)
+        self._layer_sections = [i for i, header in enumerate(self.headers) if header not in NET_HEADERS]
+        self._layers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ releases the memory map"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b''
+
+    def __len__(self):
+        return len(self.headers)
+
+    def section(self, index:int):
+        """ parses the section at the given index"""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        lines = self._buffer[start:end].decode('utf-8').splitlines()
+        return Section(self.headers[index], _parse_options(lines[1:]), index)
+
+    def iter_sections(self):
+        """ yields every section in file order"""
+        for index in range(len(self.headers)):
+            yield self.section(index)
+
+    @property
+    def num_layers(self):
+        """ number of layer sections, excluding [net]"""
+        return len(self._layer_sections)
+
+    def layer(self, index:int):
+        """ returns the layer descriptor of the N-th layer section, building it on first access"""
+        layer = self._layers.get(index)
+        if layer is None:
+            section = self.section(self._layer_sections[index])
+            layer = self._layers[index] = build_layer(section.header, section.options)
+        return layer
+
+    def to_network(self):
+        """ returns a YOLONetwork whose layers are built lazily from this file"""
+        options = {} if self._net_index is None else self.section(self._net_index).options
+        return build_network(options, layers=LazyLayerList(self))
+
+
+class LazyLayerList(Sequence):
+    """ Sequence of layer descriptors built on demand from a DarknetConfig"""
+    def __init__(self, config:DarknetConfig):
+        self.config = config
+
+    def __len__(self):
+        return self.config.num_layers
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.config.layer(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('layer index out of range')
+        return self.config.layer(index)
+
+
+def load_config(path):
+    """
+    loads a darknet configuration file into a YOLONetwork
+
+    The file is read in one pass and all layers are built eagerly, so no file handle is kept open.
+    """
+    with open(path, 'r') as file_obj:
+        sections = iter_sections(file_obj)
+        net_options = {}
+        layers = []
+        for section in sections:
+            if section.header in NET_HEADERS:
+                net_options = section.options
+            else:
+                layers.append(build_layer(section.header, section.options))
+    return build_network(net_options, layers=layers)
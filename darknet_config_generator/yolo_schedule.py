@@ -0,0 +1,208 @@
+"""
+Learning Rate Schedule Simulator
+
+Computes the learning rate darknet uses at every iteration of a training run, following
+get_current_rate() in darknet's network.c:
+
+- during burn_in: learning_rate * (iteration / burn_in) ** power
+- steps: learning_rate times the product of the scales of the steps already passed; darknet walks
+  the steps in file order and stops at the first one not yet reached, so a step listed after a
+  larger one only applies once that larger one is passed
+- poly: learning_rate * (1 - iteration / max_batches) ** power
+- constant: learning_rate
+
+Many candidate schedules are simulated in one batched call, as rows of a float32 array.
+
+usage:
+    lr = simulate(yolo_optimizer)              # shape (max_batches,)
+    print(validate_schedule(yolo_optimizer))
+    print(summarize(yolo_optimizer))
+
+@author: Abdullahi S. Adamu
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from darknet_config_generator.common import LearningRateDecayPolicy
+
+CONSTANT = 'constant'
+POLICIES = (LearningRateDecayPolicy.SCHEDULED, LearningRateDecayPolicy.POLY, CONSTANT)
+
+Schedule = namedtuple('Schedule', ['learning_rate', 'max_batches', 'burn_in', 'policy', 'steps', 'scales', 'power'])
+
+
+def as_schedule(source, **overrides):
+    """
+    returns the Schedule of a YOLOOptimizer, ScheduledLRDecay or Schedule
+
+    ScheduledLRDecay only holds the policy and steps, so learning_rate and max_batches must be
+    given as overrides.
+
+    raises:
+    - ValueError if a field is missing or the policy is not supported
+    """
+    if isinstance(source, Schedule):
+        return source._replace(**overrides)
+    schedule = getattr(source, 'lr_decay_schedule', None) or {}
+    fields = {'learning_rate': getattr(source, 'learning_rate', None),
+              'max_batches': getattr(source, 'max_batches', None),
+              'burn_in': getattr(source, 'burn_in', 0),
+              'policy': getattr(source, 'policy', CONSTANT),
+              'steps': tuple(schedule.keys()),
+              'scales': tuple(schedule.values()),
+              'power': getattr(source, 'power', 4)}
+    fields.update(overrides)
+    missing = [name for name, value in fields.items() if value is None]
+    if missing:
+        raise ValueError(f'schedule of {type(source).__name__} is missing {missing}')
+    if fields['policy'] not in POLICIES:
+        raise ValueError(f'unsupported learning rate policy {fields["policy"]!r}, expected one of {POLICIES}')
+    if len(fields['steps']) != len(fields['scales']):
+        raise ValueError(f'{len(fields["steps"])} steps but {len(fields["scales"])} scales')
+    fields['steps'], fields['scales'] = tuple(fields['steps']), tuple(fields['scales'])
+    return Schedule(**fields)
+
+
+def simulate_many(sources, max_batches:int=None):
+    """
+    learning rate of every iteration of many schedules in one vectorized pass
+
+    params:
+    - sources - YOLOOptimizers, ScheduledLRDecays with learning_rate/max_batches set, or Schedules
+    - max_batches (int) - number of columns; defaults to the longest schedule
+
+    returns:
+    - float32 array of shape (len(sources), max_batches); iterations past a schedule's own
+      max_batches are nan
+    """
+    schedules = [as_schedule(source) for source in sources]
+    count = len(schedules)
+    if max_batches is None:
+        max_batches = max((int(schedule.max_batches) for schedule in schedules), default=0)
+    iterations = np.arange(max_batches, dtype=np.float64)
+    lr = np.empty((count, max_batches), dtype=np.float32)
+    if not count or not max_batches:
+        return lr
+
+    base = np.array([schedule.learning_rate for schedule in schedules], dtype=np.float32)[:, None]
+    total = np.array([schedule.max_batches for schedule in schedules], dtype=np.float64)[:, None]
+    burn_in = np.array([schedule.burn_in for schedule in schedules], dtype=np.float64)[:, None]
+    power = np.array([schedule.power for schedule in schedules], dtype=np.float64)[:, None]
+    policies = np.array([schedule.policy for schedule in schedules])[:, None]
+
+    # steps: number of scales applied = number of leading steps whose running maximum is passed.
+    # Rows are offset by max_batches + 1 so a single searchsorted covers all of them.
+    width = max(len(schedule.steps) for schedule in schedules)
+    steps = np.full((count, width), max_batches, dtype=np.float64)
+    scales = np.ones((count, width), dtype=np.float32)
+    for row, schedule in enumerate(schedules):
+        steps[row, :len(schedule.steps)] = schedule.steps
+        scales[row, :len(schedule.scales)] = schedule.scales
+    steps = np.clip(np.maximum.accumulate(steps, axis=1), 0, max_batches)
+    offsets = np.arange(count, dtype=np.float64)[:, None] * (max_batches + 1)
+    applied = np.searchsorted((steps + offsets).ravel(), (iterations + offsets).ravel(), side='right')
+    applied = applied.reshape(count, max_batches) - np.arange(count)[:, None] * width
+    # darknet multiplies the float rate by one scale at a time
+    factors = np.concatenate([np.ones((count, 1), dtype=np.float32), np.cumprod(scales, axis=1, dtype=np.float32)], axis=1)
+    lr[:] = base * np.take_along_axis(factors, applied, axis=1)
+
+    poly = policies == LearningRateDecayPolicy.POLY
+    if poly.any():
+        decay = np.power(np.clip(1 - iterations / total, 0, None), power)
+        lr[:] = np.where(poly, (base * decay).astype(np.float32), lr)
+    constant = policies == CONSTANT
+    if constant.any():
+        lr[:] = np.where(constant, base, lr)
+
+    warming = iterations < burn_in
+    if warming.any():
+        warmup = base * np.power(iterations / np.maximum(burn_in, 1), power)
+        lr[:] = np.where(warming, warmup.astype(np.float32), lr)
+    lr[iterations >= total] = np.nan
+    return lr
+
+
+def simulate(source, **overrides):
+    """ learning rate of every iteration up to max_batches, as a float32 array"""
+    schedule = as_schedule(source, **overrides)
+    return simulate_many([schedule])[0]
+
+
+def validate_schedule(source, **overrides):
+    """
+    checks a schedule for steps darknet would skip or never reach
+
+    returns:
+    - list of issues, empty when the schedule is fine
+    """
+    schedule = as_schedule(source, **overrides)
+    issues = []
+    if schedule.max_batches <= 0:
+        issues.append(f'max_batches={schedule.max_batches} leaves nothing to train')
+    if schedule.learning_rate <= 0:
+        issues.append(f'learning_rate={schedule.learning_rate} is not positive')
+    if schedule.burn_in >= schedule.max_batches > 0:
+        issues.append(f'burn_in={schedule.burn_in} covers the whole run of max_batches={schedule.max_batches}')
+    if schedule.policy != LearningRateDecayPolicy.SCHEDULED:
+        return issues
+
+    running = None
+    for index, (step, scale) in enumerate(zip(schedule.steps, schedule.scales)):
+        if running is not None and step < running:
+            issues.append(f'step {step} (#{index}) comes after step {running}; darknet only applies it from '
+                          f'iteration {running} on, sort the schedule by step')
+        elif running is not None and step == running:
+            issues.append(f'step {step} (#{index}) is repeated; its scales apply together')
+        if step >= schedule.max_batches:
+            issues.append(f'step {step} (#{index}) is never reached with max_batches={schedule.max_batches}')
+        elif step < 0:
+            issues.append(f'step {step} (#{index}) is negative')
+        elif step < schedule.burn_in:
+            issues.append(f'step {step} (#{index}) falls inside burn_in={schedule.burn_in}')
+        if scale <= 0:
+            issues.append(f'scale {scale} of step {step} (#{index}) is not positive')
+        running = step if running is None else max(running, step)
+    return issues
+
+
+def summarize(source, lr=None, **overrides):
+    """
+    compact, json serializable summary of a schedule
+
+    Phases are the burn_in warmup, then either one phase per constant step interval or a single
+    poly/constant phase.
+
+    params:
+    - lr (ndarray) - the simulated schedule, if already computed
+    """
+    schedule = as_schedule(source, **overrides)
+    if lr is None:
+        lr = simulate(schedule)
+    lr = lr[:schedule.max_batches]
+    bounds = [0]
+    if 0 < schedule.burn_in < schedule.max_batches:
+        bounds.append(int(schedule.burn_in))
+    if schedule.policy == LearningRateDecayPolicy.SCHEDULED:
+        running = 0
+        for step in schedule.steps:
+            running = max(running, step)
+            if bounds[-1] < running < schedule.max_batches:
+                bounds.append(int(running))
+    bounds.append(int(schedule.max_batches))
+
+    phases = []
+    for start, end in zip(bounds, bounds[1:]):
+        kind = 'burn_in' if start == 0 and end == schedule.burn_in else schedule.policy
+        phases.append({'start': start, 'end': end, 'kind': kind,
+                       'lr_start': float(lr[start]), 'lr_end': float(lr[end - 1])})
+    return {
+        'policy': schedule.policy,
+        'learning_rate': schedule.learning_rate,
+        'max_batches': int(schedule.max_batches),
+        'burn_in': int(schedule.burn_in),
+        'final_lr': float(lr[-1]) if len(lr) else None,
+        'mean_lr': float(lr.mean(dtype=np.float64)) if len(lr) else None,
+        'phases': phases,
+        'issues': validate_schedule(schedule),
+    }
@@ -0,0 +1,267 @@
+"""
+Architecture Search
+
+Evolutionary search over the depth multiplier, width multiplier and input resolution of
+get_scaled_yolov3 under a BFLOPs and/or parameter budget.
+
+- costs come from a static model: candidates sharing the same backbone depth are evaluated together
+  by one yolo_analysis pass over a layer list whose filter counts are arrays, one entry per candidate
+- accuracy is estimated by a score function, by default proxy_score, a compound scaling prior with
+  diminishing returns in depth, width and resolution; pass a better predictor when one is available
+- every generation, offspring are bred from the best candidates and evaluated in chunks on a
+  process pool
+- the result is the Pareto front of score against BFLOPs and params, which write_front() emits as
+  cfgs plus a front.json index
+
+usage: python -m darknet_config_generator.yolo_search --max-bflops 20 --num-classes 3 --out-dir front
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from darknet_config_generator.common import YOLO_ANCHORS
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import YOLOV3_REPEATS, _scale_depth, get_scaled_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+
+Candidate = collections.namedtuple('Candidate', ['depth_multiple', 'width_multiple', 'resolution'])
+Evaluation = collections.namedtuple('Evaluation', ['candidate', 'score', 'params', 'bflops'])
+SearchSpace = collections.namedtuple('SearchSpace', ['depth', 'width', 'resolution', 'step'])
+SearchResult = collections.namedtuple('SearchResult', ['evaluations', 'front', 'seconds'])
+
+# resolutions are multiples of the network stride
+STRIDE = 32
+DEFAULT_SPACE = SearchSpace(depth=(0.2, 1.35), width=(0.1, 1.25), resolution=(224, 640), step=0.05)
+
+
+def proxy_score(candidate):
+    """
+    heuristic accuracy proxy of a candidate
+
+    Grows with the log of the number of residual blocks, the width and the resolution, the way
+    accuracy does in compound scaling, so doubling any of them pays off less and less.
+    """
+    blocks = sum(_scale_depth(repeats, candidate.depth_multiple) for repeats in YOLOV3_REPEATS)
+    return (0.4 * math.log2(blocks) + 0.35 * math.log2(candidate.width_multiple * 32)
+            + 0.25 * math.log2(candidate.resolution))
+
+
+""" Candidates """
+def _quantize(value:float, bounds:tuple, step:float):
+    return round(min(max(value, bounds[0]), bounds[1]) / step) * step
+
+def make_candidate(depth_multiple:float, width_multiple:float, resolution:int, space:SearchSpace=DEFAULT_SPACE):
+    """ returns a Candidate clipped to the search space and snapped to its grid"""
+    resolution = min(max(int(round(resolution / STRIDE)) * STRIDE, space.resolution[0]), space.resolution[1])
+    return Candidate(round(_quantize(depth_multiple, space.depth, space.step), 4),
+                     round(_quantize(width_multiple, space.width, space.step), 4), resolution)
+
+def random_candidate(rng:random.Random, space:SearchSpace=DEFAULT_SPACE):
+    """ draws a uniformly random candidate"""
+    return make_candidate(rng.uniform(*space.depth), rng.uniform(*space.width), rng.uniform(*space.resolution), space)
+
+def breed(parents:list, rng:random.Random, space:SearchSpace=DEFAULT_SPACE, mutation:float=0.15,
+          immigration:float=0.1):
+    """ returns a child of two random parents: uniform crossover plus gaussian mutation"""
+    if not parents or rng.random() < immigration:
+        return random_candidate(rng, space)
+    first, second = rng.choice(parents), rng.choice(parents)
+    genes = [rng.choice(pair) for pair in zip(first, second)]
+    return make_candidate(genes[0] * math.exp(rng.gauss(0, mutation)),
+                          genes[1] * math.exp(rng.gauss(0, mutation)),
+                          genes[2] + rng.choice((-STRIDE, 0, 0, STRIDE)), space)
+
+
+""" Static Cost Model """
+def evaluate(candidates:list, num_classes:int=80, anchors=YOLO_ANCHORS, num_anchors:int=9, score=proxy_score):
+    """
+    computes the score, params and BFLOPs of candidates
+
+    Candidates with the same backbone repeats are evaluated in one vectorized analysis.
+
+    returns:
+    - list of Evaluation in the order of candidates
+    """
+    groups = collections.defaultdict(list)
+    for index, candidate in enumerate(candidates):
+        groups[tuple(_scale_depth(repeats, candidate.depth_multiple) for repeats in YOLOV3_REPEATS)].append(index)
+
+    evaluations = [None] * len(candidates)
+    for indices in groups.values():
+        members = [candidates[index] for index in indices]
+        widths = np.array([candidate.width_multiple for candidate in members])
+        layers = get_scaled_yolov3(num_classes=num_classes, anchors=anchors, num_anchors=num_anchors,
+                                   depth_multiple=members[0].depth_multiple, width_multiple=widths)
+        cost = analyze(layers, [(candidate.resolution, candidate.resolution, 3) for candidate in members])
+        for index, candidate, params, bflops in zip(indices, members, cost.total_params, cost.total_bflops):
+            evaluations[index] = Evaluation(candidate, score(candidate), int(params), float(bflops))
+    return evaluations
+
+
+def _violation(evaluation, max_bflops:float=None, max_params:int=None):
+    """ relative amount by which an evaluation exceeds the budget, 0 when within it"""
+    ratios = [0.0]
+    if max_bflops is not None:
+        ratios.append(evaluation.bflops / max_bflops - 1)
+    if max_params is not None:
+        ratios.append(evaluation.params / max_params - 1)
+    return max(ratios)
+
+def pareto_front(evaluations:list):
+    """
+    returns the evaluations no other evaluation beats in score, BFLOPs and params at once,
+    sorted by BFLOPs
+    """
+    if not evaluations:
+        return []
+    objectives = np.array([(-evaluation.score, evaluation.bflops, evaluation.params) for evaluation in evaluations])
+    front = []
+    for index, row in enumerate(objectives):
+        dominated = np.all(objectives <= row, axis=1) & np.any(objectives < row, axis=1)
+        if not dominated.any():
+            front.append(evaluations[index])
+    return sorted(front, key=lambda evaluation: evaluation.bflops)
+
+
+""" Search """
+_settings = None
+
+def _init_worker(settings:dict):
+    global _settings
+    _settings = settings
+
+def _breed_and_evaluate(parents:list, count:int, seed:int):
+    """ breeds count offspring in a worker and evaluates them"""
+    rng = random.Random(seed)
+    children = [breed(parents, rng, _settings['space']) for _ in range(count)]
+    return evaluate(children, _settings['num_classes'], _settings['anchors'], _settings['num_anchors'],
+                    _settings['score'])
+
+def search(max_bflops:float=None, max_params:int=None, num_classes:int=80, anchors=YOLO_ANCHORS, num_anchors:int=9,
+           space:SearchSpace=DEFAULT_SPACE, population:int=256, generations:int=10, parents:int=32,
+           workers:int=1, chunk_size:int=128, seed:int=0, score=proxy_score):
+    """
+    evolutionary search for the best scoring candidates within a budget
+
+    params:
+    - max_bflops (float), max_params (int) - budget; candidates exceeding it never reach the front
+    - population (int) - offspring evaluated per generation
+    - parents (int) - candidates offspring are bred from; the best feasible ones, then the ones
+      exceeding the budget the least
+    - workers (int) - worker processes, None uses every CPU; 1 runs in this process
+    - score - picklable function of a Candidate estimating its accuracy
+
+    returns:
+    - SearchResult(evaluations, front, seconds)
+    """
+    start = time.perf_counter()
+    settings = {'space': space, 'num_classes': num_classes, 'anchors': list(anchors), 'num_anchors': num_anchors,
+                'score': score}
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    evaluated = {}
+    selected = []
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings,))
+    else:
+        _init_worker(settings)
+    try:
+        for _ in range(generations):
+            counts = [min(chunk_size, population - offset) for offset in range(0, population, chunk_size)]
+            tasks = [(selected, count, rng.getrandbits(64)) for count in counts]
+            if executor is None:
+                results = [_breed_and_evaluate(*task) for task in tasks]
+            else:
+                results = list(executor.map(_breed_and_evaluate, *zip(*tasks)))
+            for evaluation in (evaluation for result in results for evaluation in result):
+                evaluated.setdefault(evaluation.candidate, evaluation)
+
+            ranked = sorted(evaluated.values(), key=lambda evaluation: (
+                _violation(evaluation, max_bflops, max_params), -evaluation.score))
+            selected = [evaluation.candidate for evaluation in ranked[:parents]]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    evaluations = list(evaluated.values())
+    feasible = [evaluation for evaluation in evaluations if _violation(evaluation, max_bflops, max_params) <= 0]
+    return SearchResult(evaluations, pareto_front(feasible), time.perf_counter() - start)
+
+
+""" Output """
+def candidate_name(candidate:Candidate):
+    return f'yolov3_d{candidate.depth_multiple:.2f}_w{candidate.width_multiple:.2f}_{candidate.resolution}'
+
+def write_front(front:list, output_dir:str, num_classes:int=80, anchors=YOLO_ANCHORS, num_anchors:int=9,
+                optimizer=None, image_augmentation=None):
+    """
+    generates a cfg per evaluation of the front and a front.json index
+
+    params:
+    - optimizer, image_augmentation - sections of every cfg, default YOLOOptimizer(num_classes=num_classes)
+      and YOLOImageAugmentation()
+
+    returns:
+    - list of generated cfg paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    optimizer = optimizer or YOLOOptimizer(num_classes=num_classes)
+    image_augmentation = image_augmentation or YOLOImageAugmentation()
+    paths, index = [], []
+    for evaluation in front:
+        candidate = evaluation.candidate
+        path = os.path.join(output_dir, f'{candidate_name(candidate)}.cfg')
+        layers = get_scaled_yolov3(num_classes=num_classes, anchors=list(anchors), num_anchors=num_anchors,
+                                   depth_multiple=candidate.depth_multiple, width_multiple=candidate.width_multiple)
+        YOLONetwork(input_dim=(candidate.resolution, candidate.resolution, 3), image_augmentation=image_augmentation,
+                    optimizer=optimizer, layers=layers).generate_config(path)
+        paths.append(path)
+        index.append({'cfg': os.path.basename(path), **candidate._asdict(), 'score': evaluation.score,
+                      'params': evaluation.params, 'bflops': evaluation.bflops})
+    with open(os.path.join(output_dir, 'front.json'), 'w') as file_obj:
+        json.dump(index, file_obj, indent=2)
+    return paths
+
+
+""" CLI """
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description='Search scaled yolov3 variants within a budget')
+    parser.add_argument('--max-bflops', type=float, default=None)
+    parser.add_argument('--max-params', type=int, default=None)
+    parser.add_argument('--num-classes', type=int, default=80)
+    parser.add_argument('--population', type=int, default=256, help='candidates evaluated per generation')
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1, help='worker processes, 0 uses every CPU')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', required=True, help='directory of the Pareto front cfgs')
+    return parser
+
+def run(args):
+    if args.max_bflops is None and args.max_params is None:
+        raise ValueError('set --max-bflops and/or --max-params')
+    result = search(max_bflops=args.max_bflops, max_params=args.max_params, num_classes=args.num_classes,
+                    population=args.population, generations=args.generations, workers=args.workers or None,
+                    seed=args.seed)
+    paths = write_front(result.front, args.out_dir, num_classes=args.num_classes)
+    print(f'{len(result.evaluations)} candidates evaluated in {result.seconds:.2f}s, '
+          f'{len(paths)} on the Pareto front -> {args.out_dir}')
+
+def main(argv=None):
+    run(build_arg_parser().parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Config Generation Service
+
+asyncio HTTP/1.1 server rendering network specifications (see yolo_spec) into darknet configs,
+over TCP or a Unix socket.
+
+- POST /render with a JSON specification returns the cfg as text/plain; the X-Cache header tells
+  whether it was rendered (miss), shared with an identical request in flight (coalesced) or served
+  from the in-memory LRU (hit), and ETag carries the digest of the canonical specification
+- GET /stats returns the service counters as JSON, GET /health returns {"status": "ok"}
+- rendering runs on a bounded thread or process pool; requests beyond max_pending renders are
+  rejected with 503 instead of queueing without bound
+- connections are kept alive unless the client sends Connection: close
+
+usage: python -m darknet_config_generator.yolo_service --port 8080 [--unix /tmp/darknet.sock] [--executor process]
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os
+
+from darknet_config_generator.yolo_spec import render_spec
+
+MAX_BODY = 1 << 20
+MAX_HEADERS = 64
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status:int, message:str):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceStats:
+    """ Service Counters"""
+    FIELDS = ('requests', 'hits', 'coalesced', 'renders', 'errors', 'rejected')
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+def spec_digest(spec:dict):
+    """ digest of the canonical JSON of a specification"""
+    canonical = json.dumps(spec, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+class ConfigService:
+    """
+    Config Service
+
+    params:
+    - workers (int) - render workers, defaults to the number of CPUs
+    - executor (str) - 'thread' or 'process'; processes render in parallel, threads start faster
+    - cache_entries (int), cache_bytes (int) - bounds of the LRU of rendered configs
+    - max_pending (int) - renders queued or running at once before requests are rejected
+    """
+    def __init__(self, workers:int=None, executor:str='thread', cache_entries:int=1024, cache_bytes:int=64 << 20,
+                 max_pending:int=256):
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"executor must be 'thread' or 'process', not {executor!r}")
+        workers = workers or os.cpu_count() or 1
+        self.executor = (ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor)(max_workers=workers)
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+        self.max_pending = max_pending
+        self.stats = ServiceStats()
+        self._cache = collections.OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight = {}
+
+    def close(self):
+        # cancelled renders that have not started are skipped by the executor
+        for future in self._in_flight.values():
+            future.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _remember(self, digest:str, data:bytes):
+        self._cache[digest] = data
+        self._cached_bytes += len(data)
+        while self._cache and (len(self._cache) > self.cache_entries or self._cached_bytes > self.cache_bytes):
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    async def _result(self, future):
+        """ waits for a render shared by several requests, reporting invalid specifications to each of them"""
+        try:
+            return await asyncio.shield(future)
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            raise HTTPError(400, f'invalid specification: {error}') from error
+
+    async def render(self, spec:dict):
+        """
+        renders a specification, sharing identical in-flight renders and caching results
+
+        returns:
+        - (digest, cfg bytes, 'hit' | 'coalesced' | 'miss')
+
+        raises:
+        - HTTPError 400 if the specification is invalid, 503 if too many renders are pending
+        """
+        if not isinstance(spec, dict):
+            raise HTTPError(400, 'the request body must be a JSON object')
+        digest = spec_digest(spec)
+        data = self._cache.get(digest)
+        if data is not None:
+            self._cache.move_to_end(digest)
+            self.stats.hits += 1
+            return digest, data, 'hit'
+
+        future = self._in_flight.get(digest)
+        if future is not None:
+            self.stats.coalesced += 1
+            return digest, await self._result(future), 'coalesced'
+        if len(self._in_flight) >= self.max_pending:
+            self.stats.rejected += 1
+            raise HTTPError(503, f'{len(self._in_flight)} renders pending, retry later')
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, render_spec, spec)
+        self._in_flight[digest] = future
+        try:
+            data = await self._result(future)
+        finally:
+            del self._in_flight[digest]
+        self.stats.renders += 1
+        self._remember(digest, data)
+        return digest, data, 'miss'
+
+    async def _read_request(self, reader):
+        """ returns (method, path, headers, body), or None when the client closed the connection"""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'malformed request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, 'too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, f'invalid Content-Length {headers["content-length"]!r}')
+        if length > MAX_BODY:
+            raise HTTPError(413, f'request bodies are limited to {MAX_BODY} bytes')
+        body = await reader.readexactly(length) if length else b''
+        if version == 'HTTP/1.0' and headers.get('connection', '').lower() != 'keep-alive':
+            headers['connection'] = 'close'
+        return method, path, headers, body
+
+    async def _dispatch(self, method:str, path:str, body:bytes):
+        """ returns (status, content type, body, extra headers)"""
+        path = path.split('?', 1)[0]
+        if path == '/render':
+            if method != 'POST':
+                raise HTTPError(405, 'use POST /render')
+            try:
+                spec = json.loads(body or b'null')
+            except ValueError as error:
+                raise HTTPError(400, f'invalid JSON: {error}')
+            digest, data, source = await self.render(spec)
+            return 200, 'text/plain; charset=utf-8', data, {'X-Cache': source, 'ETag': f'"{digest}"'}
+        if path == '/stats' and method == 'GET':
+            stats = {**self.stats.as_dict(), 'cached': len(self._cache), 'cached_bytes': self._cached_bytes,
+                     'in_flight': len(self._in_flight)}
+            return 200, 'application/json', json.dumps(stats).encode('utf-8'), {}
+        if path == '/health' and method == 'GET':
+            return 200, 'application/json', b'{"status": "ok"}', {}
+        raise HTTPError(404, f'no such endpoint {method} {path}')
+
+    async def handle(self, reader, writer):
+        """ serves the requests of one connection"""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    self.stats.requests += 1
+                    status, content_type, data, extra = await self._dispatch(method, path, body)
+                except HTTPError as error:
+                    self.stats.errors += 1
+                    status, content_type, extra = error.status, 'application/json', {}
+                    data = json.dumps({'error': str(error)}).encode('utf-8')
+                except Exception as error:
+                    self.stats.errors += 1
+                    status, content_type, extra = 500, 'application/json', {}
+                    data = json.dumps({'error': f'{type(error).__name__}: {error}'}).encode('utf-8')
+
+                head = [f'HTTP/1.1 {status} {REASONS[status]}', f'Content-Type: {content_type}',
+                        f'Content-Length: {len(data)}', f'Connection: {"keep-alive" if keep_alive else "close"}']
+                head += [f'{name}: {value}' for name, value in extra.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host:str='127.0.0.1', port:int=8080, path:str=None):
+        """ starts serving on host:port, or on a Unix socket when path is set; returns the asyncio server"""
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host=host, port=port)
+
+
+async def serve(host:str='127.0.0.1', port:int=8080, path:str=None, **options):
+    """ runs a ConfigService until cancelled"""
+    service = ConfigService(**options)
+    server = await service.start(host, port, path)
+    addresses = path or ', '.join(f'{sock[0]}:{sock[1]}' for sock in (s.getsockname() for s in server.sockets))
+    print(f'serving on {addresses}', flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+""" CLI """
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description='Serve darknet config generation over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', default=None, help='serve on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--executor', choices=('thread', 'process'), default='thread')
+    parser.add_argument('--cache-entries', type=int, default=1024)
+    parser.add_argument('--max-pending', type=int, default=256)
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, executor=args.executor,
+                          cache_entries=args.cache_entries, max_pending=args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
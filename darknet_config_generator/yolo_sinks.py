@@ -0,0 +1,263 @@
+"""
+Output Sinks
+
+Streams configurations section by section into files, gzip or zstd streams, stdout, sockets or
+bounded queues, so even networks with hundreds of thousands of layers are never rendered into a
+single string.
+
+Sinks buffer writes up to buffer_size bytes before passing them on. Writes block while the
+destination is not ready (a full queue, a slow socket peer), which bounds the memory held by a
+producer that is faster than its consumer.
+
+usage:
+    with GzipSink('yolov3.cfg.gz') as sink:
+        stream_to(yolo_net, sink)
+
+    stream_to(yolo_net, StdoutSink())
+
+@author: Abdullahi S. Adamu
+"""
+import abc
+import gzip
+import os
+import queue
+import socket
+import sys
+
+from darknet_config_generator.common import _tmp_path
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class Sink(abc.ABC):
+    """
+    Base Sink
+
+    Subclasses must implement _write(data:bytes) and may override _close() and _abort().
+    Used as a context manager, a sink is closed on success and aborted if the block raises.
+    """
+    def __init__(self, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8'):
+        if buffer_size < 0:
+            raise ValueError(f'buffer_size must not be negative, got {buffer_size}')
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.bytes_written = 0
+        self.closed = False
+        self._buffer = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data):
+        """ writes a str or bytes, passing buffered data on once buffer_size is reached"""
+        if self.closed:
+            raise ValueError('write to a closed sink')
+        if isinstance(data, str):
+            data = data.encode(self.encoding)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self.bytes_written += len(data)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ passes buffered data on to the destination"""
+        if self._buffered:
+            data = b''.join(self._buffer)
+            self._buffer, self._buffered = [], 0
+            self._write(data)
+
+    def close(self):
+        """ flushes and finalizes the destination"""
+        if not self.closed:
+            self.flush()
+            self.closed = True
+            self._close()
+
+    def abort(self):
+        """ drops buffered data and discards the destination where possible"""
+        if not self.closed:
+            self._buffer, self._buffered = [], 0
+            self.closed = True
+            self._abort()
+
+    @abc.abstractmethod
+    def _write(self, data:bytes):
+        """ passes a chunk of data on to the destination"""
+
+    def _close(self):
+        pass
+
+    def _abort(self):
+        self._close()
+
+
+class FileSink(Sink):
+    """
+    File Sink
+
+    Writes to a binary file object (e.g. io.BytesIO or a pipe), or to a path which is replaced
+    atomically on close and left untouched on abort.
+    """
+    def __init__(self, target, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8'):
+        super().__init__(buffer_size, encoding)
+        self.path = None
+        if isinstance(target, (str, os.PathLike)):
+            self.path = os.fspath(target)
+            self._tmp_path = _tmp_path(self.path)
+            self.file_obj = self._open(open(self._tmp_path, 'wb'))
+        else:
+            self.file_obj = self._open(target)
+
+    def _open(self, file_obj):
+        return file_obj
+
+    def _write(self, data:bytes):
+        self.file_obj.write(data)
+
+    def _close(self):
+        if self.path is None:
+            self.file_obj.flush()
+            return
+        self.file_obj.close()
+        os.replace(self._tmp_path, self.path)
+
+    def _abort(self):
+        if self.path is None:
+            return
+        self.file_obj.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+class GzipSink(FileSink):
+    """ Gzip Sink: gzip-compresses into a path or binary file object"""
+    def __init__(self, target, compresslevel:int=6, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8'):
+        self.compresslevel = compresslevel
+        super().__init__(target, buffer_size, encoding)
+
+    def _open(self, file_obj):
+        self._raw = file_obj
+        # mtime=0 keeps the output reproducible
+        return gzip.GzipFile(fileobj=file_obj, mode='wb', compresslevel=self.compresslevel, mtime=0)
+
+    def _close(self):
+        # closing the gzip stream writes its trailer but leaves the underlying file open
+        self.file_obj.close()
+        self.file_obj = self._raw
+        super()._close()
+
+    def _abort(self):
+        self.file_obj = self._raw
+        super()._abort()
+
+
+class ZstdSink(FileSink):
+    """ Zstandard Sink: zstd-compresses into a path or binary file object, requires the zstandard package"""
+    def __init__(self, target, level:int=3, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8'):
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError('ZstdSink requires zstandard (pip install zstandard)') from error
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        super().__init__(target, buffer_size, encoding)
+
+    def _open(self, file_obj):
+        self._raw = file_obj
+        return self._compressor.stream_writer(file_obj, closefd=False)
+
+    def _close(self):
+        self.file_obj.close()
+        self.file_obj = self._raw
+        super()._close()
+
+    def _abort(self):
+        self.file_obj = self._raw
+        super()._abort()
+
+
+class StdoutSink(FileSink):
+    """ Stdout Sink: writes to the binary standard output"""
+    def __init__(self, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8'):
+        super().__init__(sys.stdout.buffer, buffer_size, encoding)
+
+
+class SocketSink(Sink):
+    """
+    Socket Sink
+
+    Sends to a connected socket or connects to (host, port). sendall() blocks while the peer is
+    not reading, so a slow reader slows the producer down instead of growing the buffer.
+    """
+    def __init__(self, target, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8',
+                 timeout:float=None, close_socket:bool=None):
+        super().__init__(buffer_size, encoding)
+        if isinstance(target, socket.socket):
+            self.socket = target
+            self.close_socket = bool(close_socket)
+        else:
+            self.socket = socket.create_connection(target, timeout=timeout)
+            self.close_socket = True if close_socket is None else close_socket
+
+    def _write(self, data:bytes):
+        self.socket.sendall(data)
+
+    def _close(self):
+        if self.close_socket:
+            self.socket.close()
+
+
+class QueueSink(Sink):
+    """
+    Queue Sink
+
+    Puts chunks of at least buffer_size bytes on a bounded queue for a consumer thread; put()
+    blocks while max_chunks chunks are waiting. A None chunk marks the end of the stream.
+
+    usage:
+        sink = QueueSink(max_chunks=8)
+        threading.Thread(target=produce, args=(sink,)).start()
+        for chunk in sink.chunks():
+            send(chunk)
+    """
+    def __init__(self, max_chunks:int=8, buffer_size:int=DEFAULT_BUFFER_SIZE, encoding:str='utf-8',
+                 timeout:float=None):
+        super().__init__(buffer_size, encoding)
+        self.queue = queue.Queue(maxsize=max_chunks)
+        self.timeout = timeout
+
+    def _write(self, data:bytes):
+        self.queue.put(data, timeout=self.timeout)
+
+    def _close(self):
+        self.queue.put(None, timeout=self.timeout)
+
+    def chunks(self):
+        """ yields queued chunks until the sink is closed"""
+        return iter(self.queue.get, None)
+
+
+def stream_to(source, sink:Sink):
+    """
+    streams a descriptor section by section into a sink
+
+    params:
+    - source - YOLONetwork or any descriptor with iter_sections(), or an iterable of str/bytes
+    - sink (Sink) - destination; it is flushed but not closed
+
+    returns:
+    - number of bytes written
+    """
+    start = sink.bytes_written
+    sections = source.iter_sections() if hasattr(source, 'iter_sections') else source
+    for section in sections:
+        sink.write(section)
+    sink.flush()
+    return sink.bytes_written - start
@@ -0,0 +1,135 @@
+"""
+Network Specifications
+
+Builds network descriptors from plain dictionaries (e.g. loaded from JSON), so networks can be
+described in manifests, sweeps and service requests.
+
+A specification looks like:
+    {
+        "architecture": "yolov3",
+        "num_classes": 80,
+        "anchors": [10, 13, 16, 30, ...],
+        "num_anchors": 9,
+        "depth_multiple": 1.0,
+        "width_multiple": 1.0,
+        "input_dim": [608, 608, 3],
+        "optimizer": {"learning_rate": 0.001, "lr_decay_schedule": {"400000": 0.1}},
+        "augmentation": {"hue": 0.1, "angle": 0}
+    }
+
+"optimizer" and "augmentation" take the keyword arguments of YOLOOptimizer and
+YOLOImageAugmentation; either may be null to leave the section out. depth_multiple and
+width_multiple scale the yolov3 backbone (see get_scaled_yolov3).
+
+@author: Abdullahi S. Adamu
+"""
+import copy
+import functools
+import json
+
+from darknet_config_generator.common import YOLO_ANCHORS
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import get_alexnet, get_scaled_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+
+DEFAULT_INPUT_DIM = (608, 608, 3)
+
+# spec keys that determine the layers, as opposed to the [net] section
+LAYER_KEYS = ('architecture', 'num_classes', 'anchors', 'num_anchors', 'depth_multiple', 'width_multiple')
+
+
+def _build_yolov3(spec):
+    return get_scaled_yolov3(num_classes=spec.get('num_classes', 80),
+                             anchors=list(spec.get('anchors', YOLO_ANCHORS)),
+                             num_anchors=spec.get('num_anchors', 9),
+                             depth_multiple=spec.get('depth_multiple', 1.0),
+                             width_multiple=spec.get('width_multiple', 1.0))
+
+def _build_alexnet(spec):
+    return get_alexnet(num_classes=spec.get('num_classes', 80))
+
+ARCHITECTURES = {
+    'yolov3': _build_yolov3,
+    'alexnet': _build_alexnet,
+}
+
+
+def layers_from_spec(spec:dict):
+    """ builds the layer list of a specification"""
+    architecture = spec.get('architecture', 'yolov3')
+    builder = ARCHITECTURES.get(architecture)
+    if builder is None:
+        raise ValueError(f'unknown architecture {architecture!r}, expected one of {sorted(ARCHITECTURES)}')
+    return builder(spec)
+
+def optimizer_from_spec(spec:dict):
+    """ builds the YOLOOptimizer of a specification, or None"""
+    if 'optimizer' not in spec:
+        return YOLOOptimizer(num_classes=spec.get('num_classes', 80))
+    options = spec['optimizer']
+    if options is None:
+        return None
+    options = dict(options)
+    options.setdefault('num_classes', spec.get('num_classes', 80))
+    if 'lr_decay_schedule' in options:
+        # JSON object keys are always strings
+        options['lr_decay_schedule'] = {int(step): scale for step, scale in options['lr_decay_schedule'].items()}
+    return YOLOOptimizer(**options)
+
+def augmentation_from_spec(spec:dict):
+    """ builds the YOLOImageAugmentation of a specification, or None"""
+    if 'augmentation' not in spec:
+        return YOLOImageAugmentation()
+    options = spec['augmentation']
+    if options is None:
+        return None
+    return YOLOImageAugmentation(**options)
+
+def network_from_spec(spec:dict, layers:list=None):
+    """
+    builds a YOLONetwork from a specification
+
+    params:
+    - spec (dict) - network specification
+    - layers (list) - prebuilt layers to use instead of building them from the specification
+    """
+    return YOLONetwork(input_dim=tuple(spec.get('input_dim', DEFAULT_INPUT_DIM)),
+                       image_augmentation=augmentation_from_spec(spec),
+                       optimizer=optimizer_from_spec(spec),
+                       layers=layers_from_spec(spec) if layers is None else layers)
+
+
+@functools.lru_cache(maxsize=8)
+def _render_layers(layers_key:str):
+    """ renders the layers of a specification once per process"""
+    return ''.join(layer.render() for layer in layers_from_spec(json.loads(layers_key)))
+
+def render_spec(spec:dict):
+    """
+    renders the configuration of a specification as bytes
+
+    Rendered layers are cached per process by the LAYER_KEYS of the specification, so specifications
+    that only differ in their [net] settings render their layers once.
+    """
+    layers_key = json.dumps({key: spec[key] for key in LAYER_KEYS if key in spec}, sort_keys=True)
+    network = network_from_spec(spec, layers=[])
+    return (network.render() + _render_layers(layers_key)).encode('utf-8')
+
+
+def apply_overrides(spec:dict, overrides:dict):
+    """
+    returns a copy of the specification with dotted keys overridden
+
+    e.g. {'optimizer.learning_rate': 0.01, 'augmentation.hue': 0.2, 'num_classes': 3}
+    """
+    spec = copy.deepcopy(spec)
+    for key, value in overrides.items():
+        target = spec
+        *parents, name = key.split('.')
+        for parent in parents:
+            if target.get(parent) is None:
+                target[parent] = {}
+            target = target[parent]
+        target[name] = value
+    return spec
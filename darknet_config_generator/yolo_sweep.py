@@ -0,0 +1,243 @@
+"""
+Hyperparameter Sweeps
+
+Expands a search space over a base network specification, renders the variants on a process pool,
+deduplicates identical configurations by content hash and streams them into a single tar or zip
+archive with a JSON-lines index manifest. Points, rendered configs and the manifest are all
+streamed, so memory stays bounded regardless of the number of points.
+
+A search space looks like:
+    {
+        "grid": {"optimizer.learning_rate": [0.001, 0.01], "augmentation.angle": [0, 10]},
+        "random": {"augmentation.hue": {"uniform": [0.0, 0.2]},
+                   "optimizer.momentum": {"choice": [0.9, 0.95]}}
+    }
+
+Every grid point is combined with `samples` random draws of the "random" parameters.
+Supported distributions are uniform, loguniform, randint (inclusive) and choice.
+
+usage: python -m darknet_config_generator.yolo_sweep --spec net.json --space space.json --out sweep.tar
+
+@author: Abdullahi S. Adamu
+"""
+import argparse
+import collections
+import functools
+import hashlib
+import io
+import itertools
+import json
+import math
+import operator
+import os
+import random
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from darknet_config_generator.yolo_spec import apply_overrides, render_spec
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+""" Search Space """
+def _sample(distribution:dict, rng:random.Random):
+    """ draws a value from a distribution description"""
+    (name, args), = distribution.items()
+    if name == 'uniform':
+        return rng.uniform(*args)
+    if name == 'loguniform':
+        low, high = args
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if name == 'randint':
+        return rng.randint(*args)
+    if name == 'choice':
+        return rng.choice(args)
+    raise ValueError(f'unknown distribution {name!r}')
+
+def iter_points(space:dict, samples:int=1, seed:int=0):
+    """
+    lazily expands a search space into override dictionaries
+
+    params:
+    - space (dict) - search space with optional "grid" and "random" entries
+    - samples (int) - random draws per grid point, ignored when there are no random parameters
+    - seed (int) - random seed
+    """
+    grid = space.get('grid', {})
+    distributions = space.get('random', {})
+    rng = random.Random(seed)
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        point = dict(zip(names, values))
+        if not distributions:
+            yield point
+            continue
+        for _ in range(samples):
+            sampled = dict(point)
+            sampled.update((name, _sample(distribution, rng)) for name, distribution in distributions.items())
+            yield sampled
+
+def count_points(space:dict, samples:int=1):
+    """ number of points iter_points yields"""
+    grid_points = functools.reduce(operator.mul, (len(values) for values in space.get('grid', {}).values()), 1)
+    return grid_points * (samples if space.get('random') else 1)
+
+
+""" Rendering """
+_base_spec = None
+
+def _init_worker(base_spec:dict):
+    global _base_spec
+    _base_spec = base_spec
+
+def render_point(base_spec:dict, overrides:dict):
+    """ renders the configuration of one point of the search space"""
+    return render_spec(apply_overrides(base_spec, overrides))
+
+def _render_chunk(chunk:list):
+    """ renders a chunk of points in a worker, returning (overrides, digest, data) tuples"""
+    results = []
+    for overrides in chunk:
+        data = render_point(_base_spec, overrides)
+        results.append((overrides, hashlib.sha256(data).hexdigest(), data))
+    return results
+
+def _chunked(iterable, size:int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+""" Archives """
+class _TarArchive:
+    def __init__(self, path):
+        mode = 'w:gz' if path.endswith(('.tar.gz', '.tgz')) else 'w'
+        self.archive = tarfile.open(path, mode)
+
+    def add(self, name:str, data:bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def add_file(self, name:str, path:str):
+        self.archive.add(path, arcname=name)
+
+    def close(self):
+        self.archive.close()
+
+class _ZipArchive:
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, name:str, data:bytes):
+        self.archive.writestr(name, data)
+
+    def add_file(self, name:str, path:str):
+        self.archive.write(path, arcname=name)
+
+    def close(self):
+        self.archive.close()
+
+def open_archive(path:str):
+    """ opens a zip or tar archive for writing based on its extension"""
+    if path.endswith('.zip'):
+        return _ZipArchive(path)
+    return _TarArchive(path)
+
+
+SweepStats = collections.namedtuple('SweepStats', ['points', 'unique', 'duplicates', 'seconds'])
+
+def run_sweep(base_spec:dict, space:dict, archive_path:str, samples:int=1, seed:int=0,
+              workers:int=None, chunk_size:int=64):
+    """
+    renders every point of a search space into an archive
+
+    Each unique configuration is stored once as cfg/<sha256>.cfg; the manifest records every point
+    with its overrides and the member holding its configuration. The manifest is written next to
+    the archive as <archive>.manifest.jsonl and added to the archive as manifest.jsonl.
+
+    params:
+    - base_spec (dict) - network specification the overrides are applied to
+    - space (dict) - search space
+    - archive_path (str) - .tar, .tar.gz, .tgz or .zip path
+    - samples (int) - random draws per grid point
+    - seed (int) - random seed
+    - workers (int) - number of worker processes, defaults to the number of CPUs
+    - chunk_size (int) - points rendered per task
+
+    returns:
+    - SweepStats
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest_path = f'{archive_path}.manifest.jsonl'
+    max_in_flight = workers * 4
+    start = time.perf_counter()
+    seen = set()
+    points = 0
+
+    archive = open_archive(archive_path)
+    try:
+        with open(manifest_path, 'w') as manifest, \
+             ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(base_spec,)) as executor:
+
+            def write_results(results):
+                nonlocal points
+                for overrides, digest, data in results:
+                    name = f'cfg/{digest}.cfg'
+                    duplicate = digest in seen
+                    if not duplicate:
+                        seen.add(digest)
+                        archive.add(name, data)
+                    manifest.write(json.dumps({'index': points, 'member': name, 'sha256': digest,
+                                               'duplicate': duplicate, 'overrides': overrides}) + '\n')
+                    points += 1
+
+            # results are consumed in submission order with a bounded number of pending chunks
+            in_flight = collections.deque()
+            for chunk in _chunked(iter_points(space, samples=samples, seed=seed), chunk_size):
+                in_flight.append(executor.submit(_render_chunk, chunk))
+                if len(in_flight) >= max_in_flight:
+                    write_results(in_flight.popleft().result())
+            while in_flight:
+                write_results(in_flight.popleft().result())
+        archive.add_file(MANIFEST_NAME, manifest_path)
+    finally:
+        archive.close()
+
+    return SweepStats(points, len(seen), points - len(seen), time.perf_counter() - start)
+
+
+""" CLI """
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description='Render a hyperparameter sweep into an archive')
+    parser.add_argument('--spec', required=True, help='JSON network specification the sweep is based on')
+    parser.add_argument('--space', required=True, help='JSON search space')
+    parser.add_argument('--out', required=True, help='output archive (.tar, .tar.gz, .tgz or .zip)')
+    parser.add_argument('--samples', type=int, default=1, help='random draws per grid point')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    return parser
+
+def run(args):
+    with open(args.spec) as file_obj:
+        base_spec = json.load(file_obj)
+    with open(args.space) as file_obj:
+        space = json.load(file_obj)
+    stats = run_sweep(base_spec, space, args.out, samples=args.samples, seed=args.seed,
+                      workers=args.workers, chunk_size=args.chunk_size)
+    print(f'{stats.points} points, {stats.unique} unique configs, {stats.duplicates} duplicates '
+          f'in {stats.seconds:.2f}s -> {args.out}')
+
+def main(argv=None):
+    run(build_arg_parser().parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Network Templates
+
+Pre-rendered configs for families of networks that only differ in their number of classes, e.g.
+get_yolov3 generated for hundreds of datasets. The architecture is rendered once at a few class
+counts; every line that changes with the class count (the [yolo] classes and the filters of the
+convolutions in front of them) must be a `key=<int>` line whose value is linear in num_classes and
+becomes a slot. Everything else is kept as one invariant block, so a new variant is a single
+%-format of the cached bytes.
+
+Templates are memoized per (architecture, input_dim, architecture params).
+
+usage:
+    template = compile_template(get_yolov3, input_dim=(416, 416, 3))
+    for num_classes in range(1, 200):
+        template.generate_config(f'yolov3_{num_classes}.cfg', num_classes, optimizer=YOLOOptimizer())
+
+@author: Abdullahi S. Adamu
+"""
+import functools
+
+from darknet_config_generator.common import NL, write_atomic
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import get_yolov3
+
+# class counts the architecture is rendered at to find and check the slots
+_SAMPLES = (1000, 2001)
+_CHECKS = (1, 2, 3, 80)
+
+
+class NetworkTemplate:
+    """
+    Network Template
+
+    params:
+    - header (bytes) - the rendered [net] section
+    - layers (bytes) - rendered layers with a %d slot per varying value
+    - slots (tuple) - (scale, offset) of every slot, the value being scale * num_classes + offset
+    """
+    __slots__ = ('header', 'layers', 'slots')
+
+    def __init__(self, header:bytes, layers:bytes, slots:tuple):
+        self.header = header
+        self.layers = layers
+        self.slots = slots
+
+    def render_layers(self, num_classes:int):
+        """ rendered layers of the network for num_classes, as bytes"""
+        return self.layers % tuple(scale * num_classes + offset for scale, offset in self.slots)
+
+    def render(self, num_classes:int, optimizer=None, image_augmentation=None):
+        """ complete config for num_classes, byte-identical to YOLONetwork.render_bytes()"""
+        sections = [self.header]
+        if optimizer:
+            sections.append(optimizer.render().encode('utf-8'))
+        if image_augmentation:
+            sections.append(image_augmentation.render().encode('utf-8'))
+        sections.append(self.render_layers(num_classes))
+        return b''.join(sections)
+
+    def generate_config(self, save_to:str, num_classes:int, optimizer=None, image_augmentation=None):
+        """ writes the config for num_classes to save_to"""
+        write_atomic(save_to, self.render(num_classes, optimizer, image_augmentation))
+
+
+def _render_layers(architecture, num_classes:int, params:dict):
+    return ''.join(layer.render() for layer in architecture(num_classes=num_classes, **params))
+
+def _slot_value(line:str):
+    key, _, value = line.partition('=')
+    try:
+        return key, int(value)
+    except ValueError:
+        return key, None
+
+@functools.lru_cache(maxsize=64)
+def _compile(architecture, input_dim:tuple, params:tuple):
+    params = {name: list(value) if isinstance(value, tuple) else value for name, value in params}
+    low, high = (_render_layers(architecture, num_classes, params).split(NL) for num_classes in _SAMPLES)
+    if len(low) != len(high):
+        raise ValueError(f'{architecture.__name__} renders a different number of lines per class count')
+
+    lines, slots = [], []
+    for low_line, high_line in zip(low, high):
+        if low_line == high_line:
+            lines.append(low_line.replace('%', '%%'))
+            continue
+        (key, low_value), (high_key, high_value) = _slot_value(low_line), _slot_value(high_line)
+        scale, remainder = divmod(high_value - low_value, _SAMPLES[1] - _SAMPLES[0]) if None not in (low_value, high_value) \
+            else (None, None)
+        if key != high_key or scale is None or remainder:
+            raise ValueError(f'{architecture.__name__}: {low_line!r} is not a key=value line linear in num_classes')
+        lines.append(f'{key.replace("%", "%%")}=%d')
+        slots.append((scale, low_value - scale * _SAMPLES[0]))
+
+    template = NetworkTemplate(YOLONetwork(input_dim=input_dim).render_header().encode('utf-8'),
+                               NL.join(lines).encode('utf-8'), tuple(slots))
+    for num_classes in _CHECKS:
+        if template.render_layers(num_classes) != _render_layers(architecture, num_classes, params).encode('utf-8'):
+            raise ValueError(f'{architecture.__name__} does not render linearly in num_classes={num_classes}')
+    return template
+
+def compile_template(architecture=get_yolov3, input_dim=(608, 608, 3), **params):
+    """
+    returns the memoized NetworkTemplate of an architecture
+
+    params:
+    - architecture (callable) - returns the layers for num_classes, e.g. get_yolov3
+    - input_dim (tuple) - network input dimensions
+    - params - further arguments of the architecture, e.g. anchors or num_anchors
+
+    raises:
+    - ValueError if the rendered config does not vary by linear key=value slots only
+    """
+    frozen = tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in params.items()))
+    return _compile(architecture, tuple(input_dim), frozen)
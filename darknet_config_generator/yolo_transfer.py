@@ -0,0 +1,170 @@
+"""
+Weights Transfer
+
+Transfers darknet weights between networks that share most of their layers, e.g. get_yolov3
+with different num_classes. Shape-compatible layers are streamed block-by-block from the
+memory-mapped source into the target file, so memory use stays constant regardless of file size.
+Only incompatible layers are touched:
+- convolutions feeding a YOLO layer keep the box, objectness and shared class filters of every anchor
+- any other incompatible layer is reinitialized the way darknet initializes new layers
+
+usage:
+    source = YOLONetwork(layers=get_yolov3(num_classes=80))
+    for num_classes in range(1, 200):
+        target = YOLONetwork(layers=get_yolov3(num_classes=num_classes))
+        transfer_weights(source, 'yolov3.weights', target, f'yolov3_{num_classes}.weights')
+
+@author: Abdullahi S. Adamu
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from darknet_config_generator.common import open_atomic
+from darknet_config_generator.yolo_analysis import network_input_dim
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+from darknet_config_generator.yolo_weights import FLOAT_SIZE, DarknetWeights, pack_header, weights_layout
+
+# values generated or copied per write when a layer is not transferred verbatim
+CHUNK_VALUES = 1 << 20
+
+TransferReport = namedtuple('TransferReport', ['copied', 'sliced', 'reinitialized'])
+
+
+def _block_shapes(layer_weights):
+    return [(block.name, block.shape) for block in layer_weights.blocks]
+
+def _fan_in(shape):
+    """ inputs feeding each output of a weights block"""
+    return int(np.prod(shape[1:]))
+
+def _write_initialized(file_obj, name:str, shape, fan_in:int, rng):
+    """ writes a block initialized like darknet: uniform kernels scaled by sqrt(2 / fan_in)"""
+    count = int(np.prod(shape))
+    if name == 'weights':
+        scale = np.sqrt(2.0 / max(fan_in, 1))
+        for start in range(0, count, CHUNK_VALUES):
+            size = min(CHUNK_VALUES, count - start)
+            file_obj.write((rng.uniform(-1.0, 1.0, size) * scale).astype('<f4'))
+        return
+    value = 1.0 if name in ('scales', 'rolling_variance') else 0.0
+    for start in range(0, count, CHUNK_VALUES):
+        file_obj.write(np.full(min(CHUNK_VALUES, count - start), value, dtype='<f4'))
+
+def _write_bytes(file_obj, view):
+    """ copies a memoryview to the file in bounded chunks"""
+    chunk = CHUNK_VALUES * FLOAT_SIZE
+    for start in range(0, len(view), chunk):
+        file_obj.write(view[start:start + chunk])
+
+def _head_layer(layers, index:int):
+    """ returns the YOLO layer fed by the convolution at index, or None"""
+    if isinstance(layers[index], ConvolutionLayer) and index + 1 < len(layers) \
+            and isinstance(layers[index + 1], YOLOLayer):
+        return layers[index + 1]
+    return None
+
+def _sliceable(source_layers, target_layers, index:int, source_weights, target_weights):
+    """ True if a head convolution only differs in its number of classes"""
+    source_head, target_head = _head_layer(source_layers, index), _head_layer(target_layers, index)
+    if source_head is None or target_head is None or len(source_head.masks) != len(target_head.masks):
+        return False
+    source_shapes, target_shapes = dict(_block_shapes(source_weights)), dict(_block_shapes(target_weights))
+    return (source_shapes.keys() == target_shapes.keys()
+            and source_shapes['weights'][1:] == target_shapes['weights'][1:])
+
+def _write_sliced(file_obj, source, source_layer, target_layer, anchors:int, rng):
+    """ writes a head convolution keeping the filters shared by the source and target classes"""
+    source_views = source.layer_view(source_layer.index)
+    for block in target_layer.blocks:
+        source_block = source_views[block.name].reshape(anchors, -1, _fan_in(block.shape) or 1)
+        target_filters = block.shape[0] // anchors
+        kept = min(source_block.shape[1], target_filters)
+        if block.name == 'weights':
+            target_block = (rng.uniform(-1.0, 1.0, (anchors, target_filters, source_block.shape[2]))
+                            * np.sqrt(2.0 / _fan_in(block.shape))).astype('<f4')
+        else:
+            value = 1.0 if block.name in ('scales', 'rolling_variance') else 0.0
+            target_block = np.full((anchors, target_filters, 1), value, dtype='<f4')
+        target_block[:, :kept] = source_block[:, :kept]
+        file_obj.write(target_block)
+    del source_views
+
+
+def transfer_from(source:DarknetWeights, source_network, target_network, target_path:str,
+                  input_dim=None, seed:int=0):
+    """
+    writes the target weights file from an already opened source
+
+    returns:
+    - TransferReport with the indices of copied, sliced and reinitialized layers
+    """
+    source_layers = getattr(source_network, 'layers', source_network)
+    target_layers = getattr(target_network, 'layers', target_network)
+    target_layout = weights_layout(target_layers, network_input_dim(target_network, input_dim))
+    rng = np.random.default_rng(seed)
+    copied, sliced, reinitialized = [], [], []
+
+    with open_atomic(target_path) as file_obj:
+        file_obj.write(pack_header(source.header))
+        for target_layer in target_layout:
+            index = target_layer.index
+            source_layer = source.layout.layers.get(index)
+            if source_layer is not None and _block_shapes(source_layer) == _block_shapes(target_layer):
+                _write_bytes(file_obj, source.layer_bytes(index))
+                copied.append(index)
+            elif source_layer is not None and _sliceable(source_layers, target_layers, index,
+                                                         source_layer, target_layer):
+                anchors = len(target_layers[index + 1].masks)
+                _write_sliced(file_obj, source, source_layer, target_layer, anchors, rng)
+                sliced.append(index)
+            else:
+                for block in target_layer.blocks:
+                    _write_initialized(file_obj, block.name, block.shape, _fan_in(block.shape), rng)
+                reinitialized.append(index)
+
+    return TransferReport(copied, sliced, reinitialized)
+
+
+def transfer_weights(source_network, source_path:str, target_network, target_path:str,
+                     input_dim=None, seed:int=0):
+    """
+    transfers weights from a source network to a target network
+
+    params:
+    - source_network - YOLONetwork or list of layers the source weights belong to
+    - source_path (str) - source .weights file
+    - target_network - YOLONetwork or list of layers to write weights for
+    - target_path (str) - target .weights file, replaced atomically
+    - input_dim (tuple) - (w, h, c), defaults to the input_dim of the YOLONetworks, or DEFAULT_INPUT_DIM
+      for lists of layers
+    - seed (int) - random seed for reinitialized values
+
+    returns:
+    - TransferReport
+    """
+    source_dim = network_input_dim(source_network, input_dim)
+    with DarknetWeights(source_path, source_network, source_dim) as source:
+        issues = source.validate()
+        if issues:
+            raise ValueError(f'{source_path} does not match the source network: {issues[0]}')
+        return transfer_from(source, source_network, target_network, target_path, input_dim, seed)
+
+
+def transfer_many(source_network, source_path:str, targets, input_dim=None, seed:int=0):
+    """
+    transfers one source weights file to many targets, mapping the source only once
+
+    params:
+    - targets - iterable of (target_network, target_path)
+
+    yields:
+    - (target_path, TransferReport)
+    """
+    source_dim = network_input_dim(source_network, input_dim)
+    with DarknetWeights(source_path, source_network, source_dim) as source:
+        issues = source.validate()
+        if issues:
+            raise ValueError(f'{source_path} does not match the source network: {issues[0]}')
+        for target_network, target_path in targets:
+            yield target_path, transfer_from(source, source_network, target_network, target_path, input_dim, seed)
@@ -0,0 +1,226 @@
+"""
+Darknet Weights
+
+Computes the exact .weights file layout darknet expects for a network and validates weights files
+against it. Files are memory-mapped and exposed as zero-copy NumPy views, so multi-hundred-MB
+files are never loaded into RAM.
+
+File layout:
+- header: int32 major, minor, revision, then the number of images seen as uint64
+  (int32 for versions before 0.2)
+- per [convolutional] layer: biases, then with batch_normalize scales, rolling means and
+  rolling variances (one value per filter each), then kernels (filters x channels x size x size)
+- per [connected] layer: biases, then weights (outputs x inputs)
+All values are float32.
+
+@author: Abdullahi S. Adamu
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from darknet_config_generator.yolo_analysis import analyze, network_input_dim
+from darknet_config_generator.yolo_layers import ConvolutionLayer, FullyConnectedLayer
+
+FLOAT_SIZE = 4
+HEADER_VERSION_SIZE = 12   # major, minor, revision
+
+WeightsHeader = namedtuple('WeightsHeader', ['major', 'minor', 'revision', 'seen'])
+WeightBlock = namedtuple('WeightBlock', ['name', 'offset', 'shape'])
+
+
+def header_size(major:int=0, minor:int=2):
+    """ size in bytes of the header of the given weights file version"""
+    if major * 10 + minor >= 2 and major < 1000 and minor < 1000:
+        return HEADER_VERSION_SIZE + 8
+    return HEADER_VERSION_SIZE + 4
+
+def read_header(buffer):
+    """ reads the WeightsHeader from the start of a bytes-like object"""
+    if len(buffer) < HEADER_VERSION_SIZE:
+        raise ValueError('weights file is too short to hold a header')
+    major, minor, revision = struct.unpack_from('<3i', buffer, 0)
+    seen_format = '<Q' if header_size(major, minor) == HEADER_VERSION_SIZE + 8 else '<i'
+    if len(buffer) < header_size(major, minor):
+        raise ValueError('weights file is too short to hold a header')
+    seen, = struct.unpack_from(seen_format, buffer, HEADER_VERSION_SIZE)
+    return WeightsHeader(major, minor, revision, seen)
+
+def pack_header(header:WeightsHeader=WeightsHeader(0, 2, 0, 0)):
+    """ returns the bytes of a weights file header"""
+    seen_format = 'Q' if header_size(header.major, header.minor) == HEADER_VERSION_SIZE + 8 else 'i'
+    return struct.pack(f'<3i{seen_format}', header.major, header.minor, header.revision, header.seen)
+
+
+class LayerWeights:
+    """
+    Weights of a single layer
+
+    Offsets are in float32 values from the end of the header; blocks are in file order.
+    """
+    def __init__(self, index:int, header:str, offset:int, blocks:list):
+        self.index = index
+        self.header = header
+        self.offset = offset
+        self.blocks = blocks
+
+    @property
+    def count(self):
+        """ number of float32 values stored for the layer"""
+        return sum(int(np.prod(block.shape)) for block in self.blocks)
+
+    def __repr__(self):
+        return f'LayerWeights(index={self.index}, header={self.header!r}, offset={self.offset}, count={self.count})'
+
+
+def _layer_blocks(layer, in_w:int, in_h:int, in_c:int):
+    """ returns the (name, shape) of every weight block of the layer in file order"""
+    if isinstance(layer, ConvolutionLayer):
+        blocks = [('biases', (layer.filters,))]
+        if layer.batch_normalize:
+            blocks += [('scales', (layer.filters,)),
+                       ('rolling_mean', (layer.filters,)),
+                       ('rolling_variance', (layer.filters,))]
+        return blocks + [('weights', (layer.filters, in_c, layer.size, layer.size))]
+    if isinstance(layer, FullyConnectedLayer):
+        return [('biases', (layer.size,)), ('weights', (layer.size, in_w * in_h * in_c))]
+    return []
+
+
+class WeightsLayout:
+    """
+    Weights Layout
+
+    Per-layer weight blocks of a network, keyed by layer index.
+    """
+    def __init__(self, layers:dict, total_count:int):
+        self.layers = layers
+        self.total_count = total_count
+
+    def file_size(self, major:int=0, minor:int=2):
+        """ expected size in bytes of a weights file of the given version"""
+        return header_size(major, minor) + self.total_count * FLOAT_SIZE
+
+    def __iter__(self):
+        return iter(self.layers.values())
+
+    def __getitem__(self, index:int):
+        return self.layers[index]
+
+    def __contains__(self, index:int):
+        return index in self.layers
+
+
+def weights_layout(network, input_dim=None):
+    """
+    computes the weight layout darknet expects for the network
+
+    params:
+    - network - YOLONetwork or list of layers
+    - input_dim (tuple) - (w, h, c), defaults to the input_dim of the YOLONetwork, or to
+      DEFAULT_INPUT_DIM (608, 608, 3) for a list of layers
+
+    returns:
+    - WeightsLayout
+    """
+    layers = getattr(network, 'layers', network)
+    cost = analyze(layers, network_input_dim(network, input_dim))
+    scalar = lambda value: int(np.asarray(value).reshape(-1)[0])
+
+    layouts, offset = {}, 0
+    for layer, layer_cost in zip(layers, cost.layers):
+        shapes = _layer_blocks(layer, scalar(layer_cost.in_w), scalar(layer_cost.in_h), scalar(layer_cost.in_c))
+        if not shapes:
+            continue
+        blocks, layer_offset = [], offset
+        for name, shape in shapes:
+            blocks.append(WeightBlock(name, offset, shape))
+            offset += int(np.prod(shape))
+        layouts[layer_cost.index] = LayerWeights(layer_cost.index, layer_cost.header, layer_offset, blocks)
+    return WeightsLayout(layouts, offset)
+
+
+class DarknetWeights:
+    """
+    Memory-mapped darknet .weights file
+
+    usage:
+        with DarknetWeights('yolov3.weights', network) as weights:
+            issues = weights.validate()
+            kernels = weights.layer_view(0)['weights']
+
+    Views returned by layer_view and block_view share memory with the file; release them before
+    calling close().
+    """
+    def __init__(self, path, network, input_dim=None):
+        self.path = path
+        self.layout = weights_layout(network, input_dim)
+        self.file_size = os.path.getsize(path)
+        self._buffer = b''
+        if self.file_size:
+            with open(path, 'rb') as file_obj:
+                self._buffer = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = read_header(self._buffer)
+        self.header_size = header_size(self.header.major, self.header.minor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ releases the memory map"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b''
+
+    @property
+    def count(self):
+        """ number of float32 values stored after the header"""
+        return (self.file_size - self.header_size) // FLOAT_SIZE
+
+    def validate(self):
+        """
+        checks the file against the layout of the network
+
+        returns:
+        - list of issue strings, empty if the file matches the network exactly
+        """
+        issues = []
+        expected_size = self.layout.file_size(self.header.major, self.header.minor)
+        if (self.file_size - self.header_size) % FLOAT_SIZE:
+            issues.append('weights data is not a whole number of float32 values')
+        if self.file_size != expected_size:
+            issues.append(f'file has {self.file_size} bytes, the network expects {expected_size} bytes')
+        for layer in self.layout:
+            end = layer.offset + layer.count
+            if end > self.count:
+                issues.append(f'layer {layer.index} {layer.header} needs values {layer.offset} to {end} '
+                              f'but the file holds {self.count}')
+                break
+        return issues
+
+    def block_view(self, block:WeightBlock):
+        """ returns a zero-copy float32 view of a weight block"""
+        count = int(np.prod(block.shape))
+        if block.offset + count > self.count:
+            raise ValueError(f'{block.name} block at value {block.offset} runs past the end of {self.path}')
+        view = np.frombuffer(self._buffer, dtype='<f4', count=count,
+                             offset=self.header_size + block.offset * FLOAT_SIZE)
+        return view.reshape(block.shape)
+
+    def layer_view(self, index:int):
+        """ returns the weight blocks of a layer as a dict of zero-copy float32 views"""
+        if index not in self.layout:
+            raise ValueError(f'layer {index} has no weights')
+        return {block.name: self.block_view(block) for block in self.layout[index].blocks}
+
+    def layer_bytes(self, index:int):
+        """ returns a zero-copy memoryview of the raw bytes of a layer"""
+        layer = self.layout[index]
+        start = self.header_size + layer.offset * FLOAT_SIZE
+        return memoryview(self._buffer)[start:start + layer.count * FLOAT_SIZE]
@@ -13,10 +13,22 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://adamuas.github.io/darknet-neural-net-config-generator/",
     packages=setuptools.find_packages(),
+    install_requires=[
+        'absl-py',
+        'numpy',
+    ],
+    extras_require={
+        'yaml': ['PyYAML'],
+    },
+    entry_points={
+        'console_scripts': [
+            'darknet-config-gen=darknet_config_generator.cli:main',
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
\ No newline at end of file
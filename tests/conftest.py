@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_network import get_yolov3
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_CFG = os.path.join(REPO_DIR, 'example_generated.cfg')
+
+
+@pytest.fixture
+def yolov3_network():
+    return YOLONetwork(input_dim=(416,416,3), layers=get_yolov3())
+
+@pytest.fixture
+def yolov3_cfg(tmp_path, yolov3_network):
+    path = str(tmp_path / 'yolov3.cfg')
+    yolov3_network.generate_config(path)
+    return path
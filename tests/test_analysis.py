@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from darknet_config_generator.yolo_analysis import DEFAULT_INPUT_DIM, analyze
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+from darknet_config_generator.yolo_network import get_yolov3
+
+
+def test_yolov3_matches_darknet():
+    cost = analyze(get_yolov3(), (416, 416, 3))
+    assert cost.total_bflops[0] == pytest.approx(65.879, abs=1e-3)
+    assert cost.total_params[0] == 62001757
+    assert cost.issues == []
+    heads = [layer for layer in cost.layers if layer.header == '[yolo]']
+    assert [int(head.out_w[0]) for head in heads] == [13, 26, 52]
+    assert 'Total BFLOPS 65.879' in cost.report()
+
+def test_resolutions_are_evaluated_together():
+    dims = [(320, 320, 3), (416, 416, 3), (608, 608, 3)]
+    batched = analyze(get_yolov3(), dims)
+    single = [analyze(get_yolov3(), dim).total_bflops[0] for dim in dims]
+    np.testing.assert_allclose(batched.total_bflops, single)
+    assert batched.within_budget(max_bflops=70).tolist() == [True, True, False]
+
+def test_network_and_layer_list_defaults(yolov3_network):
+    assert analyze(yolov3_network).input_dims.tolist() == [[416, 416, 3]]
+    assert analyze(get_yolov3()).input_dims.tolist() == [list(DEFAULT_INPUT_DIM)]
+
+def test_shape_issues_are_collected():
+    layers = [ConvolutionLayer(size=3, stride=1, filters=16), ConvolutionLayer(size=3, stride=2, filters=32),
+              SkipConnection(from_layer=-2), YOLOLayer(num_classes=2)]
+    issues = analyze(layers, (64, 64, 3)).issues
+    assert any('[shortcut]' in issue for issue in issues)
+    assert any('[yolo]' in issue for issue in issues)
+
+def test_invalid_route_raises():
+    with pytest.raises(ValueError):
+        analyze([ConvolutionLayer(stride=1), RouteConnection(layers=[-4])], (64, 64, 3))
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_anchors import (BoxBuffer, anchor_fitness, assign_masks, generate_anchors,
+                                                   head_strides, iter_label_files, kmeans_anchors, load_label_boxes,
+                                                   read_label_file)
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_layers import YOLOLayer
+from darknet_config_generator.yolo_network import get_yolov3
+
+
+def _write_labels(root, boxes_per_file, files=10, seed=0):
+    """ writes label files whose boxes come from two size clusters, 0.1 x 0.2 and 0.5 x 0.4"""
+    rng = np.random.default_rng(seed)
+    (root / 'nested').mkdir(parents=True)
+    for index in range(files):
+        sizes = np.where(rng.random((boxes_per_file, 1)) < 0.5, [0.1, 0.2], [0.5, 0.4])
+        rows = np.hstack([np.zeros((boxes_per_file, 1)), np.full((boxes_per_file, 2), 0.5), sizes])
+        directory = root / 'nested' if index % 2 else root
+        np.savetxt(directory / f'{index}.txt', rows, fmt='%g')
+
+
+def test_read_label_file(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('0 0.5 0.5 0.1 0.2\n3 0.25 0.75 0.5 0.4\n')
+    np.testing.assert_allclose(read_label_file(str(path)), [[0, 0.5, 0.5, 0.1, 0.2], [3, 0.25, 0.75, 0.5, 0.4]])
+    path.write_text('0 0.5 0.5 0.1\n')
+    assert read_label_file(str(path)).shape == (0, 5)
+    path.write_text('0 0.5 0.5 0.1 oops\n')
+    assert read_label_file(str(path)).shape == (0, 5)
+
+def test_box_buffer_memory_is_bounded():
+    buffer = BoxBuffer(max_boxes=100, capacity=16)
+    for _ in range(50):
+        buffer.extend(np.ones((37, 2)))
+    assert len(buffer.array()) == 100 and len(buffer.data) == 100
+    assert buffer.seen == 50 * 37
+
+def test_box_buffer_keeps_a_default_bounded_sample():
+    assert BoxBuffer().max_boxes == 1000000
+    unbounded = BoxBuffer(max_boxes=None)
+    unbounded.extend(np.ones((5000, 2)))
+    assert len(unbounded.array()) == 5000
+
+def test_boxes_are_scaled_to_the_input(tmp_path):
+    _write_labels(tmp_path, boxes_per_file=20)
+    paths = sorted(iter_label_files(str(tmp_path)))
+    assert len(paths) == 10
+    boxes = load_label_boxes(paths, input_dim=(100, 200), workers=2, chunk_size=3)
+    assert boxes.shape == (200, 2)
+    assert {tuple(box) for box in np.round(boxes).tolist()} == {(10, 40), (50, 80)}
+    assert len(load_label_boxes(paths, max_boxes=50)) == 50
+
+def test_kmeans_recovers_clusters(tmp_path):
+    _write_labels(tmp_path, boxes_per_file=50)
+    anchors = generate_anchors(str(tmp_path), k=2, input_dim=(100, 100))
+    assert anchors == [10, 20, 50, 40]
+    boxes = np.array([[10, 20], [50, 40]] * 100, dtype=np.float32)
+    np.testing.assert_allclose(kmeans_anchors(boxes, k=2, batch_size=64, iterations=50), [[10, 20], [50, 40]])
+    with pytest.raises(ValueError):
+        kmeans_anchors(boxes[:1], k=2)
+
+
+def test_anchor_fitness():
+    boxes = np.array([[10, 20], [50, 40], [200, 200]], dtype=np.float32)
+    fitness = anchor_fitness(boxes, [10, 20, 50, 40])
+    assert fitness.best_possible_recall == pytest.approx(2 / 3)
+    assert fitness.anchors_above_threshold == pytest.approx(2 / 3)
+    assert fitness.mean_best_iou == pytest.approx((1 + 1 + 2000 / 40000) / 3)
+
+@pytest.mark.parametrize('as_network', [False, True])
+def test_masks_follow_head_strides(as_network):
+    layers = get_yolov3(num_classes=3)
+    network = YOLONetwork(input_dim=(416, 416, 3), layers=layers) if as_network else layers
+    assert [stride for _, stride in head_strides(network)] == [32, 16, 8]
+
+    anchors = [float(size) for size in range(1, 13)]
+    assignments = assign_masks(network, anchors)
+    masks = {stride: masks for _, stride, masks in assignments}
+    assert masks == {8: [0, 1], 16: [2, 3], 32: [4, 5]}
+    heads = [layer for layer in layers if isinstance(layer, YOLOLayer)]
+    assert all(head.num_anchors == 6 for head in heads)
+    assert all(layers[index - 1].filters == 2 * (3 + 5) for index, _, _ in assignments)
+    assert analyze(layers, (416, 416, 3)).issues == []
+
+def test_assigned_anchors_are_not_shared_between_heads():
+    layers = get_yolov3(num_classes=3)
+    assign_masks(layers, [float(size) for size in range(1, 13)])
+    first, second, third = [layer for layer in layers if isinstance(layer, YOLOLayer)]
+    assert first.anchors == second.anchors == third.anchors
+    first.anchors.append(99.0)
+    assert 99.0 not in second.anchors and 99.0 not in third.anchors
@@ -0,0 +1,85 @@
+import os
+
+from darknet_config_generator.yolo_cache import EVICT_TO, ConfigCache, descriptor_digest, network_digest
+from darknet_config_generator.yolo_frozen import freeze
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+
+
+def _read(path):
+    with open(path, 'rb') as file_obj:
+        return file_obj.read()
+
+
+def _stored_bytes(cache_dir):
+    return sum(entry.stat().st_size for directory in os.scandir(cache_dir / 'objects')
+               for entry in os.scandir(directory.path))
+
+
+def test_generate_reuses_and_patches(tmp_path, yolov3_network):
+    cache, path = ConfigCache(str(tmp_path / 'cache')), str(tmp_path / 'yolov3.cfg')
+    assert yolov3_network.generate_config(path, cache=cache) == 'written'
+    assert _read(path) == yolov3_network.render_bytes()
+    assert yolov3_network.generate_config(path, cache=cache) == 'hit'
+
+    yolov3_network.layers[10].filters = 96
+    misses = cache.stats.section_misses
+    assert yolov3_network.generate_config(path, cache=cache) == 'patched'
+    assert cache.stats.section_misses == misses + 1
+    assert _read(path) == yolov3_network.render_bytes()
+    assert (cache.stats.hits, cache.stats.patches, cache.stats.misses) == (1, 1, 1)
+
+def test_external_edits_invalidate_the_sidecar(tmp_path, yolov3_network):
+    cache, path = ConfigCache(str(tmp_path / 'cache')), str(tmp_path / 'yolov3.cfg')
+    yolov3_network.generate_config(path, cache=cache)
+    with open(path, 'ab') as file_obj:
+        file_obj.write(b'# edited by hand\n')
+    assert yolov3_network.generate_config(path, cache=cache) == 'written'
+    assert _read(path) == yolov3_network.render_bytes()
+
+def test_sections_are_shared_between_configs(tmp_path, yolov3_network):
+    cache = ConfigCache(str(tmp_path / 'cache'))
+    yolov3_network.generate_config(str(tmp_path / 'a.cfg'), cache=cache)
+    misses = cache.stats.section_misses
+    yolov3_network.input_dim = (320, 320, 3)
+    assert yolov3_network.generate_config(str(tmp_path / 'b.cfg'), cache=cache) == 'written'
+    assert cache.stats.section_misses == misses
+    assert _read(str(tmp_path / 'b.cfg')) == yolov3_network.render_bytes()
+
+def test_store_is_bounded(tmp_path, yolov3_network):
+    cache = ConfigCache(str(tmp_path / 'cache'), max_bytes=2000, memory_entries=0)
+    yolov3_network.generate_config(str(tmp_path / 'a.cfg'), cache=cache)
+    assert cache.stats.evictions > 0
+    assert _stored_bytes(tmp_path / 'cache') <= 2000 and _read(str(tmp_path / 'a.cfg')) == yolov3_network.render_bytes()
+
+def test_full_store_is_scanned_once_per_batch_of_evictions(tmp_path, monkeypatch):
+    cache = ConfigCache(str(tmp_path / 'cache'), max_bytes=10000, memory_entries=0)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda max_bytes: scans.append(max_bytes) or evict(max_bytes))
+    for filters in range(1, 201):
+        cache.section(descriptor_digest(ConvolutionLayer(filters=filters)), ConvolutionLayer(filters=filters))
+    section_size = len(ConvolutionLayer(filters=100).render())
+    assert scans and set(scans) == {int(10000 * EVICT_TO)}
+    # every scan frees about (1 - EVICT_TO) * max_bytes, so it runs once per that many new sections
+    assert len(scans) <= 200 * section_size / (10000 * (1 - EVICT_TO) - section_size) + 1
+    assert cache._size == _stored_bytes(tmp_path / 'cache') <= 10000
+
+def test_overwritten_sections_are_counted_once(tmp_path):
+    cache = ConfigCache(str(tmp_path / 'cache'))
+    digest = descriptor_digest(ConvolutionLayer())
+    path = cache._object_path(digest)
+    cache._store(path, b'x' * 100)
+    cache._store(path, b'y' * 40)
+    assert cache._size == _stored_bytes(tmp_path / 'cache') == 40
+    assert ConfigCache(str(tmp_path / 'cache'))._size == 40
+
+def test_digests_follow_the_fields():
+    assert descriptor_digest(ConvolutionLayer(filters=64)) == descriptor_digest(ConvolutionLayer(filters=64))
+    assert descriptor_digest(ConvolutionLayer(filters=64)) != descriptor_digest(ConvolutionLayer(filters=32))
+    assert descriptor_digest(freeze(ConvolutionLayer(filters=64))) == descriptor_digest(ConvolutionLayer(filters=64))
+    assert descriptor_digest(YOLOLayer(truth_thresh=1)) != descriptor_digest(YOLOLayer(truth_thresh=1.0))
+
+def test_network_digest_tracks_the_input(yolov3_network):
+    digest = network_digest(yolov3_network)
+    yolov3_network.input_dim = (320, 320, 3)
+    assert network_digest(yolov3_network) != digest
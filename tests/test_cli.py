@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from darknet_config_generator import cli
+from darknet_config_generator.yolo_manifest import generate_manifest, manifest_jobs, merge_spec
+from darknet_config_generator.yolo_spec import render_spec
+
+MANIFEST = {
+    'output_dir': 'cfg',
+    'defaults': {'architecture': 'yolov3', 'optimizer': {'batch_size': 32}},
+    'networks': [
+        {'name': 'coco', 'num_classes': 80},
+        {'name': 'faces', 'num_classes': 1, 'optimizer': {'learning_rate': 0.01}},
+        {'output': 'extra/tiny.cfg', 'input_dim': [320, 320, 3]},
+    ],
+}
+
+
+def test_entries_are_merged_over_defaults():
+    jobs = manifest_jobs(MANIFEST, output_dir='out')
+    assert [(job.name, job.path) for job in jobs] == [('coco', os.path.join('out', 'coco.cfg')),
+                                                      ('faces', os.path.join('out', 'faces.cfg')),
+                                                      ('tiny', 'extra/tiny.cfg')]
+    assert jobs[1].spec['optimizer'] == {'batch_size': 32, 'learning_rate': 0.01}
+    assert merge_spec({'num_classes': 3}, {'name': 'x'}) == {'num_classes': 3}
+
+def test_invalid_manifests_raise():
+    with pytest.raises(ValueError):
+        manifest_jobs([{'num_classes': 3}])
+    with pytest.raises(ValueError):
+        manifest_jobs([{'name': 'a'}, {'output': os.path.join('.', 'a.cfg')}])
+
+def test_failures_do_not_stop_the_batch(tmp_path):
+    jobs = manifest_jobs([{'name': 'good'}, {'name': 'bad', 'architecture': 'nope'}], output_dir=str(tmp_path))
+    results = []
+    stats = generate_manifest(jobs, on_result=results.append)
+    assert (stats.generated, stats.failed) == (1, 1)
+    assert results[1].error.startswith('ValueError')
+    with open(results[0].path, 'rb') as file_obj:
+        assert file_obj.read() == render_spec({})
+
+def test_generate_command(tmp_path, capsys):
+    manifest_path = tmp_path / 'networks.json'
+    manifest_path.write_text(json.dumps(MANIFEST['networks'][:2]))
+    assert cli.main(['generate', str(manifest_path), '--out-dir', str(tmp_path / 'cfg')]) == 0
+    assert '2 generated, 0 failed' in capsys.readouterr().out
+    with open(tmp_path / 'cfg' / 'faces.cfg', 'rb') as file_obj:
+        assert file_obj.read() == render_spec(merge_spec({}, MANIFEST['networks'][1]))
+
+def test_unknown_arguments_are_rejected(tmp_path):
+    with pytest.raises(SystemExit):
+        cli.main(['generate', 'networks.json', '--bogus'])
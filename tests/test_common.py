@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from darknet_config_generator import common
+from darknet_config_generator.common import open_atomic, write_atomic
+
+
+def test_write_atomic_replaces_the_target(tmp_path):
+    path = tmp_path / 'net.cfg'
+    path.write_bytes(b'old')
+    write_atomic(str(path), b'new' * 100000)
+    assert path.read_bytes() == b'new' * 100000
+    assert os.listdir(tmp_path) == ['net.cfg']
+
+def test_write_atomic_leaves_the_target_untouched_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / 'net.cfg'
+    path.write_bytes(b'old')
+
+    def failing_write(fd, data):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(common.os, 'write', failing_write)
+    with pytest.raises(OSError):
+        write_atomic(str(path), b'new')
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['net.cfg']
+
+def test_open_atomic_replaces_the_target_on_success(tmp_path):
+    path = tmp_path / 'net.cfg'
+    path.write_bytes(b'old')
+    with open_atomic(str(path), 'w') as file_obj:
+        file_obj.write('first\n')
+        assert path.read_bytes() == b'old'
+        file_obj.write('second\n')
+    assert path.read_text() == 'first\nsecond\n'
+    assert os.listdir(tmp_path) == ['net.cfg']
+
+def test_open_atomic_leaves_the_target_untouched_on_failure(tmp_path):
+    path = tmp_path / 'net.cfg'
+    path.write_bytes(b'old')
+    with pytest.raises(RuntimeError):
+        with open_atomic(str(path)) as file_obj:
+            file_obj.write(b'partial')
+            raise RuntimeError('render failed')
+    assert path.read_bytes() == b'old'
+    assert os.listdir(tmp_path) == ['net.cfg']
+
+def test_open_atomic_creates_missing_targets_only_on_success(tmp_path):
+    path = tmp_path / 'net.cfg'
+    with pytest.raises(ValueError):
+        with open_atomic(str(path)):
+            raise ValueError
+    assert not path.exists()
+    with open_atomic(str(path)) as file_obj:
+        file_obj.write(b'data')
+    assert path.read_bytes() == b'data'
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from darknet_config_generator import yolo_dataset
+from darknet_config_generator.yolo_dataset import (LabelStats, build_dataset, check_network_classes, label_issues,
+                                                   label_path, label_stats, scan_images, split_of)
+from darknet_config_generator.yolo_network import get_yolov3
+
+CLASSES = ['car', 'bus', 'bike']
+
+
+def _make_tree(root, images=20):
+    """ writes images/{a,b}/<n>.jpg with labels/{a,b}/<n>.txt, leaving the last image unlabelled"""
+    for index in range(images):
+        folder = 'a' if index % 2 else 'b'
+        image = root / 'images' / folder / f'{index}.jpg'
+        image.parent.mkdir(parents=True, exist_ok=True)
+        image.write_bytes(b'')
+        if index < images - 1:
+            label = root / 'labels' / folder / f'{index}.txt'
+            label.parent.mkdir(parents=True, exist_ok=True)
+            label.write_text(f'{index % 3} 0.5 0.5 0.2 0.3\n1 0.25 0.25 0.1 0.1\n')
+    return root / 'images'
+
+def _touch(path, content):
+    stat = os.stat(path)
+    path.write_text(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_label_path():
+    assert label_path(os.path.join('data', 'images', 'x', 'a.jpg')) == os.path.join('data', 'labels', 'x', 'a.txt')
+    assert label_path(os.path.join('voc', 'JPEGImages', 'a.png')) == os.path.join('voc', 'labels', 'a.txt')
+    assert label_path(os.path.join('flat', 'a.jpg')) == os.path.join('flat', 'a.txt')
+
+def test_scan_images(tmp_path):
+    records = list(scan_images(str(_make_tree(tmp_path)), workers=4))
+    assert len(records) == 20
+    assert sum(record.label_mtime_ns is None for record in records) == 1
+
+def test_label_stats(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_text('0 0.5 0.5 0.2 0.3\n2 0.5 1.5 0.2 0.3\n1.5 0.5 0.5 0 0.3\n')
+    stats = label_stats(str(path))
+    assert stats == LabelStats(3, 0, 2, 1, 2, False)
+    assert len(label_issues(str(path), stats, num_classes=2)) == 3
+    path.write_text('0 0.5 0.5 0.2\n')
+    assert label_stats(str(path)).malformed
+    path.write_text('')
+    assert label_stats(str(path)) == LabelStats(0, None, None, 0, 0, False)
+
+@pytest.mark.parametrize('text, expected', [
+    ('nan 0.5 0.5 0.1 0.1\n', LabelStats(1, None, None, 1, 0, False)),
+    ('inf 0.5 0.5 0.1 0.1\n1 0.5 0.5 0.1 0.1\n', LabelStats(2, 1, 1, 1, 0, False)),
+    ('1e30 0.5 0.5 0.1 0.1\n0 0.5 0.5 0.1 0.1\n', LabelStats(2, 0, 0, 1, 0, False)),
+    ('0 nan 0.5 0.1 0.1\n', LabelStats(1, 0, 0, 0, 1, False)),
+    ('0 0.5 0.5 inf 0.1\n', LabelStats(1, 0, 0, 0, 1, False)),
+])
+def test_label_stats_of_non_finite_values(tmp_path, text, expected):
+    path = tmp_path / 'a.txt'
+    path.write_text(text)
+    stats = label_stats(str(path))
+    assert stats == expected
+    assert label_issues(str(path), stats, num_classes=2)
+
+def test_non_finite_labels_are_reported_as_issues(tmp_path):
+    root, out = _make_tree(tmp_path), tmp_path / 'out'
+    (tmp_path / 'labels' / 'a' / '1.txt').write_text('nan 0.5 0.5 0.1 0.1\n')
+    (tmp_path / 'labels' / 'a' / '3.txt').write_text('0 nan 0.5 0.1 0.1\n')
+    stats = build_dataset(str(root), str(out), CLASSES, workers=4, strict=False)
+    assert len(stats.issues) == 2
+    assert 'not finite integers' in ' '.join(stats.issues) and 'non-finite coordinates' in ' '.join(stats.issues)
+
+def test_split_is_deterministic_and_stable():
+    names = [f'dir/{index}.jpg' for index in range(2000)]
+    splits = [split_of(name, 0.1) for name in names]
+    assert splits == [split_of(name, 0.1) for name in names]
+    assert 100 < splits.count('valid') < 300
+
+def test_build_dataset(tmp_path):
+    out = tmp_path / 'out'
+    stats = build_dataset(str(_make_tree(tmp_path)), str(out), CLASSES, network=get_yolov3(num_classes=3), workers=4)
+    assert (stats.images, stats.boxes, stats.missing_labels, stats.validated, stats.cached) == (20, 38, 1, 19, 0)
+    assert stats.train + stats.valid == 20 and not stats.issues
+    train = (out / 'train.txt').read_text().split()
+    valid = (out / 'valid.txt').read_text().split()
+    assert len(train) + len(valid) == 20 and all(os.path.isabs(path) for path in train + valid)
+    assert (out / 'obj.names').read_text().split() == CLASSES
+    assert 'classes = 3' in (out / 'obj.data').read_text()
+
+def test_rebuild_only_reads_touched_labels(tmp_path, monkeypatch):
+    root, out = _make_tree(tmp_path), tmp_path / 'out'
+    build_dataset(str(root), str(out), CLASSES, workers=4)
+
+    read = []
+    original = yolo_dataset.label_stats
+    monkeypatch.setattr(yolo_dataset, 'label_stats', lambda path: read.append(path) or original(path))
+    touched = tmp_path / 'labels' / 'a' / '3.txt'
+    _touch(touched, '0 0.5 0.5 0.2 0.3\n')
+    stats = build_dataset(str(root), str(out), CLASSES, workers=4)
+    assert read == [str(touched)]
+    assert (stats.validated, stats.cached, stats.boxes) == (1, 18, 37)
+
+    read.clear()
+    assert build_dataset(str(root), str(out), CLASSES, workers=4, use_cache=False).validated == 19
+    assert len(read) == 19
+
+def test_invalid_labels(tmp_path):
+    root, out = _make_tree(tmp_path), tmp_path / 'out'
+    (tmp_path / 'labels' / 'a' / '1.txt').write_text('7 0.5 0.5 0.2 0.3\n')
+    with pytest.raises(ValueError, match='1 label issues'):
+        build_dataset(str(root), str(out), CLASSES, workers=4)
+    assert not (out / 'train.txt').exists()
+    stats = build_dataset(str(root), str(out), CLASSES, workers=4, strict=False, require_labels=True)
+    assert len(stats.issues) == 2 and (out / 'train.txt').exists()
+
+def test_check_network_classes():
+    check_network_classes(get_yolov3(num_classes=3), 3)
+    with pytest.raises(ValueError, match='classes=80') as error:
+        check_network_classes(get_yolov3(), 3)
+    assert str(error.value).count('\n') == 5
+    with pytest.raises(ValueError, match='no \\[yolo\\] layers'):
+        check_network_classes([], 3)
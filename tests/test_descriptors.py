@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+from darknet_config_generator.common import NL
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_layers import *
+from darknet_config_generator.yolo_metrics import Loss
+from darknet_config_generator.yolo_optimizers import ScheduledLRDecay, YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+
+OPTIMIZER = ('\n# Optimization Parameters\nbatch=64\nsubdivisions=64\ndecay=0.0005\nlearning_rate=0.001\nmomentum=0.9\n'
+             'burn_in=2000\nmax_batches=160000\npolicy=steps\nsteps=400000,450000\nscales=0.1,0.1\n\n')
+IMAGE_AUGMENTATION = '\n# Image Augementation Parameters\nhue=0.1\nsaturation=1.5\nexposure=1.5\nangle=0\n\n'
+
+# renders of every descriptor built with its default arguments
+DEFAULT_RENDERS = [
+    (ConvolutionLayer, '\n[convolutional]\nbatch_normalize=1\nsize=1\nstride=3\npad=1\nfilters=255\nactivation=leaky\n\n'),
+    (SoftmaxLayer, '\n[softmax]\ngroups=1\n\n'),
+    (MaxPoolingLayer, '\n[maxpool]\nsize=3\nstride=2\npadding=0\n\n'),
+    (FullyConnectedLayer, '\n[connected]\noutput=1000\nactivation=linear\n\n'),
+    (DropOutLayer, '\n[dropout]\nprobability=0.5\n\n'),
+    (YOLOLayer, '\n[yolo]\nmask=6,7,8\nanchors=10,13, 16,30, 33,23, 30,61, 62,45, 59,119, 116,90, 156,198, 373,326\n'
+                'classes=80\nnum=9\njitter=0.5\nignore_thresh=0.5\ntruth_thresh=1.0\nrandom=1\n'),
+    (UpsampleLayer, '\n[upsample]\nstride=2\n\n'),
+    (RouteConnection, '\n[route]\nlayers=-4\n\n'),
+    (SkipConnection, '\n[shortcut]\nfrom=-3\nactivation=Activations.LINEAR\n\n'),
+    (ScheduledLRDecay, '\n# LR Policy\npolicy=steps\nsteps=400000,450000\nscales=0.1,0.1\n'),
+    (YOLOOptimizer, OPTIMIZER),
+    (YOLOImageAugmentation, IMAGE_AUGMENTATION),
+    (Loss, '\n[cost]\ntype=\n\n'),
+    (YOLONetwork, '[net]\n# Network Dimensions\nwidth=608\nheight=608\nchannels=3\n\n' + OPTIMIZER + IMAGE_AUGMENTATION),
+]
+
+
+@pytest.mark.parametrize('descriptor, expected', DEFAULT_RENDERS, ids=[cls.__name__ for cls, _ in DEFAULT_RENDERS])
+def test_default_renders_are_unchanged(descriptor, expected):
+    assert descriptor().render() == expected.replace('\n', NL)
+
+def test_defaults_are_not_shared():
+    first, second = YOLONetwork(), YOLONetwork()
+    assert first.optimizer is not second.optimizer and first.img_aug is not second.img_aug
+    assert first.layers is not second.layers
+    first.optimizer.lr_decay_schedule[1000] = 0.5
+    assert 1000 not in second.optimizer.lr_decay_schedule
+    schedule = ScheduledLRDecay()
+    schedule.lr_decay_schedule[1000] = 0.5
+    assert 1000 not in ScheduledLRDecay().lr_decay_schedule
+
+    layer = YOLOLayer()
+    layer.anchors.append(1)
+    layer.masks.append(9)
+    assert YOLOLayer().render() == DEFAULT_RENDERS[5][1].replace('\n', NL)
+    route = RouteConnection()
+    route.layers.append(-1)
+    assert RouteConnection().layers == [-4]
+
+@pytest.mark.parametrize('descriptor, expected', DEFAULT_RENDERS[:-1], ids=[cls.__name__ for cls, _ in DEFAULT_RENDERS[:-1]])
+def test_export_writes_the_render(descriptor, expected):
+    file_obj = io.StringIO()
+    descriptor().export(file_obj)
+    assert file_obj.getvalue() == expected.replace('\n', NL)
+
+def test_network_render_bytes_and_generate_config(tmp_path):
+    network = YOLONetwork(layers=[ConvolutionLayer(), YOLOLayer()])
+    assert network.render_bytes() == network.render().encode('utf-8')
+    assert network.render() == ''.join(network.iter_sections())
+    path = tmp_path / 'net.cfg'
+    network.generate_config(str(path))
+    assert path.read_bytes() == network.render_bytes()
+    assert [entry.name for entry in tmp_path.iterdir()] == ['net.cfg']
@@ -0,0 +1,37 @@
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_export import MultiTargetExporter, inference_optimizer, standard_variants
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+
+
+def test_variants_match_direct_renders(tmp_path, yolov3_network):
+    exporter = MultiTargetExporter(yolov3_network)
+    variants = standard_variants(yolov3_network, resolutions=[(320, 320, 3)])
+    paths = exporter.export(variants, str(tmp_path / 'cfg'))
+    assert sorted(paths) == ['test', 'test_320x320', 'train']
+
+    with open(paths['train'], 'rb') as file_obj:
+        assert file_obj.read() == yolov3_network.render_bytes()
+    with open(paths['test_320x320']) as file_obj:
+        text = file_obj.read()
+    assert 'width=320' in text and 'batch=1\n' in text and 'subdivisions=1\n' in text
+    assert yolov3_network.optimizer.batch == 64
+
+    test = YOLONetwork(input_dim=(320, 320, 3), image_augmentation=yolov3_network.img_aug,
+                       optimizer=variants[1].optimizer, layers=yolov3_network.layers)
+    assert text == test.render()
+
+def test_invalidate_picks_up_layer_edits(yolov3_network):
+    exporter = MultiTargetExporter(yolov3_network)
+    variant = standard_variants(yolov3_network)[0]
+    exporter.render(variant)
+    yolov3_network.layers[0].filters = 48
+    assert exporter.render(variant) != yolov3_network.render()
+    exporter.invalidate()
+    assert exporter.render(variant) == yolov3_network.render()
+
+def test_inference_optimizer_shares_no_state_with_the_training_optimizer():
+    training = YOLOOptimizer()
+    inference = inference_optimizer(training)
+    assert (inference.batch, inference.subdivisions) == (1, 1) and training.batch == 64
+    inference.lr_decay_schedule[1000] = 0.5
+    assert 1000 not in training.lr_decay_schedule
@@ -0,0 +1,57 @@
+import pickle
+
+import pytest
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_frozen import FrozenDict, NetworkSpec, freeze, thaw
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+from darknet_config_generator.yolo_network import get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+
+
+def test_identical_layers_are_interned():
+    first, second = freeze(ConvolutionLayer(filters=64)), freeze(ConvolutionLayer(filters=64))
+    assert first is second
+    assert isinstance(first, ConvolutionLayer)
+    assert first.render() == ConvolutionLayer(filters=64).render()
+    assert pickle.loads(pickle.dumps(first)) is first
+
+def test_equal_values_of_different_types_are_not_merged():
+    as_int = freeze(YOLOLayer(truth_thresh=1))
+    as_float = freeze(YOLOLayer(truth_thresh=1.0))
+    as_bool = freeze(YOLOLayer(truth_thresh=True))
+    assert len({id(as_int), id(as_float), id(as_bool)}) == 3
+    assert as_int != as_float
+    assert 'truth_thresh=1.0\n' in as_float.render()
+    assert 'truth_thresh=1\n' in as_int.render()
+    assert 'truth_thresh=True\n' in as_bool.render()
+    assert freeze(YOLOLayer(anchors=[1.0, 2])) is not freeze(YOLOLayer(anchors=[1, 2]))
+
+def test_frozen_dict_hash_ignores_order():
+    first, second = FrozenDict([(1, 0.1), (2, 0.2)]), FrozenDict([(2, 0.2), (1, 0.1)])
+    assert first == second and hash(first) == hash(second)
+    with pytest.raises(TypeError):
+        first[3] = 0.3
+
+def test_frozen_layers_are_read_only():
+    layer = freeze(YOLOLayer())
+    with pytest.raises(AttributeError):
+        layer.classes = 3
+    edited = layer.replace(classes=3)
+    assert edited.classes == 3 and layer.classes == 80
+    assert edited is freeze(YOLOLayer(num_classes=3))
+    with pytest.raises(ValueError):
+        layer.replace(filters=3)
+    mutable = thaw(edited)
+    mutable.masks.append(9)
+    assert type(mutable) is YOLOLayer and edited.masks == (6, 7, 8)
+
+def test_network_specs_share_unchanged_layers():
+    network = YOLONetwork(optimizer=YOLOOptimizer(), layers=get_yolov3())
+    spec = NetworkSpec.from_network(network)
+    assert spec.render() == network.render()
+    edited = spec.replace_layer(12, filters=300)
+    assert edited[12].filters == 300 and spec[12].filters == 256
+    assert all(edited[index] is spec[index] for index in range(len(spec)) if index != 12)
+    assert edited != spec and NetworkSpec.from_network(network) == spec
+    assert hash(NetworkSpec.from_network(network)) == hash(spec)
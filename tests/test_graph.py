@@ -0,0 +1,63 @@
+import pytest
+
+from darknet_config_generator.yolo_connections import RouteConnection, SkipConnection
+from darknet_config_generator.yolo_graph import GraphError, NetworkBuilder, validate_layers
+from darknet_config_generator.yolo_layers import ConvolutionLayer, UpsampleLayer
+
+
+def _builder():
+    builder = NetworkBuilder(input_dim=(64, 64, 3))
+    builder.add(ConvolutionLayer(size=3, stride=1, filters=16), name='stem')
+    builder.add(ConvolutionLayer(size=1, stride=1, filters=8))
+    builder.add(ConvolutionLayer(size=3, stride=1, filters=16))
+    return builder
+
+
+def test_names_resolve_to_darknet_indices():
+    builder = _builder()
+    builder.add(SkipConnection(from_layer='stem'))
+    builder.add(ConvolutionLayer(size=3, stride=2, filters=32), name='down')
+    builder.add(UpsampleLayer())
+    builder.add(RouteConnection(layers=[-1, 'stem']))
+    layers = builder.build()
+    assert layers[3].from_layer == -3
+    assert layers[6].layers == [-1, 0]
+    assert builder.layers[6].layers == [-1, 'stem']
+    assert validate_layers(layers, (64, 64, 3))[-1] == (64, 64, 48)
+
+@pytest.mark.parametrize('extra_layers, expected', [(0, -3), (1, -4), (3, -6)])
+def test_added_layers_keep_references(extra_layers, expected):
+    builder = NetworkBuilder(input_dim=(64, 64, 3))
+    builder.add(ConvolutionLayer(size=3, stride=1, filters=16), name='stem')
+    builder.extend([ConvolutionLayer(size=1, stride=1, filters=16) for _ in range(extra_layers)])
+    builder.extend([ConvolutionLayer(size=1, stride=1, filters=8), ConvolutionLayer(size=3, stride=1, filters=16)])
+    builder.add(SkipConnection(from_layer='stem'))
+    assert builder.build()[-1].from_layer == expected
+
+def test_duplicate_names_leave_the_builder_unchanged():
+    builder = _builder()
+    with pytest.raises(GraphError, match="'stem' is already used by layer 0"):
+        builder.add(ConvolutionLayer(size=1, stride=1, filters=16), name='stem')
+    with pytest.raises(GraphError):
+        builder.extend([ConvolutionLayer(size=1, stride=1, filters=16)], name='stem')
+    assert len(builder) == 3 and builder.index('stem') == 0
+    assert builder.add(SkipConnection(from_layer='stem'), name='skip') == 3
+    assert builder.build()[-1].from_layer == -3
+
+def test_errors_are_collected():
+    builder = _builder()
+    builder.add(RouteConnection(layers=['missing']))
+    builder.add(ConvolutionLayer(size=3, stride=2, filters=16), name='down')
+    builder.add(SkipConnection(from_layer='stem'))
+    with pytest.raises(GraphError) as error:
+        builder.build()
+    assert 'missing' in error.value.errors[0]
+
+def test_shape_mismatches_are_reported():
+    builder = _builder()
+    builder.add(ConvolutionLayer(size=3, stride=2, filters=16))
+    builder.add(SkipConnection(from_layer='stem'))
+    with pytest.raises(GraphError) as error:
+        builder.build()
+    assert "'stem'" not in error.value.errors[0] and '[shortcut]' in error.value.errors[0]
+    assert len(builder.build(validate=False)) == 5
@@ -0,0 +1,63 @@
+import pytest
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_frozen import freeze
+from darknet_config_generator.yolo_ir import NetworkIR
+from darknet_config_generator.yolo_layers import ConvolutionLayer
+from darknet_config_generator.yolo_network import get_yolov3
+
+INPUT_DIM = (416, 416, 3)
+
+
+def assert_matches_analysis(ir):
+    cost = analyze(ir.layers, INPUT_DIM)
+    assert ir.total_params == cost.total_params[0]
+    assert ir.total_bflops == pytest.approx(cost.total_bflops[0])
+    assert ir.issues == cost.issues
+    assert [ir.output_shape(index)[2] for index in range(len(ir))] == [layer.out_c for layer in cost.layers]
+
+
+def test_updates_recompute_only_affected_nodes():
+    ir = NetworkIR(get_yolov3(), INPUT_DIM)
+    assert_matches_analysis(ir)
+    ir.update(9, filters=96)
+    assert ir.recomputed <= 3
+    assert_matches_analysis(ir)
+    ir.update(1, stride=1)
+    assert ir.recomputed > 90
+    assert_matches_analysis(ir)
+    with pytest.raises(ValueError):
+        ir.update(9, bogus=1)
+
+@pytest.mark.parametrize('frozen', [False, True])
+def test_insert_rewires_crossing_references(frozen):
+    layers = get_yolov3()
+    original = ''.join(layer.render() for layer in layers)
+    ir = NetworkIR([freeze(layer) for layer in layers] if frozen else layers, INPUT_DIM)
+
+    ir.insert(3, ConvolutionLayer(size=3, stride=1, filters=32))
+    assert ir.layers[5].from_layer == -4 and ir.layers[9].from_layer == -3
+    assert list(ir.layers[87].layers) == [-1, 62] and list(ir.layers[99].layers) == [-1, 37]
+    assert ir.issues == []
+    assert_matches_analysis(ir)
+
+    ir.insert(82, ConvolutionLayer(size=1, stride=1, filters=512))
+    assert list(ir.layers[85].layers) == [-5]
+    assert_matches_analysis(ir)
+
+    ir.delete(82)
+    ir.delete(3)
+    assert ''.join(layer.render() for layer in ir.layers) == original
+    assert_matches_analysis(ir)
+
+def test_deleting_a_referenced_layer_raises():
+    ir = NetworkIR(get_yolov3(), INPUT_DIM)
+    before = ''.join(layer.render() for layer in ir.layers)
+    with pytest.raises(ValueError):
+        ir.delete(61)
+    assert ''.join(layer.render() for layer in ir.layers) == before
+    with pytest.raises(IndexError):
+        ir.delete(len(ir))
+
+def test_layer_lists_default_the_input_dim():
+    assert NetworkIR(get_yolov3()).input_shape == (608, 608, 3)
@@ -0,0 +1,112 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from darknet_config_generator.yolo_logs import (LogParser, LogTailer, apply_suggestion, find_plateaus, parse_log,
+                                                suggest_schedule)
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+
+
+def _iteration(index, loss, avg_loss, rate=0.001, regions=()):
+    lines = [f'Region Avg IOU: {iou}, Class: 0.5, Obj: 0.5, No Obj: 0.01, Avg Recall: 0.5,  count: {count}'
+             for iou, count in regions]
+    lines.append(f'{index}: {loss:f}, {avg_loss:f} avg loss, {rate:f} rate, 5.603279 seconds, {index * 64} images')
+    return '\n'.join(lines) + '\n'
+
+def _log_text(avg_losses, rate=0.001):
+    return ''.join(_iteration(index + 1, loss, loss, rate) for index, loss in enumerate(avg_losses))
+
+def _plateau_losses():
+    """ avg loss falling for 3000 iterations, flat for 3000, falling again, then flat"""
+    return np.concatenate([np.linspace(10, 4, 3000), np.full(3000, 4.0), np.linspace(4, 2, 3000), np.full(3000, 2.0)])
+
+
+def test_parser_reads_summary_and_region_lines():
+    text = (_iteration(1, 3.182913, 3.521027, regions=[(0.5, 2), (0.25, 2), ('nan', 0)])
+            + 'Loaded: 0.000035 seconds\n'
+            + _iteration(2, 3.0, 3.5))
+    parser = LogParser()
+    assert parser.feed(text.encode()) == 2
+    log = parser.log
+    np.testing.assert_array_equal(log.iteration, [1, 2])
+    np.testing.assert_allclose(log.loss, [3.182913, 3.0])
+    np.testing.assert_allclose(log.avg_loss, [3.521027, 3.5])
+    np.testing.assert_array_equal(log.images, [64, 128])
+    assert log.iou[0] == pytest.approx(0.375) and np.isnan(log.iou[1])
+
+def test_parser_keeps_incomplete_lines_until_more_data_arrives():
+    data = _log_text([5.0, 4.0, 3.0]).encode()
+    parser = LogParser(iou=False)
+    parsed = sum(parser.feed(data[offset:offset + 7]) for offset in range(0, len(data), 7))
+    assert parsed == 3 and len(parser) == 3
+    np.testing.assert_allclose(parser.log.avg_loss, [5.0, 4.0, 3.0])
+
+def test_parser_reads_diverged_losses():
+    parser = LogParser()
+    assert parser.feed(b'1: nan, inf avg loss, 0.001000 rate, 1.0 seconds, 64 images\n') == 1
+    assert np.isnan(parser.log.loss[0]) and np.isinf(parser.log.avg_loss[0])
+
+def test_parse_log_matches_incremental_parsing(tmp_path):
+    path = tmp_path / 'train.log'
+    path.write_text(_log_text(np.linspace(10, 1, 500)))
+    whole = parse_log(str(path))
+    chunked = parse_log(str(path), chunk_size=100)
+    assert len(whole.iteration) == 500
+    for column in ('iteration', 'avg_loss', 'rate'):
+        np.testing.assert_array_equal(getattr(whole, column), getattr(chunked, column))
+
+def test_parse_empty_log(tmp_path):
+    path = tmp_path / 'train.log'
+    path.write_text('')
+    assert len(parse_log(str(path)).iteration) == 0
+
+def test_tailer_follows_appended_and_truncated_logs(tmp_path):
+    path = tmp_path / 'train.log'
+    tailer = LogTailer(str(path))
+    assert tailer.poll() == 0
+    path.write_text(_log_text([5.0, 4.0]))
+    assert tailer.poll() == 2
+    with open(path, 'a') as file_obj:
+        file_obj.write(_iteration(3, 3.0, 3.0))
+    assert tailer.poll() == 1 and list(tailer.log.iteration) == [1, 2, 3]
+    path.write_text(_iteration(1, 9.0, 9.0))
+    assert tailer.poll() == 1 and list(tailer.log.iteration) == [1]
+
+def test_find_plateaus(tmp_path):
+    path = tmp_path / 'train.log'
+    path.write_text(_log_text(_plateau_losses()))
+    plateaus = find_plateaus(parse_log(str(path)), window=1000)
+    assert len(plateaus) == 2
+    assert 3000 <= plateaus[0] <= 4000 and 9000 <= plateaus[1] <= 10000
+
+def test_suggest_and_apply_schedule(tmp_path):
+    path = tmp_path / 'train.log'
+    path.write_text(_log_text(_plateau_losses()))
+    log = parse_log(str(path))
+    suggestion = suggest_schedule(log, burn_in=1000, window=1000, max_steps=1)
+    assert len(suggestion.lr_decay_schedule) == 1 and suggestion.learning_rate is None
+    optimizer = apply_suggestion(YOLOOptimizer(lr_decay_schedule={}), suggestion)
+    assert optimizer.lr_decay_schedule == suggestion.lr_decay_schedule
+
+def test_suggest_halves_the_rate_after_divergence():
+    parser = LogParser()
+    parser.feed((_log_text([3.0, 2.0], rate=0.004) + '3: nan, nan avg loss, 0.004000 rate, 1.0 seconds, 192 images\n')
+                .encode())
+    suggestion = suggest_schedule(parser.log)
+    assert suggestion.learning_rate == pytest.approx(0.002)
+    assert 'diverged at iteration 3' in suggestion.reasons[-1]
+
+def test_region_lines_without_a_numeric_iou_are_skipped():
+    text = ('Region Avg IOU: -nan(ind), Class: 0.5, Obj: 0.5, No Obj: 0.01, Avg Recall: 0.5,  count: 3\n'
+            + _iteration(1, 3.0, 3.0, regions=[(0.5, 1)]))
+    parser = LogParser()
+    assert parser.feed(memoryview(text.encode())) == 1
+    assert parser.log.iou[0] == pytest.approx(0.5)
+
+def test_parsing_well_formed_logs_does_not_warn():
+    parser = LogParser()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        parser.feed(_iteration(1, 3.0, 3.0, regions=[(0.5, 2), ('-nan', 0)]).encode())
+    assert parser.log.iou[0] == pytest.approx(0.5)
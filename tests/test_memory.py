@@ -0,0 +1,39 @@
+import pytest
+
+from darknet_config_generator.yolo_memory import estimate_memory, plan_memory, random_resize_dims
+from darknet_config_generator.yolo_network import get_yolov3
+
+GB = 1 << 30
+
+
+def test_random_resize_rounds_up_to_the_stride():
+    assert random_resize_dims((416, 416, 3)).tolist() == [[608, 608, 3]]
+
+def test_activations_grow_with_resolution():
+    estimate = estimate_memory(get_yolov3(), [(320, 320, 3), (416, 416, 3)])
+    assert estimate.weight_bytes[0] == estimate.weight_bytes[1] == 62001757 * 4 * 2
+    assert estimate.activation_bytes_per_image[0] < estimate.activation_bytes_per_image[1]
+
+@pytest.mark.parametrize('prefer', ['resolution', 'mini_batch'])
+def test_plan_fits_the_budget(yolov3_network, prefer):
+    plan = plan_memory(yolov3_network, 8 * GB, prefer=prefer)
+    assert plan.estimated_bytes <= 8 * GB
+    assert plan.batch % plan.subdivisions == 0
+    assert plan.effective_batch == plan.batch * yolov3_network.optimizer.num_gpus
+
+def test_preferences_trade_resolution_for_mini_batch(yolov3_network):
+    by_resolution = plan_memory(yolov3_network, 8 * GB, prefer='resolution')
+    by_mini_batch = plan_memory(yolov3_network, 8 * GB, prefer='mini_batch')
+    assert by_resolution.input_dim[0] >= by_mini_batch.input_dim[0]
+    assert by_mini_batch.mini_batch >= by_resolution.mini_batch
+    assert plan_memory(yolov3_network, 16 * GB).input_dim[0] >= by_resolution.input_dim[0]
+
+def test_plan_is_applied_to_the_network(yolov3_network):
+    plan = plan_memory(yolov3_network, 4 * GB)
+    plan.apply(yolov3_network)
+    assert yolov3_network.input_dim == plan.input_dim
+    assert f'subdivisions={plan.subdivisions}' in yolov3_network.render()
+
+def test_infeasible_budget_raises(yolov3_network):
+    with pytest.raises(ValueError):
+        plan_memory(yolov3_network, 100 << 20)
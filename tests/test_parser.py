@@ -0,0 +1,43 @@
+import os
+
+from darknet_config_generator.yolo_layers import ConvolutionLayer, YOLOLayer
+from darknet_config_generator.yolo_parser import DarknetConfig, UnparsedSection, iter_layers, iter_sections, load_config
+
+from conftest import EXAMPLE_CFG
+
+
+def test_example_config_round_trips():
+    with open(EXAMPLE_CFG) as file_obj:
+        text = file_obj.read()
+    assert load_config(EXAMPLE_CFG).render() == text
+
+def test_generated_config_round_trips(yolov3_cfg, yolov3_network):
+    network = load_config(yolov3_cfg)
+    assert network.render() == yolov3_network.render()
+    assert network.input_dim == (416, 416, 3)
+    assert len(network.layers) == len(yolov3_network.layers)
+
+def test_indexed_access_matches_eager_load(yolov3_cfg):
+    eager = load_config(yolov3_cfg)
+    with DarknetConfig(yolov3_cfg) as config:
+        assert config.num_layers == len(eager.layers)
+        assert isinstance(config.layer(0), ConvolutionLayer)
+        assert config.layer(0) is config.layer(0)
+        assert isinstance(config.layer(config.num_layers - 1), YOLOLayer)
+        assert config.to_network().render() == eager.render()
+
+def test_unknown_sections_are_kept():
+    layers = list(iter_layers(['[net]', 'width=416', '[mystery]', 'alpha=1', 'beta=a,b']))
+    assert len(layers) == 1
+    assert isinstance(layers[0], UnparsedSection)
+    assert layers[0].__HEADER__ == '[mystery]'
+    assert '[mystery]' in layers[0].render() and 'beta=a,b' in layers[0].render()
+
+def test_streamed_and_indexed_sections_agree(yolov3_cfg):
+    with open(yolov3_cfg) as file_obj:
+        streamed = list(iter_sections(file_obj))
+    with DarknetConfig(yolov3_cfg) as config:
+        indexed = list(config.iter_sections())
+        assert config.offsets[0] == 0 and config.offsets[-1] == os.path.getsize(yolov3_cfg)
+    assert [section.index for section in streamed] == list(range(len(streamed)))
+    assert streamed == indexed
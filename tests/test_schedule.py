@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from darknet_config_generator.common import LearningRateDecayPolicy
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_parser import load_config
+from darknet_config_generator.yolo_schedule import Schedule, simulate, simulate_many, summarize, validate_schedule
+
+
+def _optimizer(**options):
+    options = {'learning_rate': 0.01, 'num_gpus': 1, 'burn_in': 100, 'batches_per_class': 1000, 'num_classes': 1,
+               'lr_decay_schedule': {400: 0.1, 800: 0.1}, **options}
+    return YOLOOptimizer(**options)
+
+def _round_trip(optimizer, tmp_path):
+    path = tmp_path / 'net.cfg'
+    path.write_text(YOLONetwork(input_dim=(416, 416, 3), optimizer=optimizer, layers=[]).render())
+    return load_config(str(path)).optimizer
+
+
+def test_default_optimizer_does_not_render_power():
+    assert 'power=' not in YOLOOptimizer().render()
+
+@pytest.mark.parametrize('options', [
+    {'power': 2},
+    {'power': 1, 'policy': LearningRateDecayPolicy.POLY},
+    {'power': 4, 'policy': LearningRateDecayPolicy.POLY},
+    {'power': 0.5, 'burn_in': 0},
+    {},
+])
+def test_simulator_matches_the_rendered_config(options, tmp_path):
+    optimizer = _optimizer(**options)
+    parsed = _round_trip(optimizer, tmp_path)
+    assert parsed.power == optimizer.power and parsed.burn_in == optimizer.burn_in
+    np.testing.assert_array_equal(simulate(parsed), simulate(optimizer))
+
+def test_steps_schedule():
+    lr = simulate(_optimizer(power=2))
+    assert lr.dtype == np.float32 and lr.shape == (1000,)
+    assert lr[0] == 0 and lr[50] == pytest.approx(0.01 * 0.5 ** 2)
+    assert lr[100] == pytest.approx(0.01) and lr[399] == pytest.approx(0.01)
+    assert lr[400] == pytest.approx(0.001) and lr[999] == pytest.approx(0.0001)
+
+def test_poly_schedule():
+    lr = simulate(_optimizer(policy=LearningRateDecayPolicy.POLY, power=1, burn_in=0))
+    np.testing.assert_allclose(lr, 0.01 * (1 - np.arange(1000) / 1000), rtol=1e-6)
+
+def test_simulate_many_pads_shorter_schedules_with_nan():
+    lr = simulate_many([_optimizer(), _optimizer(batches_per_class=500)])
+    assert lr.shape == (2, 1000)
+    assert np.isnan(lr[1, 500:]).all() and not np.isnan(lr[0]).any()
+    np.testing.assert_array_equal(lr[1, :500], simulate(_optimizer(batches_per_class=500)))
+
+def test_unsorted_steps_apply_after_the_larger_step():
+    schedule = Schedule(learning_rate=1.0, max_batches=100, burn_in=0, policy=LearningRateDecayPolicy.SCHEDULED,
+                        steps=(50, 20), scales=(0.5, 0.5), power=4)
+    lr = simulate(schedule)
+    assert lr[30] == 1.0 and lr[50] == 0.25
+    assert any('sort the schedule' in issue for issue in validate_schedule(schedule))
+
+def test_validate_schedule():
+    assert validate_schedule(_optimizer()) == []
+    issues = validate_schedule(_optimizer(lr_decay_schedule={50: 0.1, 2000: 0.1}))
+    assert any('inside burn_in' in issue for issue in issues)
+    assert any('never reached' in issue for issue in issues)
+
+def test_summarize_phases():
+    summary = summarize(_optimizer())
+    assert [(phase['start'], phase['end']) for phase in summary['phases']] == [(0, 100), (100, 400), (400, 800),
+                                                                                (800, 1000)]
+    assert summary['phases'][0]['kind'] == 'burn_in'
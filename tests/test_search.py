@@ -0,0 +1,58 @@
+import json
+import os
+import random
+
+import pytest
+
+from darknet_config_generator.yolo_analysis import analyze
+from darknet_config_generator.yolo_network import get_scaled_yolov3, get_yolov3
+from darknet_config_generator.yolo_search import (Candidate, Evaluation, breed, evaluate, make_candidate, pareto_front,
+                                                  search, write_front)
+from darknet_config_generator.yolo_spec import render_spec
+
+
+def test_unit_multiples_are_yolov3():
+    render = lambda layers: ''.join(layer.render() for layer in layers)
+    assert render(get_scaled_yolov3(num_classes=3)) == render(get_yolov3(num_classes=3))
+
+def test_scaled_yolov3_costs_less():
+    full = analyze(get_yolov3(), (416, 416, 3))
+    small = analyze(get_scaled_yolov3(depth_multiple=0.33, width_multiple=0.5), (416, 416, 3))
+    assert small.total_bflops[0] < full.total_bflops[0] / 3
+    assert small.total_params[0] < full.total_params[0] / 3
+
+def test_scaled_spec_renders():
+    data = render_spec({'architecture': 'yolov3', 'num_classes': 3, 'depth_multiple': 0.33, 'width_multiple': 0.25})
+    assert data.count(b'[shortcut]') == sum(max(1, round(repeats * 0.33)) for repeats in (1, 2, 8, 8, 4))
+    assert b'filters=24\n' in data
+
+def test_make_candidate_snaps_to_the_space():
+    assert make_candidate(0.333, 2.0, 430) == Candidate(0.35, 1.25, 416)
+    rng = random.Random(0)
+    for child in (breed([Candidate(0.5, 0.5, 416)], rng) for _ in range(50)):
+        assert child.resolution % 32 == 0 and 0.2 <= child.depth_multiple <= 1.35
+
+def test_vectorized_evaluation_matches_single_analyses():
+    candidates = [Candidate(0.5, 0.5, 320), Candidate(0.5, 0.75, 416), Candidate(1.0, 1.0, 608)]
+    for evaluation in evaluate(candidates, num_classes=3):
+        candidate = evaluation.candidate
+        layers = get_scaled_yolov3(num_classes=3, depth_multiple=candidate.depth_multiple,
+                                   width_multiple=candidate.width_multiple)
+        cost = analyze(layers, (candidate.resolution, candidate.resolution, 3))
+        assert evaluation.params == cost.total_params[0]
+        assert evaluation.bflops == pytest.approx(cost.total_bflops[0])
+
+def test_pareto_front():
+    evaluations = [Evaluation(Candidate(0, 0, index), score, params, bflops)
+                   for index, (score, params, bflops) in enumerate([(1, 10, 10), (2, 20, 20), (1, 20, 20), (3, 5, 50)])]
+    assert [evaluation.candidate.resolution for evaluation in pareto_front(evaluations)] == [0, 1, 3]
+
+def test_search_respects_the_budget(tmp_path):
+    result = search(max_bflops=10, num_classes=3, population=32, generations=3, parents=8)
+    assert result.front and all(evaluation.bflops <= 10 for evaluation in result.front)
+    assert result.front == sorted(result.front, key=lambda evaluation: evaluation.bflops)
+
+    paths = write_front(result.front[:2], str(tmp_path), num_classes=3)
+    index = json.loads((tmp_path / 'front.json').read_text())
+    assert [entry['cfg'] for entry in index] == [os.path.basename(path) for path in paths]
+    assert all((tmp_path / entry['cfg']).exists() for entry in index)
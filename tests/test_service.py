@@ -0,0 +1,144 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from darknet_config_generator import yolo_service
+from darknet_config_generator.yolo_service import ConfigService, HTTPError, spec_digest
+from darknet_config_generator.yolo_spec import render_spec
+
+SPEC = {'architecture': 'yolov3', 'num_classes': 3}
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """ holds renders until the event is set"""
+    event = threading.Event()
+
+    def gated_render(spec):
+        event.wait(10)
+        return render_spec(spec)
+
+    monkeypatch.setattr(yolo_service, 'render_spec', gated_render)
+    return event
+
+def _run(scenario, **options):
+    async def main():
+        service = ConfigService(workers=2, **options)
+        try:
+            return await scenario(service)
+        finally:
+            service.close()
+    return asyncio.run(main())
+
+async def _start(service, *specs):
+    """ starts one render task per spec and lets each reach its await"""
+    tasks = [asyncio.ensure_future(service.render(spec)) for spec in specs]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_miss_coalesced_and_hit(gate):
+    async def scenario(service):
+        tasks = await _start(service, SPEC, dict(SPEC))
+        gate.set()
+        (digest, data, first), (_, shared, second) = await asyncio.gather(*tasks)
+        assert (first, second) == ('miss', 'coalesced') and data == shared == render_spec(SPEC)
+        assert digest == spec_digest(SPEC)
+        assert await service.render(SPEC) == (digest, data, 'hit')
+        return service.stats.as_dict()
+
+    stats = _run(scenario)
+    assert (stats['renders'], stats['coalesced'], stats['hits']) == (1, 1, 1)
+
+def test_invalid_spec_is_a_400_for_every_waiter(gate):
+    async def scenario(service):
+        tasks = await _start(service, {'architecture': 'nope'}, {'architecture': 'nope'})
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert [type(result) for result in results] == [HTTPError, HTTPError]
+        assert [result.status for result in results] == [400, 400]
+        assert 'unknown architecture' in str(results[1])
+        assert not service._in_flight and not service._cache
+
+    _run(scenario)
+
+def test_renders_beyond_max_pending_are_rejected(gate):
+    async def scenario(service):
+        tasks = await _start(service, SPEC, {**SPEC, 'num_classes': 4}, dict(SPEC))
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert results[0][2] == 'miss' and results[2][2] == 'coalesced'
+        assert isinstance(results[1], HTTPError) and results[1].status == 503
+        return service.stats.rejected
+
+    assert _run(scenario, max_pending=1) == 1
+
+def test_non_object_bodies_are_rejected():
+    async def scenario(service):
+        with pytest.raises(HTTPError) as error:
+            await service.render([1, 2])
+        return error.value.status
+
+    assert _run(scenario) == 400
+
+
+async def _request(reader, writer, method, path, body=b''):
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, await reader.readexactly(int(headers['content-length']))
+
+def test_http_endpoints():
+    async def scenario(service):
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            body = json.dumps(SPEC).encode()
+            status, headers, data = await _request(reader, writer, 'POST', '/render', body)
+            assert (status, headers['x-cache'], headers['etag']) == (200, 'miss', f'"{spec_digest(SPEC)}"')
+            assert data == render_spec(SPEC)
+            status, headers, _ = await _request(reader, writer, 'POST', '/render', body)
+            assert (status, headers['x-cache']) == (200, 'hit')
+
+            assert (await _request(reader, writer, 'POST', '/render', b'{oops'))[0] == 400
+            assert (await _request(reader, writer, 'GET', '/render'))[0] == 405
+            assert (await _request(reader, writer, 'GET', '/missing'))[0] == 404
+            assert (await _request(reader, writer, 'GET', '/health'))[2] == b'{"status": "ok"}'
+            status, _, data = await _request(reader, writer, 'GET', '/stats')
+            stats = json.loads(data)
+            assert (stats['requests'], stats['renders'], stats['hits'], stats['errors']) == (7, 1, 1, 3)
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    _run(scenario)
+
+@pytest.mark.parametrize('length', ['abc', '-5', '1.5'])
+def test_invalid_content_length_is_a_400(length):
+    async def scenario(service):
+        server = await service.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        try:
+            writer.write(f'POST /render HTTP/1.1\r\nHost: test\r\nContent-Length: {length}\r\n\r\n'.encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            body = (await reader.read()).split(b'\r\n\r\n', 1)[1]
+            return status, json.loads(body)['error'], service.stats.errors
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    status, error, errors = _run(scenario)
+    assert (status, errors) == (400, 1) and 'Content-Length' in error
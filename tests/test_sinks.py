@@ -0,0 +1,67 @@
+import gzip
+import io
+import socket
+import threading
+
+import pytest
+
+from darknet_config_generator.yolo_sinks import FileSink, GzipSink, QueueSink, Sink, SocketSink, stream_to
+
+
+def test_incomplete_sinks_cannot_be_created():
+    class NoWrite(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite()
+
+def test_file_sink_matches_render(tmp_path, yolov3_network):
+    path = tmp_path / 'yolov3.cfg'
+    with FileSink(str(path), buffer_size=100) as sink:
+        written = stream_to(yolov3_network, sink)
+    assert path.read_bytes() == yolov3_network.render_bytes()
+    assert written == len(yolov3_network.render_bytes())
+
+def test_aborted_sinks_leave_the_target_untouched(tmp_path):
+    path = tmp_path / 'net.cfg'
+    path.write_bytes(b'old')
+    with pytest.raises(RuntimeError):
+        with FileSink(str(path)) as sink:
+            sink.write('new')
+            raise RuntimeError
+    assert path.read_bytes() == b'old'
+    assert [entry.name for entry in tmp_path.iterdir()] == ['net.cfg']
+    with pytest.raises(ValueError):
+        sink.write('late')
+
+def test_gzip_sink_is_reproducible(yolov3_network):
+    outputs = []
+    for _ in range(2):
+        buffer = io.BytesIO()
+        with GzipSink(buffer) as sink:
+            stream_to(yolov3_network, sink)
+        outputs.append(buffer.getvalue())
+    assert outputs[0] == outputs[1]
+    assert gzip.decompress(outputs[0]) == yolov3_network.render_bytes()
+
+def test_queue_sink_hands_chunks_to_a_consumer(yolov3_network):
+    sink = QueueSink(max_chunks=2, buffer_size=1024)
+    received = []
+    consumer = threading.Thread(target=lambda: received.extend(sink.chunks()))
+    consumer.start()
+    with sink:
+        stream_to(yolov3_network, sink)
+    consumer.join(timeout=10)
+    assert b''.join(received) == yolov3_network.render_bytes()
+    assert all(len(chunk) >= 1024 for chunk in received[:-1])
+
+def test_socket_sink(yolov3_network):
+    reader, writer = socket.socketpair()
+    received = []
+    consumer = threading.Thread(target=lambda: received.extend(iter(lambda: reader.recv(1 << 16), b'')))
+    consumer.start()
+    with SocketSink(writer, close_socket=True) as sink:
+        stream_to(yolov3_network, sink)
+    consumer.join(timeout=10)
+    reader.close()
+    assert b''.join(received) == yolov3_network.render_bytes()
@@ -0,0 +1,40 @@
+import json
+import tarfile
+import zipfile
+
+from darknet_config_generator.yolo_spec import render_spec
+from darknet_config_generator.yolo_sweep import count_points, iter_points, render_point, run_sweep
+
+BASE_SPEC = {'architecture': 'yolov3', 'num_classes': 3}
+SPACE = {'grid': {'optimizer.learning_rate': [0.001, 0.01], 'augmentation.angle': [0, 0, 10]},
+         'random': {'augmentation.hue': {'choice': [0.1]}}}
+
+
+def test_points_cover_the_grid():
+    points = list(iter_points(SPACE, samples=2, seed=1))
+    assert len(points) == count_points(SPACE, samples=2) == 12
+    assert all(point['augmentation.hue'] == 0.1 for point in points)
+    assert count_points({}) == 1
+    assert list(iter_points(SPACE, samples=2, seed=1)) == points
+
+def test_points_apply_to_the_base_spec():
+    data = render_point(BASE_SPEC, {'optimizer.learning_rate': 0.01})
+    assert b'learning_rate=0.01\n' in data
+    assert data == render_spec({**BASE_SPEC, 'optimizer': {'learning_rate': 0.01}})
+
+def test_sweep_deduplicates_into_a_tar(tmp_path):
+    archive_path = str(tmp_path / 'sweep.tar')
+    stats = run_sweep(BASE_SPEC, SPACE, archive_path, workers=1, chunk_size=2)
+    assert (stats.points, stats.unique, stats.duplicates) == (6, 4, 2)
+    with tarfile.open(archive_path) as archive:
+        names = archive.getnames()
+        manifest = [json.loads(line) for line in archive.extractfile('manifest.jsonl')]
+    assert len(names) == 5
+    assert [entry['index'] for entry in manifest] == list(range(6))
+    assert all(entry['member'] in names for entry in manifest)
+
+def test_sweep_writes_zip_archives(tmp_path):
+    archive_path = str(tmp_path / 'sweep.zip')
+    run_sweep(BASE_SPEC, {'grid': {'num_classes': [1, 2]}}, archive_path, workers=1)
+    with zipfile.ZipFile(archive_path) as archive:
+        assert sorted(name.split('/')[0] for name in archive.namelist()) == ['cfg', 'cfg', 'manifest.jsonl']
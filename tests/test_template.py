@@ -0,0 +1,46 @@
+import pytest
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_layers import ConvolutionLayer
+from darknet_config_generator.yolo_network import get_alexnet, get_yolov3
+from darknet_config_generator.yolo_optimizers import YOLOOptimizer
+from darknet_config_generator.yolo_preprocess import YOLOImageAugmentation
+from darknet_config_generator.yolo_template import compile_template
+
+
+@pytest.mark.parametrize('num_classes', [1, 3, 20, 80, 601])
+def test_template_renders_like_the_network(num_classes):
+    template = compile_template(get_yolov3, input_dim=(416, 416, 3))
+    optimizer, augmentation = YOLOOptimizer(num_classes=num_classes), YOLOImageAugmentation()
+    network = YOLONetwork(input_dim=(416, 416, 3), optimizer=optimizer, image_augmentation=augmentation,
+                          layers=get_yolov3(num_classes=num_classes))
+    assert template.render(num_classes, optimizer, augmentation) == network.render_bytes()
+
+def test_template_slots_are_the_class_dependent_lines():
+    template = compile_template(get_yolov3, input_dim=(416, 416, 3))
+    # three [yolo] classes plus the filters of the three convolutions in front of them
+    assert len(template.slots) == 6
+    assert sorted(template.slots) == [(1, 0)] * 3 + [(3, 15)] * 3
+
+def test_templates_are_memoized_by_architecture_parameters():
+    assert compile_template(get_yolov3, num_anchors=9) is compile_template(get_yolov3, num_anchors=9)
+    assert compile_template(get_yolov3, input_dim=(416, 416, 3)) is not compile_template(get_yolov3)
+
+def test_template_of_a_network_without_yolo_layers():
+    template = compile_template(get_alexnet)
+    for num_classes in (2, 1000):
+        expected = YOLONetwork(optimizer=None, image_augmentation=None, layers=get_alexnet(num_classes)).render_bytes()
+        assert template.render(num_classes) == expected
+
+def test_generate_config(tmp_path):
+    path = tmp_path / 'yolov3_3.cfg'
+    compile_template(get_yolov3).generate_config(str(path), 3, optimizer=YOLOOptimizer(num_classes=3))
+    assert path.read_bytes() == YOLONetwork(optimizer=YOLOOptimizer(num_classes=3), image_augmentation=None,
+                                            layers=get_yolov3(num_classes=3)).render_bytes()
+
+def test_non_linear_architectures_are_rejected():
+    def squared(num_classes=80):
+        return [ConvolutionLayer(filters=num_classes * num_classes)]
+
+    with pytest.raises(ValueError, match='linear'):
+        compile_template(squared)
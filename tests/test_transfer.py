@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from darknet_config_generator.yolo_darknet import YOLONetwork
+from darknet_config_generator.yolo_layers import ConvolutionLayer
+from darknet_config_generator.yolo_network import get_yolov3
+from darknet_config_generator.yolo_transfer import transfer_many, transfer_weights
+from darknet_config_generator.yolo_weights import DarknetWeights, WeightsHeader, pack_header, weights_layout
+
+HEAD_CONVOLUTIONS = [81, 93, 105]
+
+
+def write_source(path, layers):
+    """ writes a weights file whose values are their own positions"""
+    count = weights_layout(layers).total_count
+    with open(path, 'wb') as file_obj:
+        file_obj.write(pack_header(WeightsHeader(0, 2, 5, 123)))
+        for start in range(0, count, 1 << 22):
+            file_obj.write(np.arange(start, min(count, start + (1 << 22)), dtype='<f4').tobytes())
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def yolov3_weights(tmp_path_factory):
+    layers = get_yolov3(num_classes=80)
+    return layers, write_source(tmp_path_factory.mktemp('weights') / 'yolov3.weights', layers)
+
+
+@pytest.mark.parametrize('as_network', [False, True])
+def test_yolov3_80_to_3_classes(tmp_path, yolov3_weights, as_network):
+    source_layers, source_path = yolov3_weights
+    target_layers = get_yolov3(num_classes=3)
+    target = YOLONetwork(layers=target_layers) if as_network else target_layers
+    target_path = str(tmp_path / 'yolov3_3.weights')
+
+    report = transfer_weights(source_layers, source_path, target, target_path)
+    assert report.sliced == HEAD_CONVOLUTIONS and report.reinitialized == []
+    assert len(report.copied) == sum(isinstance(layer, ConvolutionLayer) for layer in target_layers) - 3
+
+    with DarknetWeights(source_path, source_layers) as source, DarknetWeights(target_path, target_layers) as target:
+        assert target.validate() == []
+        assert target.header == source.header
+        for index in (0, 80, 104):
+            assert bytes(target.layer_bytes(index)) == bytes(source.layer_bytes(index))
+        for index in HEAD_CONVOLUTIONS:
+            source_blocks, target_blocks = source.layer_view(index), target.layer_view(index)
+            assert target_blocks['weights'].shape[0] == 3 * (3 + 5)
+            for name in ('biases', 'weights'):
+                kept = source_blocks[name].reshape(3, 85, -1)[:, :8]
+                np.testing.assert_array_equal(target_blocks[name].reshape(3, 8, -1), kept)
+            del source_blocks, target_blocks, kept
+
+def test_transfer_many_reinitializes_incompatible_layers(tmp_path, yolov3_weights):
+    source_layers, source_path = yolov3_weights
+    wider = get_yolov3(num_classes=3)
+    wider[0].filters = 48
+    results = dict(transfer_many(source_layers, source_path, [(wider, str(tmp_path / 'wider.weights'))]))
+    assert results[str(tmp_path / 'wider.weights')].reinitialized == [0, 1]
+    with DarknetWeights(str(tmp_path / 'wider.weights'), wider) as weights:
+        assert weights.validate() == []
+        assert weights.layer_view(0)['scales'].tolist() == [1.0] * 48
+
+def test_mismatched_source_is_rejected(tmp_path, yolov3_weights):
+    _, source_path = yolov3_weights
+    with pytest.raises(ValueError):
+        transfer_weights(get_yolov3(num_classes=3), source_path, get_yolov3(num_classes=3), str(tmp_path / 'x'))
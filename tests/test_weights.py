@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from darknet_config_generator.yolo_layers import ConvolutionLayer, FullyConnectedLayer
+from darknet_config_generator.yolo_network import get_yolov3
+from darknet_config_generator.yolo_weights import (DarknetWeights, WeightsHeader, pack_header, read_header,
+                                                   weights_layout)
+
+SMALL_LAYERS = [ConvolutionLayer(size=3, stride=1, filters=4), ConvolutionLayer(size=1, stride=1, filters=2,
+                batch_normalize=False), FullyConnectedLayer(size=5)]
+
+
+def write_weights(path, count, header=WeightsHeader(0, 2, 0, 1000)):
+    with open(path, 'wb') as file_obj:
+        file_obj.write(pack_header(header))
+        file_obj.write(np.arange(count, dtype='<f4').tobytes())
+    return str(path)
+
+
+def test_yolov3_layout_matches_the_analysis(yolov3_network):
+    layout = weights_layout(yolov3_network)
+    assert layout.total_count == 62001757
+    assert layout.file_size() == 20 + 4 * 62001757
+    assert weights_layout(get_yolov3()).total_count == layout.total_count
+
+def test_small_layout_blocks():
+    layout = weights_layout(SMALL_LAYERS, (8, 8, 3))
+    assert [block.name for block in layout[0].blocks] == ['biases', 'scales', 'rolling_mean', 'rolling_variance',
+                                                          'weights']
+    assert [block.name for block in layout[1].blocks] == ['biases', 'weights']
+    assert layout[2].blocks[1].shape == (5, 8 * 8 * 2)
+    assert layout.total_count == (4 * 4 + 4 * 3 * 9) + (2 + 2 * 4) + (5 + 5 * 128)
+
+def test_headers_round_trip():
+    for header in (WeightsHeader(0, 2, 0, 1 << 40), WeightsHeader(0, 1, 0, 7)):
+        data = pack_header(header)
+        assert len(data) == (20 if header.minor == 2 else 16)
+        assert read_header(data) == header
+    with pytest.raises(ValueError):
+        read_header(b'\0' * 8)
+
+def test_views_read_the_file_in_place(tmp_path):
+    layout = weights_layout(SMALL_LAYERS, (8, 8, 3))
+    path = write_weights(tmp_path / 'small.weights', layout.total_count)
+    with DarknetWeights(path, SMALL_LAYERS, (8, 8, 3)) as weights:
+        assert weights.validate() == []
+        assert weights.header.seen == 1000
+        blocks = weights.layer_view(1)
+        assert blocks['biases'].tolist() == [layout[1].offset, layout[1].offset + 1]
+        assert blocks['weights'].shape == (2, 4, 1, 1)
+        assert len(weights.layer_bytes(2)) == layout[2].count * 4
+        with pytest.raises(ValueError):
+            weights.layer_view(3)
+        del blocks
+
+def test_truncated_files_are_reported(tmp_path):
+    layout = weights_layout(SMALL_LAYERS, (8, 8, 3))
+    path = write_weights(tmp_path / 'short.weights', layout.total_count - 10)
+    with DarknetWeights(path, SMALL_LAYERS, (8, 8, 3)) as weights:
+        issues = weights.validate()
+        assert len(issues) == 2 and '[connected]' in issues[1]
+        with pytest.raises(ValueError):
+            weights.layer_view(2)